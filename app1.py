@@ -1,14 +1,39 @@
 import streamlit as st
 import math
 import datetime
-import json
+import time
 import pandas as pd
-from io import BytesIO
-from fpdf import FPDF
+from functools import partial, wraps
 from streamlit_gsheets import GSheetsConnection
+from fcelec.moteur_cables import MEMO, METHODES_POSE, SECTIONS, dimensionner_cable, du_max_application, lettre_pose
+from fcelec.arrivees import ArriveesTableaux, reporter_dans_carnet
+from fcelec.chutes_tension import DU_MAX_DEFAUT, LIMITES_DU, ChutesTension
+from fcelec.courts_circuits import COURBE_DEFAUT, COURBES, CourtsCircuits
+from fcelec.balayage import balayer, grille, longueurs_limites, points_de_rupture, sections_selon_longueur
+from fcelec.nomenclature import IndexNomenclature, devis_xlsx
+from fcelec.catalogue import CataloguePrix
+from fcelec.optimisation import PARAMETRES_DEFAUT, appliquer_sections, optimiser_sections, prix_depuis_devis
+from fcelec.import_cables import importer_cables, modele_csv
+from fcelec.tables_iz import FACTEURS_GROUPEMENT, FACTEURS_RESISTIVITE_SOL, FACTEURS_TEMPERATURE, facteur_correction
+from fcelec.rapports import pdf_bilan, pdf_cables, sanitize_text
+from fcelec.bilan import compensation_reactive, synthese_bilan
+from fcelec.ressources import LOGO, lire_octets
+from fcelec.inscriptions import STOCKAGE_PAR_DEFAUT, exporter_xlsx, stockage_inscriptions
+from fcelec.mesures import MESURES, demarrer_profil, rapport_profil
+from fcelec.modele import nouveau_projet
+from fcelec.projet import EXTENSION, AutoSauvegarde, FormatProjetInvalide, charger, dossier_utilisateur, empreinte_octets, lister_autosauvegardes, serialiser
 
 # --- CONFIGURATION DE LA PAGE ---
 st.set_page_config(page_title="FC ELEC - Ingénierie & Chiffrage", layout="wide", initial_sidebar_state="expanded")
+debut_rechargement = time.perf_counter()
+
+# --- PROFIL D'UN RECHARGEMENT (demandé depuis le panneau de diagnostic) ---
+# Un rechargement interrompu par st.rerun() n'a pas rendu son profil : on l'abandonne
+profil_interrompu = st.session_state.pop("profil_en_cours", None)
+if profil_interrompu is not None:
+    profil_interrompu.disable()
+if st.session_state.pop("profiler_prochain", False):
+    st.session_state.profil_en_cours = demarrer_profil()
 
 # --- DESIGN PROFESSIONNEL (CSS) ---
 st.markdown("""
@@ -40,77 +65,76 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# --- RESSOURCES PARTAGÉES ---
+@st.cache_resource
+def stockage_partage(_conn, type_stockage=STOCKAGE_PAR_DEFAUT):
+    """Stockage des inscriptions construit une fois par processus (schéma SQLite, trigger, reprise de la feuille)."""
+    return stockage_inscriptions(_conn, type_stockage)
+
+@st.cache_resource
+def catalogue_partage():
+    """Catalogue de prix SQLite ouvert une fois par processus (schéma créé au premier appel)."""
+    return CataloguePrix()
+
 # --- INITIALISATION DE LA BASE DE DONNÉES ---
 if 'projet' not in st.session_state:
-    st.session_state.projet = {
-        "info": {"nom": "Chantier Résidentiel"},
-        "cables": [],
-        "tableaux": {},
-        "ks_global": 0.8
-    }
-
-# --- FONCTIONS UTILITAIRES ---
-def to_excel(df):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Chiffrage_FCELEC')
-    return output.getvalue()
-
-def sanitize_text(text, max_len=30):
-    """Blindage total contre les crashs PDF (Emojis, Arabe, Symboles spéciaux)"""
-    if not isinstance(text, str):
-        return str(text)
-    clean = text.replace("φ", "phi").replace("€", "Euros").replace("é", "e").replace("è", "e").replace("à", "a").replace("É", "E")
-    clean = clean.encode('latin-1', 'ignore').decode('latin-1')
-    return clean[:max_len] + "..." if len(clean) > max_len else clean
-
-# --- CLASSE PDF PROFESSIONNELLE ---
-class FCELEC_Report(FPDF):
-    def header(self):
-        try: self.image("logoFCELEC.png", 10, 8, 25)
-        except: pass
-        
-        # AJOUT DE LA LIGNE VERTICALE BLEUE A COTÉ DU LOGO
-        self.set_draw_color(2, 136, 209) # Bleu FC ELEC
-        self.set_line_width(0.6)
-        self.line(38, 8, 38, 23)
-        self.set_line_width(0.2)
-        self.set_draw_color(0, 0, 0) # Retour au noir pour le texte
-        
-        self.set_font("Helvetica", "B", 14)
-        self.cell(30)
-        self.cell(130, 8, "DOSSIER TECHNIQUE ELECTRIQUE", border=0, ln=0, align="C")
-        self.set_font("Helvetica", "I", 9)
-        self.cell(30, 8, f"{datetime.date.today().strftime('%d/%m/%Y')}", border=0, ln=1, align="R")
-        self.set_font("Helvetica", "I", 9)
-        self.cell(30)
-        self.cell(130, 5, "Note de calcul conforme a la norme NF C 15-100", border=0, ln=1, align="C")
-        
-        # Ligne horizontale en bleu
-        self.set_draw_color(2, 136, 209)
-        self.line(10, 26, 200, 26)
-        self.set_draw_color(0, 0, 0)
-        self.ln(12)
-
-    def footer(self):
-        self.set_y(-15)
-        self.set_font("Helvetica", "I", 8)
-        self.set_text_color(128, 128, 128)
-        self.line(10, 282, 200, 282)
-        self.cell(0, 5, f"FC ELEC - formation et consulting | WhatsApp : +212 6 74 53 42 64 | Page {self.page_no()}", 0, 0, "C")
+    st.session_state.projet = nouveau_projet()
+if 'arrivees' not in st.session_state:
+    st.session_state.arrivees = ArriveesTableaux()
+if 'chutes' not in st.session_state:
+    st.session_state.chutes = ChutesTension(st.session_state.arrivees)
+if 'nomenclature' not in st.session_state:
+    st.session_state.nomenclature = IndexNomenclature()
+    st.session_state.nomenclature.definir_catalogue(catalogue_partage())
+if 'courts_circuits' not in st.session_state:
+    st.session_state.courts_circuits = CourtsCircuits(st.session_state.arrivees)
+
+# --- FRAGMENTS ---
+def sauvegarde_automatique():
+    """Sauvegarde côté serveur : seules les sections modifiées sont réécrites."""
+    if st.session_state.projet["cables"] or st.session_state.projet["tableaux"]:
+        try:
+            st.session_state.autosauvegarde.sauvegarder(st.session_state.projet)
+        except OSError:
+            pass
+
+def fragment(nom, sauvegarde=False):
+    """st.fragment chronométré : seul ce bloc se réexécute quand on touche à ses widgets.
+
+    Les durées vont dans MESURES sous "Rendu · nom", arguments remplacés par * : tous les
+    onglets "Tableau {0}" partagent une même série p50/p95. Le reste du script n'étant pas réexécuté,
+    `sauvegarde` déclenche la sauvegarde automatique après le rendu. Un st.rerun() relance
+    toute la page quand d'autres zones doivent suivre.
+    """
+    def decorateur(fonction):
+        @wraps(fonction)
+        def chronometre(*args):
+            debut = time.perf_counter()
+            try:
+                fonction(*args)
+                if sauvegarde:
+                    sauvegarde_automatique()
+            finally:
+                duree = time.perf_counter() - debut
+                MESURES.enregistrer(f"Rendu · {nom.format(*['*'] * len(args))}", duree)
+            if st.session_state.get("afficher_durees"):
+                st.caption(f"⏱️ {nom.format(*args)} : {duree * 1000:.0f} ms")
+        return st.fragment(chronometre)
+    return decorateur
 
 # --- SÉCURITÉ ---
 def check_password():
     if "password_correct" not in st.session_state:
         col1, col2, col3 = st.columns([1,2,1])
         with col2:
-            st.image("logoFCELEC.png", width=250)
+            st.image(lire_octets(LOGO), width=250)
             st.markdown("<h3 style='text-align: center;'>🔐 Portail Ingénierie FC ELEC</h3>", unsafe_allow_html=True)
             user = st.text_input("Identifiant")
             pw = st.text_input("Mot de passe", type="password")
             if st.button("Authentification", use_container_width=True):
                 if "passwords" in st.secrets and user in st.secrets["passwords"] and pw == st.secrets["passwords"][user]:
                     st.session_state["password_correct"] = True
+                    st.session_state["utilisateur"] = user
                     st.rerun()
                 else:
                     st.error("❌ Accès refusé. Identifiants incorrects.")
@@ -119,24 +143,47 @@ def check_password():
 
 if check_password():
     # --- BARRE LATÉRALE ---
-    st.sidebar.image("logoFCELEC.png", use_container_width=True)
-    st.sidebar.markdown("### 💾 GESTION DE PROJET")
+    st.sidebar.image(lire_octets(LOGO), use_container_width=True)
+    dossier_sauvegardes = dossier_utilisateur(st.session_state.get("utilisateur", "anonyme"))
+    if "autosauvegarde" not in st.session_state:
+        st.session_state.autosauvegarde = AutoSauvegarde(dossier=dossier_sauvegardes)
+
+    @fragment("Gestion de projet")
+    def gestion_projet():
+        st.markdown("### 💾 GESTION DE PROJET")
+        st.info(f"📁 Projet actif : **{st.session_state.projet['info']['nom']}**")
+
+        # Le fichier n'est construit qu'au clic sur le bouton
+        st.download_button("📥 Sauvegarder Projet (.fcelec)", data=partial(serialiser, st.session_state.projet), file_name=f"{sanitize_text(st.session_state.projet['info']['nom'])}.{EXTENSION}", mime="application/octet-stream", use_container_width=True)
     
-    st.sidebar.info(f"📁 Projet actif : **{st.session_state.projet['info']['nom']}**")
+        fichier_charge = st.file_uploader("📂 Charger un Projet", type=[EXTENSION, 'json'])
+        if fichier_charge is not None:
+            octets = fichier_charge.getvalue()
+            empreinte_fichier = empreinte_octets(octets)
+            # Un même fichier n'est chargé qu'une fois, même s'il reste dans le sélecteur
+            if empreinte_fichier != st.session_state.get("empreinte_fichier_charge"):
+                try:
+                    st.session_state.projet = charger(octets)
+                    # Nouvelle sauvegarde automatique : celle du projet précédent reste intacte
+                    st.session_state.autosauvegarde = AutoSauvegarde(dossier=dossier_sauvegardes)
+                    st.session_state.empreinte_fichier_charge = empreinte_fichier
+                    st.success("✅ Projet chargé avec succès !")
+                    st.rerun()
+                except FormatProjetInvalide:
+                    st.error("Fichier invalide.")
+
+        autosauvegardes = lister_autosauvegardes(dossier_sauvegardes)[:10]
+        if autosauvegardes:
+            with st.expander("🕘 Sauvegardes automatiques"):
+                choix_sauvegarde = st.selectbox("Projet", autosauvegardes, format_func=lambda s: f"{s[1]} — {s[2].strftime('%d/%m/%Y %H:%M')}")
+                if st.button("♻️ Restaurer", use_container_width=True):
+                    sauvegarde = AutoSauvegarde(choix_sauvegarde[0], dossier=dossier_sauvegardes)
+                    st.session_state.projet = sauvegarde.restaurer()
+                    st.session_state.autosauvegarde = sauvegarde
+                    st.rerun()
 
-    projet_json = json.dumps(st.session_state.projet, indent=4)
-    st.sidebar.download_button("📥 Sauvegarder Projet (.json)", data=projet_json, file_name=f"{sanitize_text(st.session_state.projet['info']['nom'])}.json", mime="application/json", use_container_width=True)
-    
-    fichier_charge = st.sidebar.file_uploader("📂 Charger un Projet", type=['json'])
-    if fichier_charge is not None:
-        try:
-            donnees = json.load(fichier_charge)
-            if donnees != st.session_state.projet:
-                st.session_state.projet = donnees
-                st.sidebar.success("✅ Projet chargé avec succès !")
-                st.rerun()
-        except:
-            st.sidebar.error("Fichier invalide.")
+    with st.sidebar:
+        gestion_projet()
 
     st.sidebar.markdown("---")
     
@@ -147,6 +194,7 @@ if check_password():
         "💰 4. Nomenclature & Devis",
         "📉 5. Outils (Cos φ & IRVE)"
     ])
+    st.sidebar.toggle("⏱️ Afficher les temps de rendu", key="afficher_durees")
 
     # --- SECTION PUBLICITAIRE FC ELEC (SIDEBAR) ---
     st.sidebar.markdown("---")
@@ -177,7 +225,8 @@ if check_password():
     # =========================================================
     # MODULE 1 : CATALOGUE DES FORMATIONS (EN PREMIER)
     # =========================================================
-    if menu == "📚 1. Catalogue des Formations":
+    @fragment("Module 1 · Formations")
+    def module_formations():
         st.markdown("<h1 style='text-align: center; color: #01579b;'>📚 FC ELEC ACADEMY</h1>", unsafe_allow_html=True)
         st.markdown("<p style='text-align: center; font-size: 1.2em; color: #555;'>Formations pratiques et certifiantes en Ingénierie Électrique.</p>", unsafe_allow_html=True)
         st.markdown("---")
@@ -190,8 +239,7 @@ if check_password():
         with tab_catalogue:
             def charger_pdf(chemin_fichier):
                 try:
-                    with open(chemin_fichier, "rb") as pdf_file:
-                        return pdf_file.read()
+                    return lire_octets(chemin_fichier)
                 except FileNotFoundError:
                     return b"Fichier non trouve. Veuillez contacter l'administration."
 
@@ -206,7 +254,7 @@ if check_password():
                     <p style="font-size:0.9em; color: #666;">Conception experte selon les normes NFCs/UTEs via Caneco BT / HT.</p>
                 </div>
                 """, unsafe_allow_html=True)
-                st.download_button("📄 Télécharger le Programme", data=charger_pdf("FORMATION EN CONCEPTION DES INSTALLATIONS ÉLECTRIQUES CFO CANECO BT-HT.pdf"), file_name="Plan_CFO.pdf", mime="application/pdf", use_container_width=True)
+                st.download_button("📄 Télécharger le Programme", data=partial(charger_pdf, "FORMATION EN CONCEPTION DES INSTALLATIONS ÉLECTRIQUES CFO CANECO BT-HT.pdf"), file_name="Plan_CFO.pdf", mime="application/pdf", use_container_width=True)
             
             with col2:
                 st.markdown("""
@@ -216,7 +264,7 @@ if check_password():
                     <p style="font-size:0.9em; color: #666;">Conception de réseaux urbains et lotissements avec AutoCAD & Caneco.</p>
                 </div>
                 """, unsafe_allow_html=True)
-                st.download_button("📄 Télécharger le Programme", data=charger_pdf("FORMATION EN CONCEPTION DES RÉSEAUX DE DISTRIBUTION HT-BT-EP.pdf"), file_name="Plan_Reseaux.pdf", mime="application/pdf", use_container_width=True)
+                st.download_button("📄 Télécharger le Programme", data=partial(charger_pdf, "FORMATION EN CONCEPTION DES RÉSEAUX DE DISTRIBUTION HT-BT-EP.pdf"), file_name="Plan_Reseaux.pdf", mime="application/pdf", use_container_width=True)
 
             with col3:
                 st.markdown("""
@@ -226,7 +274,7 @@ if check_password():
                     <p style="font-size:0.9em; color: #666;">Dimensionnement et modélisation avancée de centrales sur PV SYST.</p>
                 </div>
                 """, unsafe_allow_html=True)
-                st.download_button("📄 Télécharger le Programme", data=charger_pdf("FORMATION EN ETUDE ET CONCEPTION DES SYSTEMES PHOTOVOLTAÏQUE.pdf"), file_name="Plan_Solaire.pdf", mime="application/pdf", use_container_width=True)
+                st.download_button("📄 Télécharger le Programme", data=partial(charger_pdf, "FORMATION EN ETUDE ET CONCEPTION DES SYSTEMES PHOTOVOLTAÏQUE.pdf"), file_name="Plan_Solaire.pdf", mime="application/pdf", use_container_width=True)
 
             st.write("")
             col4, col5, col6 = st.columns(3)
@@ -239,7 +287,7 @@ if check_password():
                     <p style="font-size:0.9em; color: #666;">Étude photométrique pointue selon les normes EN 13-201 & 12464-1.</p>
                 </div>
                 """, unsafe_allow_html=True)
-                st.download_button("📄 Télécharger le Programme", data=charger_pdf("FORMATION EN ECLAIRAGE INTERIEUR ET EXTERIEUR 2025.pdf"), file_name="Plan_Eclairage.pdf", mime="application/pdf", use_container_width=True)
+                st.download_button("📄 Télécharger le Programme", data=partial(charger_pdf, "FORMATION EN ECLAIRAGE INTERIEUR ET EXTERIEUR 2025.pdf"), file_name="Plan_Eclairage.pdf", mime="application/pdf", use_container_width=True)
 
             with col5:
                 st.markdown("""
@@ -249,10 +297,11 @@ if check_password():
                     <p style="font-size:0.9em; color: #666;">Infrastructures génie civil, Fibre Optique et dimensionnement PTT.</p>
                 </div>
                 """, unsafe_allow_html=True)
-                st.download_button("📄 Télécharger le Programme", data=charger_pdf("FORMATION EN ETUDE ET CONCEPTION DES RESEAUX DE TELECOMS.pdf"), file_name="Plan_Telecoms.pdf", mime="application/pdf", use_container_width=True)
+                st.download_button("📄 Télécharger le Programme", data=partial(charger_pdf, "FORMATION EN ETUDE ET CONCEPTION DES RESEAUX DE TELECOMS.pdf"), file_name="Plan_Telecoms.pdf", mime="application/pdf", use_container_width=True)
 
         with tab_inscription:
             conn = st.connection("gsheets", type=GSheetsConnection)
+            stockage = stockage_partage(conn)
             
             with st.container(border=True):
                 st.markdown("<h3 style='color: #01579b;'>📝 Demande d'Inscription / Devis</h3>", unsafe_allow_html=True)
@@ -286,12 +335,8 @@ if check_password():
                         if not nom_client or not email_client or not tel_client or not pays_client or sexe_client == "Sélectionner":
                             st.error("⚠️ Veuillez remplir tous les champs obligatoires.")
                         else:
-                            try:
-                                df_existantes = conn.read(worksheet="Inscriptions", ttl=5)
-                            except:
-                                df_existantes = pd.DataFrame(columns=["Date", "Nom et Prénom", "Sexe", "E-mail", "Pays", "WhatsApp", "Formation Demandée"])
-
-                            nouvelle_inscription = pd.DataFrame([{
+                            # Ajout seul : la demande est d'abord enregistrée localement, puis envoyée par lot
+                            stockage.ajouter({
                                 "Date": datetime.date.today().strftime("%d/%m/%Y"),
                                 "Nom et Prénom": nom_client,
                                 "Sexe": sexe_client,
@@ -299,10 +344,7 @@ if check_password():
                                 "Pays": pays_client,
                                 "WhatsApp": tel_client,
                                 "Formation Demandée": formation_choisie
-                            }])
-
-                            df_mise_a_jour = pd.concat([df_existantes, nouvelle_inscription], ignore_index=True)
-                            conn.update(worksheet="Inscriptions", data=df_mise_a_jour)
+                            })
 
                             st.success(f"🎉 Parfait {nom_client} ! Votre demande a été enregistrée de manière sécurisée.")
                             
@@ -348,19 +390,51 @@ if check_password():
 
                     st.markdown("#### 📊 Base de données des Inscriptions")
                     try:
-                        df_inscrits = conn.read(worksheet="Inscriptions", ttl=5)
-                        if df_inscrits.empty:
+                        stockage.synchroniser()
+                    except Exception:
+                        st.warning("⚠️ Synchronisation Google Sheets impossible : demandes en attente conservées localement.")
+                    try:
+                        nb_inscrits = stockage.compter()
+                        if nb_inscrits == 0:
                             st.warning("Aucun prospect enregistré.")
                         else:
-                            st.dataframe(df_inscrits, use_container_width=True)
-                            
-                            output_excel = BytesIO()
-                            with pd.ExcelWriter(output_excel, engine='openpyxl') as writer:
-                                df_inscrits.to_excel(writer, index=False, sheet_name='Inscriptions')
-                            
+                            agregats_tous = stockage.agregats()
+                            col_f1, col_f2, col_f3 = st.columns(3)
+                            periode = col_f1.date_input("📅 Période", value=(), format="DD/MM/YYYY")
+                            formation_filtre = col_f2.selectbox("🎓 Formation", ["Toutes"] + agregats_tous["Formation"]["Formation"].tolist())
+                            pays_filtre = col_f3.selectbox("🌍 Pays", ["Tous"] + agregats_tous["Pays"]["Pays"].tolist())
+                            filtres = {
+                                "formation": None if formation_filtre == "Toutes" else formation_filtre,
+                                "pays": None if pays_filtre == "Tous" else pays_filtre,
+                                "date_debut": periode[0] if len(periode) > 0 else None,
+                                "date_fin": periode[1] if len(periode) > 1 else None,
+                            }
+                            filtre_actif = any(filtres.values())
+                            agregats = stockage.agregats(**filtres) if filtre_actif else agregats_tous
+                            nb_filtres = stockage.compter(**filtres) if filtre_actif else nb_inscrits
+
+                            st.metric("Prospects", nb_filtres, delta=f"sur {nb_inscrits}" if filtre_actif else None, delta_color="off")
+                            col_a1, col_a2, col_a3 = st.columns(3)
+                            col_a1.dataframe(agregats["Formation"], hide_index=True, use_container_width=True)
+                            col_a2.dataframe(agregats["Pays"], hide_index=True, use_container_width=True)
+                            col_a3.dataframe(agregats["Mois"], hide_index=True, use_container_width=True)
+
+                            if nb_filtres == 0:
+                                st.info("Aucun prospect ne correspond aux filtres.")
+                            else:
+                                col_p1, col_p2 = st.columns(2)
+                                par_page = col_p1.selectbox("Lignes par page", [25, 50, 100, 250], index=1)
+                                nb_pages = (nb_filtres - 1) // par_page + 1
+                                # Retour à la première page quand les filtres changent
+                                page = col_p2.number_input(f"Page (sur {nb_pages})", min_value=1, max_value=nb_pages, value=1,
+                                                           key=f"page_inscrits_{hash((tuple(filtres.values()), par_page))}")
+                                st.caption("Les plus récents en premier.")
+                                st.dataframe(stockage.lister((page - 1) * par_page, par_page, **filtres), use_container_width=True)
+
+                            # Classeur construit seulement au clic, à partir des filtres en cours
                             st.download_button(
                                 label="📥 EXPORTER BASE CLIENTS (.XLSX)",
-                                data=output_excel.getvalue(),
+                                data=partial(exporter_xlsx, stockage, **filtres),
                                 file_name=f"Base_Clients_{datetime.date.today().strftime('%d_%m_%Y')}.xlsx",
                                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                                 type="primary"
@@ -368,10 +442,44 @@ if check_password():
                     except Exception as e:
                         st.error("Erreur de connexion à Google Sheets.")
 
+                    # Cache du moteur de câbles, commun à toutes les sessions du processus
+                    st.markdown("#### 🩺 Diagnostics")
+                    stats_memo = MEMO.statistiques()
+                    col_d1, col_d2, col_d3 = st.columns(3)
+                    col_d1.metric("Dimensionnements en cache", f"{stats_memo['entrees']} / {stats_memo['taille']}")
+                    col_d2.metric("Succès / échecs", f"{stats_memo['succes']} / {stats_memo['echecs']}")
+                    col_d3.metric("Taux de succès", f"{stats_memo['taux']:.0%}")
+                    if st.button("🧹 Vider le cache de dimensionnement"):
+                        MEMO.vider()
+                        st.rerun()
+                    # Rendus des modules et fragments, PDF, DataFrame, Google Sheets, JSON : toutes sessions du processus
+                    stats_mesures = MESURES.statistiques()
+                    if stats_mesures:
+                        st.dataframe(pd.DataFrame(stats_mesures), use_container_width=True, hide_index=True)
+                    compteurs = MESURES.compteurs()
+                    if compteurs:
+                        st.caption(" · ".join(f"{nom} : {n}" for nom, n in sorted(compteurs.items())))
+                    col_p1, col_p2, col_p3 = st.columns(3)
+                    if col_p1.button("🔬 Profiler le prochain rechargement", help="cProfile du prochain rechargement complet de la page (changement de module, bouton...)"):
+                        st.session_state.profiler_prochain = True
+                        st.toast("Le prochain rechargement complet sera profilé.")
+                    col_p2.download_button("📥 Journal des mesures (JSONL)", data=MESURES.journal_jsonl,
+                                           file_name=f"Mesures_FCELEC_{datetime.datetime.now().strftime('%d_%m_%Y_%H%M')}.jsonl",
+                                           mime="application/x-ndjson")
+                    if col_p3.button("🧹 Remettre les mesures à zéro"):
+                        MESURES.vider()
+                        st.rerun()
+                    if st.session_state.get("rapport_profil"):
+                        with st.expander("🔬 Profil du dernier rechargement profilé"):
+                            st.code(st.session_state.rapport_profil, language=None)
+                            st.download_button("📥 Profil (texte)", data=st.session_state.rapport_profil,
+                                               file_name="Profil_FCELEC.txt", mime="text/plain")
+
     # =========================================================
     # MODULE 2 : CARNET DE CÂBLES
     # =========================================================
-    elif menu == "🔌 2. Carnet de Câbles":
+    @fragment("Module 2 · Carnet de câbles", sauvegarde=True)
+    def module_carnet_cables():
         st.title("🔌 Ingénierie des Lignes (NF C 15-100)")
         
         with st.container(border=True):
@@ -379,7 +487,12 @@ if check_password():
             col_p1, col_p2, col_p3 = st.columns(3)
             nom_p = col_p1.text_input("Nom du Projet", st.session_state.projet["info"]["nom"], key="proj_m1")
             st.session_state.projet["info"]["nom"] = nom_p
-            nom_tab_cables = col_p2.text_input("Tableau Source", "TGBT")
+            # Tableau source choisi parmi ceux du bilan de puissance quand il en existe
+            tableaux_bilan = [nom for nom, _ in st.session_state.projet["tableaux"].parcours()]
+            if tableaux_bilan:
+                nom_tab_cables = col_p2.selectbox("Tableau Source", tableaux_bilan)
+            else:
+                nom_tab_cables = col_p2.text_input("Tableau Source", "TGBT")
             ref_c = col_p3.text_input("Désignation", "Départ Sous-sol")
 
             st.markdown("---")
@@ -410,128 +523,145 @@ if check_password():
                 ])
                 
                 c8, c9 = st.columns(2)
-                methode_pose = c8.selectbox("Méthode de Pose de Référence", [
-                    "Méthode A (Encastré dans paroi isolante)", 
-                    "Méthode B (Sous conduit apparent ou encastré)", 
-                    "Méthode C (Câble fixé au mur / apparent)",
-                    "Méthode D (Enterré dans le sol)",
-                    "Méthode E/F (Chemin de câbles / Air libre)"
-                ])
+                methode_pose = c8.selectbox("Méthode de Pose de Référence", METHODES_POSE)
                 cos_phi = c9.slider("Facteur de puissance (Cos φ)", 0.7, 1.0, 0.85)
 
-                if st.form_submit_button("Calculer et Mémoriser", use_container_width=True):
-                    V = 230 if "230V" in tension else 400
-                    rho = 0.0225 if "Cuivre" in nature else 0.036
-                    b = 2 if "230V" in tension else 1
-                    
-                    if "3%" in type_charge: du_max = 3.0
-                    elif "2%" in type_charge: du_max = 2.0
-                    else: du_max = 5.0
+                # Conditions d'installation -> facteurs de correction k1 (température), k2 (groupement), k3 (sol, pose D)
+                c10, c11, c12 = st.columns(3)
+                temperature = c10.number_input("Température ambiante (°C)", min_value=-20.0, max_value=float(max(FACTEURS_TEMPERATURE["PR"])), value=30.0, step=5.0)
+                nb_jointifs = c11.number_input("Circuits jointifs", min_value=1, max_value=max(FACTEURS_GROUPEMENT), value=1)
+                resistivite = c12.number_input("Résistivité du sol (K.m/W, pose D)", min_value=0.4, max_value=max(FACTEURS_RESISTIVITE_SOL), value=1.0, step=0.1)
 
-                    Ib = p_w / (V * cos_phi) if b == 2 else p_w / (V * math.sqrt(3) * cos_phi)
-                    calibres = [10, 16, 20, 25, 32, 40, 50, 63, 80, 100, 125, 160, 200, 250, 400, 630, 800, 1000]
-                    In = next((x for x in calibres if x >= Ib), 1000)
-                    
-                    sections = [1.5, 2.5, 4, 6, 10, 16, 25, 35, 50, 70, 95, 120, 150, 185, 240, 300]
-                    
-                    S_calc_du = (b * rho * longueur * Ib) / ((du_max / 100) * V)
-                    S_ret_du = next((s for s in sections if s >= S_calc_du), 300)
-
-                    # Base de données complète des Iz
-                    dict_iz = {
-                        "Méthode A (Encastré dans paroi isolante)": {1.5: 14.5, 2.5: 19.5, 4: 26, 6: 34, 10: 46, 16: 61, 25: 80, 35: 99, 50: 119, 70: 151, 95: 182, 120: 210, 150: 240, 185: 273, 240: 321, 300: 367},
-                        "Méthode B (Sous conduit apparent ou encastré)": {1.5: 17.5, 2.5: 24, 4: 32, 6: 41, 10: 57, 16: 76, 25: 101, 35: 125, 50: 151, 70: 192, 95: 232, 120: 269, 150: 309, 185: 353, 240: 415, 300: 477},
-                        "Méthode C (Câble fixé au mur / apparent)": {1.5: 19.5, 2.5: 27, 4: 36, 6: 46, 10: 63, 16: 85, 25: 112, 35: 138, 50: 168, 70: 213, 95: 258, 120: 299, 150: 344, 185: 392, 240: 461, 300: 530},
-                        "Méthode D (Enterré dans le sol)": {1.5: 22, 2.5: 29, 4: 37, 6: 46, 10: 61, 16: 79, 25: 101, 35: 122, 50: 144, 70: 178, 95: 211, 120: 240, 150: 271, 185: 304, 240: 351, 300: 396},
-                        "Méthode E/F (Chemin de câbles / Air libre)": {1.5: 23, 2.5: 31, 4: 42, 6: 54, 10: 75, 16: 100, 25: 135, 35: 169, 50: 207, 70: 268, 95: 328, 120: 382, 150: 441, 185: 506, 240: 599, 300: 693}
-                    }
-                    
-                    k_al = 0.78 if "Aluminium" in nature else 1.0
-                    k_mono = 1.15 if "230V" in tension else 1.0
-                    
-                    S_ret_iz = 300
-                    for s in sections:
-                        Iz_calc = dict_iz[methode_pose][s] * k_al * k_mono
-                        if Iz_calc >= In:
-                            S_ret_iz = s
-                            break
-
-                    S_ret = max(S_ret_du, S_ret_iz)
-                    
-                    Iz_reel = dict_iz[methode_pose][S_ret] * k_al * k_mono
-                    du_reel_pct = (((b * rho * longueur * Ib) / S_ret) / V) * 100
-                    
-                    lettre_pose = methode_pose.split(" ")[1]
-
-                    st.session_state.projet["cables"].append({
-                        "Tableau": nom_tab_cables, "Repère": ref_c, "Type Câble": type_cable, "Métal": nature, 
-                        "Pose": lettre_pose, "Tension": tension, "P(W)": p_w, "Long.(m)": longueur,
-                        "Ib(A)": round(Ib, 1), "Calibre(A)": In, "Iz(A)": round(Iz_reel, 1), "Section(mm2)": S_ret, "dU(%)": round(du_reel_pct, 2)
-                    })
-                    st.success(f"✅ Section retenue : **{S_ret} mm²** (Iz={round(Iz_reel,1)}A, Pose {lettre_pose}) | Disjoncteur: **{In}A**")
+                if st.form_submit_button("Calculer et Mémoriser", use_container_width=True):
+                    k = facteur_correction(temperature, type_cable, nb_jointifs, resistivite if lettre_pose(methode_pose) == "D" else None)
+                    ligne = dimensionner_cable(tension, p_w, longueur, nature, methode_pose, cos_phi, type_charge,
+                                               nom_tableau=nom_tab_cables, repere=ref_c, type_cable=type_cable, k=k)
+                    st.session_state.projet["cables"].append(ligne)
+                    st.success(f"✅ Section retenue : **{ligne['Section(mm2)']} mm²** (Iz={ligne['Iz(A)']}A, Pose {ligne['Pose']}) | Disjoncteur: **{ligne['Calibre(A)']}A**")
+
+        # Grille complète calculée en un appel et gardée en cache : déplacer les curseurs ne recalcule rien
+        @fragment("Balayage paramétrique")
+        def balayage_parametrique():
+            with st.expander("📈 Balayage paramétrique (longueur x puissance x pose)"):
+                col_b1, col_b2, col_b3, col_b4 = st.columns(4)
+                b_tension = col_b1.selectbox("Tension", ["230V Mono", "400V Tri"], index=1, key="balayage_tension")
+                b_metal = col_b2.selectbox("Métal", ["Cuivre", "Aluminium"], key="balayage_metal")
+                b_cos = col_b3.number_input("Cos φ", min_value=0.7, max_value=1.0, value=0.85, step=0.05, key="balayage_cos")
+                b_charge = col_b4.selectbox("Application", ["Éclairage (Max 3%)", "Prises de courant (Max 5%)", "Ligne Principale (Max 2%)"], index=1, key="balayage_charge")
+                col_b5, col_b6, col_b7, col_b8 = st.columns(4)
+                b_lmax = col_b5.number_input("Longueur max (m)", min_value=10.0, max_value=2000.0, value=500.0, step=50.0)
+                b_nl = col_b6.number_input("Points en longueur", min_value=10, max_value=1000, value=100, step=10)
+                b_pmax = col_b7.number_input("Puissance max (kW)", min_value=1.0, max_value=2000.0, value=100.0, step=10.0)
+                b_np = col_b8.number_input("Points en puissance", min_value=10, max_value=500, value=51, step=10)
+                debut = time.perf_counter()
+                balayage = balayer(b_tension, b_metal, b_cos, du_max_application(b_charge),
+                                   grille(1.0, b_lmax, b_nl), grille(0.0, b_pmax * 1000, b_np))
+                duree_calcul = time.perf_counter() - debut
+                st.caption(f"{b_nl * b_np * len(balayage['Pose'])} dimensionnements en {duree_calcul * 1000:.1f} ms.")
+
+                col_g1, col_g2 = st.columns(2)
+                b_puissance = col_g1.select_slider("Puissance (W)", options=list(balayage["P(W)"]), value=balayage["P(W)"][len(balayage["P(W)"]) // 2])
+                b_pose = col_g2.selectbox("Méthode de pose", balayage["Pose"], index=len(balayage["Pose"]) - 1, key="balayage_pose")
+                i_puissance, i_pose = list(balayage["P(W)"]).index(b_puissance), balayage["Pose"].index(b_pose)
+                st.markdown(f"**Section retenue selon la longueur à {b_puissance / 1000:g} kW**")
+                st.line_chart(sections_selon_longueur(balayage, i_puissance), x_label="Longueur (m)", y_label="Section (mm²)")
+                ruptures = points_de_rupture(balayage, i_puissance, i_pose)
+                if ruptures:
+                    st.dataframe(pd.DataFrame(ruptures, columns=["À partir de (m)", "Section avant (mm²)", "Section après (mm²)"]), use_container_width=True, hide_index=True)
+                st.markdown(f"**Longueur maximale par section selon la puissance (pose {b_pose})**")
+                st.line_chart(longueurs_limites(balayage, i_pose), x_label="Puissance (W)", y_label="Longueur max (m)")
+        balayage_parametrique()
+
+        with st.expander("📥 Import en masse (CSV / XLSX)"):
+            st.caption("Colonnes attendues : Tableau, Repère, Type Câble, Tension, P(W), Long.(m), Métal, Pose (A, B, C, D, E/F), Cos φ, dU max(%) ; "
+                       "en option Temp.(°C), Circuits jointifs et Résistivité sol(K.m/W) (pose D) pour les facteurs de correction.")
+            st.download_button("📄 Télécharger le modèle CSV", data=modele_csv(), file_name="Modele_Carnet_Cables.csv", mime="text/csv")
+            fichier_cables = st.file_uploader("Fichier de circuits", type=["csv", "xlsx"], key="import_cables")
+            if fichier_cables is not None and st.button("⚙️ Importer et Dimensionner", use_container_width=True):
+                barre = st.progress(0.0, text="Lecture du fichier...")
+                def suivi(nb_lignes, avancement):
+                    barre.progress(avancement if avancement is not None else 0.0, text=f"{nb_lignes} lignes traitées...")
+                try:
+                    lignes_importees, erreurs_import = importer_cables(fichier_cables, fichier_cables.name, progression=suivi)
+                except ValueError as e:
+                    st.error(f"❌ {e}")
+                else:
+                    barre.progress(1.0, text="Import terminé.")
+                    st.session_state.projet["cables"].extend(lignes_importees)
+                    st.success(f"✅ {len(lignes_importees)} circuits dimensionnés et ajoutés au carnet.")
+                    if erreurs_import:
+                        st.warning(f"⚠️ {len(erreurs_import)} anomalie(s) : les lignes concernées ont été ignorées.")
+                        st.dataframe(pd.DataFrame(erreurs_import), use_container_width=True, hide_index=True)
 
         if st.session_state.projet["cables"]:
             st.markdown("### 📑 Carnet de Câbles Généré")
-            st.dataframe(pd.DataFrame(st.session_state.projet["cables"]), use_container_width=True)
-            
-            def generate_pdf_cables():
-                pdf = FCELEC_Report()
-                pdf.set_auto_page_break(auto=True, margin=15)
-                pdf.add_page()
-                pdf.set_font("Helvetica", "B", 12)
-                pdf.set_fill_color(2, 136, 209) # Bleu moderne
-                pdf.set_text_color(255, 255, 255)
-                titre = sanitize_text(st.session_state.projet['info']['nom']).upper()
-                pdf.cell(190, 10, f" CARNET DE CABLES - {titre}", border=0, ln=True, align="C", fill=True)
-                pdf.ln(5)
-                
-                pdf.set_font("Helvetica", "B", 8)
-                pdf.set_fill_color(230, 230, 230)
-                pdf.set_text_color(0, 0, 0)
-                
-                # REDIMENSIONNEMENT DES COLONNES DU PDF ET SUPPRESSION DE LA POSE
-                headers = ["Tab.", "Repere", "Type Cable", "L(m)", "Ib(A)", "In(A)", "Iz(A)", "Section", "dU(%)"]
-                widths = [14, 26, 40, 12, 15, 15, 15, 35, 18] # Total exact = 190
-                
-                for i in range(len(headers)): 
-                    pdf.cell(widths[i], 8, headers[i], 1, 0, 'C', True)
-                pdf.ln()
-                
-                pdf.set_font("Helvetica", "", 8)
-                for row in st.session_state.projet["cables"]:
-                    pdf.cell(widths[0], 8, sanitize_text(row.get("Tableau", "TGBT"), 12), 1)
-                    pdf.cell(widths[1], 8, sanitize_text(row["Repère"], 18), 1)
-                    
-                    clean_type = sanitize_text(row.get("Type Câble", "U1000 R2V").split(" (")[0], 25) 
-                    pdf.cell(widths[2], 8, clean_type, 1, 0, 'C')
-                    
-                    pdf.cell(widths[3], 8, str(row["Long.(m)"]), 1, 0, 'C')
-                    pdf.cell(widths[4], 8, str(row["Ib(A)"]), 1, 0, 'C')
-                    
-                    pdf.set_font("Helvetica", "B", 8)
-                    pdf.cell(widths[5], 8, f"{row['Calibre(A)']}A", 1, 0, 'C')
-                    pdf.set_text_color(0, 128, 0)
-                    pdf.cell(widths[6], 8, f"{row.get('Iz(A)', '-')}A", 1, 0, 'C')
-                    
-                    pdf.set_text_color(255, 100, 0)
-                    # La méthode de pose a été supprimée, seul le texte de la section apparait
-                    pdf.cell(widths[7], 8, f"{row['Section(mm2)']} mm2", 1, 0, 'C')
-                    
-                    pdf.set_text_color(0, 0, 0)
-                    pdf.set_font("Helvetica", "", 8)
-                    pdf.cell(widths[8], 8, str(row["dU(%)"]), 1, 1, 'C')
-                
-                # CORRECTION DE L'ERREUR DE BYTES / FPDF
-                pdf_out = pdf.output(dest='S')
-                return pdf_out.encode('latin-1') if isinstance(pdf_out, str) else bytes(pdf_out)
+            st.dataframe(st.session_state.projet["cables"].dataframe(), use_container_width=True)
+
+            # Chute cumulée : arrivées des tableaux du bilan + chute propre du câble
+            @fragment("Chute de tension cumulée")
+            def chutes_cumulees():
+                with st.expander("📉 Chute de tension cumulée depuis la source"):
+                    limite_du = st.selectbox("Limite NF C 15-100 (depuis l'origine)", list(LIMITES_DU), index=1)
+                    depassements = st.session_state.chutes.depassements(st.session_state.projet["cables"], st.session_state.projet["tableaux"], LIMITES_DU[limite_du])
+                    if len(depassements):
+                        st.error(f"❌ {len(depassements)} câble(s) au-delà de {LIMITES_DU[limite_du]} % de chute cumulée.")
+                        st.dataframe(depassements, use_container_width=True, hide_index=True)
+                    else:
+                        st.success(f"✅ Chute cumulée inférieure à {LIMITES_DU[limite_du]} % sur tout le carnet.")
+            chutes_cumulees()
+
+            # Icc depuis la source (transformateur du module 3) jusqu'au bout de chaque ligne
+            @fragment("Courts-circuits")
+            def courts_circuits():
+                with st.expander("⚡ Courts-circuits : pouvoir de coupure et longueur protégée"):
+                    courbe = st.selectbox("Courbe des disjoncteurs", list(COURBES), index=list(COURBES).index(COURBE_DEFAUT))
+                    st.session_state.courts_circuits.definir_source(st.session_state.projet["source"])
+                    verification = st.session_state.courts_circuits.verifier(st.session_state.projet["cables"], st.session_state.projet["tableaux"], courbe)
+                    non_conformes = verification[~(verification["PdC OK"] & verification["Longueur OK"])]
+                    if len(non_conformes):
+                        st.error(f"❌ {len(non_conformes)} câble(s) non conforme(s) : pouvoir de coupure insuffisant ou longueur supérieure à la longueur protégée.")
+                        st.dataframe(non_conformes, use_container_width=True, hide_index=True)
+                    else:
+                        st.success("✅ Pouvoirs de coupure et longueurs protégées vérifiés sur tout le carnet.")
+            courts_circuits()
+
+            # Section économique : prix du devis (module 4), du catalogue ou de référence + pertes Joule actualisées
+            @fragment("Optimisation des sections")
+            def optimisation_sections():
+                with st.expander("💡 Optimisation économique des sections"):
+                    col_o1, col_o2, col_o3, col_o4 = st.columns(4)
+                    tarif = col_o1.number_input("Tarif énergie (MAD/kWh)", min_value=0.0, value=PARAMETRES_DEFAUT["tarif"], step=0.1)
+                    heures = col_o2.number_input("Heures à Ib par an", min_value=0.0, max_value=8760.0, value=PARAMETRES_DEFAUT["heures"], step=100.0)
+                    duree = col_o3.number_input("Durée de vie (ans)", min_value=1, max_value=50, value=PARAMETRES_DEFAUT["duree"])
+                    taux = col_o4.number_input("Taux d'actualisation (%)", min_value=0.0, max_value=20.0, value=PARAMETRES_DEFAUT["taux"], step=0.5)
+                    debut = time.perf_counter()
+                    carnet = st.session_state.projet["cables"].dataframe()
+                    types_courts = carnet.get("Type Câble", pd.Series("", index=carnet.index)).astype(str).str.split(" (", regex=False).str[0]
+                    metaux_types = set(zip(carnet["Métal"].astype(str), types_courts))
+                    prix_cables = {**catalogue_partage().prix_cables(metaux_types), **prix_depuis_devis(st.session_state.nomenclature.prix_saisis())}
+                    optimisation = optimiser_sections(st.session_state.projet["cables"], tarif, heures, duree, taux, prix_cables)
+                    duree_calcul = time.perf_counter() - debut
+                    a_augmenter = optimisation[optimisation["Gain(MAD)"] > 0] if len(optimisation) else optimisation
+                    st.caption(f"{len(optimisation)} câbles x {len(SECTIONS)} sections évalués en {duree_calcul * 1000:.1f} ms "
+                               "(arrivées de tableaux exclues : elles suivent le bilan de puissance).")
+                    if len(a_augmenter):
+                        st.info(f"💡 {len(a_augmenter)} câble(s) plus économiques avec une section supérieure : gain total **{a_augmenter['Gain(MAD)'].sum():,.2f} MAD** sur {duree} ans.")
+                        st.dataframe(a_augmenter.drop(columns="_i_section"), use_container_width=True, hide_index=True)
+                        if st.button("✅ Appliquer les sections optimales", use_container_width=True):
+                            appliquer_sections(st.session_state.projet["cables"], optimisation)
+                            st.rerun()
+                    else:
+                        st.success("✅ Les sections réglementaires sont aussi les plus économiques.")
+            optimisation_sections()
 
             col_btn1, col_btn2 = st.columns(2)
             
             with col_btn1:
-                # Correction: Affichage direct du bouton de téléchargement au lieu d'être caché dans un st.button
+                # PDF généré au clic seulement, puis servi depuis le cache tant que le carnet ne change pas
+                projet = st.session_state.projet
                 st.download_button(
                     label="📄 EXPORTER NOTE DE CALCUL (PDF)",
-                    data=generate_pdf_cables(),
+                    data=lambda: pdf_cables(projet),
                     file_name=f"Note_Calcul_{sanitize_text(st.session_state.projet['info']['nom'])}.pdf",
                     mime="application/pdf",
                     type="primary",
@@ -540,13 +670,14 @@ if check_password():
             
             with col_btn2:
                 if st.button("🗑️ Vider le Carnet", use_container_width=True):
-                    st.session_state.projet["cables"] = []
+                    st.session_state.projet["cables"].clear()
                     st.rerun()
 
     # =========================================================
     # MODULE 3 : ARCHITECTURE MULTI-TABLEAUX
     # =========================================================
-    elif menu == "🏢 3. Bilan de Puissance":
+    @fragment("Module 3 · Bilan", sauvegarde=True)
+    def module_bilan():
         st.title("🏢 Architecture et Bilan de Puissance")
         
         with st.container(border=True):
@@ -555,172 +686,220 @@ if check_password():
             st.session_state.projet["info"]["nom"] = nom_p_m2
             
             st.markdown("---")
-            col_t1, col_t2 = st.columns([3, 1])
+            arbre = st.session_state.projet["tableaux"]
+            SOURCE = "⚡ Source (départ direct)"
+            col_t1, col_t2, col_t3, col_t4 = st.columns([3, 2, 1, 1])
             nouveau_tab = col_t1.text_input("Nom du nouveau Tableau (ex: TD RDC, TGBT)")
-            if col_t2.button("➕ Créer Tableau", use_container_width=True) and nouveau_tab:
-                if nouveau_tab not in st.session_state.projet["tableaux"]:
-                    st.session_state.projet["tableaux"][nouveau_tab] = []
+            amont_nouveau = col_t2.selectbox("Alimenté par", [SOURCE] + list(arbre), key="amont_nouveau_tab")
+            ks_nouveau = col_t3.number_input("Ks", min_value=0.1, max_value=1.0, value=1.0, step=0.05, key="ks_nouveau_tab")
+            if col_t4.button("➕ Créer Tableau", use_container_width=True) and nouveau_tab:
+                if nouveau_tab not in arbre:
+                    arbre.ajouter_tableau(nouveau_tab, parent=None if amont_nouveau == SOURCE else amont_nouveau, ks=ks_nouveau)
                     st.rerun()
 
         if st.session_state.projet["tableaux"]:
-            onglets = st.tabs(list(st.session_state.projet["tableaux"].keys()) + ["🌍 SYNTHÈSE GLOBALE"])
+            # Onglets dans l'ordre de l'arborescence (TGBT, puis ses TD, puis leurs sous-tableaux...)
+            ordre_tableaux = arbre.parcours()
+            onglets = st.tabs([f"{'↳ ' * niveau}{nom}" for nom, niveau in ordre_tableaux] + ["🌍 SYNTHÈSE GLOBALE"])
             
-            for i, nom_tab in enumerate(list(st.session_state.projet["tableaux"].keys())):
-                with onglets[i]:
-                    st.markdown(f"### Gestion du tableau : {nom_tab}")
-                    if st.button(f"❌ Supprimer '{nom_tab}'", key=f"del_{nom_tab}"):
-                        del st.session_state.projet["tableaux"][nom_tab]
-                        st.rerun()
+            # Un onglet se réexécute seul ; ce qui touche les autres onglets (Ks, arrivée, circuits) relance la page
+            @fragment("Tableau {0}")
+            def onglet_tableau(nom_tab, niveau, i):
+                st.markdown(f"### Gestion du tableau : {nom_tab}")
+                if niveau:
+                    st.caption("Chemin : " + " → ".join(reversed([nom_tab] + arbre.ancetres(nom_tab))))
+                col_a1, col_a2, col_a3 = st.columns([2, 1, 1])
+                # Pas de rattachement à son propre aval (boucle)
+                amonts_possibles = [SOURCE] + [t for t in arbre if t != nom_tab and nom_tab not in arbre.ancetres(t)]
+                amont_actuel = arbre.parent(nom_tab) or SOURCE
+                amont_tab = col_a1.selectbox("Alimenté par", amonts_possibles, index=amonts_possibles.index(amont_actuel), key=f"amont_{nom_tab}")
+                ks_tab = col_a2.number_input("Ks du tableau", min_value=0.1, max_value=1.0, value=arbre.ks(nom_tab), step=0.05, key=f"ks_{nom_tab}")
+                if ks_tab != arbre.ks(nom_tab):
+                    arbre.definir_ks(nom_tab, ks_tab)
+                    st.rerun()
+                if amont_tab != amont_actuel:
+                    arbre.deplacer(nom_tab, None if amont_tab == SOURCE else amont_tab)
+                    st.rerun()
+                col_a3.markdown("<br>", unsafe_allow_html=True)
+                if col_a3.button(f"❌ Supprimer '{nom_tab}'", key=f"del_{nom_tab}"):
+                    del st.session_state.projet["tableaux"][nom_tab]
+                    st.rerun()
 
-                    with st.container(border=True):
-                        with st.form(f"form_{i}"):
-                            c1, c2, c3, c4 = st.columns([2,1,1,1])
-                            c_nom = c1.text_input("Circuit (ex: Prises Bureau)")
-                            c_p = c2.number_input("Puissance (W)", min_value=0.0, value=1000.0)
+                with st.expander(f"🔌 Câble d'arrivée ({arbre.parent(nom_tab) or 'Source'} → {nom_tab})"):
+                    arrivee = arbre.arrivee(nom_tab)
+                    with st.form(f"arrivee_{nom_tab}"):
+                        ca1, ca2, ca3 = st.columns(3)
+                        a_long = ca1.number_input("Longueur (m)", min_value=1.0, value=float(arrivee["Long.(m)"]))
+                        a_tension = ca2.selectbox("Tension", ["400V Tri", "230V Mono"], index=["400V Tri", "230V Mono"].index(arrivee["Tension"]))
+                        a_metal = ca3.selectbox("Métal Conducteur", ["Cuivre", "Aluminium"], index=["Cuivre", "Aluminium"].index(arrivee["Métal"]))
+                        ca4, ca5 = st.columns(2)
+                        poses = [lettre_pose(m) for m in METHODES_POSE]
+                        a_pose = ca4.selectbox("Méthode de Pose", METHODES_POSE, index=poses.index(arrivee["Pose"]))
+                        a_cos = ca5.slider("Facteur de puissance (Cos φ)", 0.7, 1.0, float(arrivee["Cos φ"]))
+                        if st.form_submit_button("💾 Enregistrer l'arrivée"):
+                            arbre.definir_arrivee(nom_tab, **{"Long.(m)": a_long, "Tension": a_tension, "Métal": a_metal,
+                                                              "Pose": lettre_pose(a_pose), "Cos φ": a_cos})
+                            st.rerun()
+                    ligne_arrivee = st.session_state.arrivees.ligne(arbre, nom_tab)
+                    st.info(f"Puissance d'appel : **{ligne_arrivee['P(W)']:.0f} W** | Ib = {ligne_arrivee['Ib(A)']} A | "
+                            f"Disjoncteur : **{ligne_arrivee['Calibre(A)']}A** | Section : **{ligne_arrivee['Section(mm2)']} mm²** | dU = {ligne_arrivee['dU(%)']} %")
+
+                with st.container(border=True):
+                    with st.form(f"form_{i}"):
+                        c1, c2, c3, c4 = st.columns([2,1,1,1])
+                        c_nom = c1.text_input("Circuit (ex: Prises Bureau)")
+                        c_p = c2.number_input("Puissance (W)", min_value=0.0, value=1000.0)
                             
-                            c_type = c3.selectbox("Type", [
-                                "Éclairage", "Prises de courant", "Chauffage électrique", 
-                                "Climatisation / PAC", "Force Motrice", "Cuisson", 
-                                "IRVE (Recharge VE)", "Divers"
-                            ])
-
-                            if c_type in ["Éclairage", "Chauffage", "IRVE"]: ku_def = 1.0
-                            elif c_type == "Prises de courant": ku_def = 0.5
-                            elif c_type == "Cuisson": ku_def = 0.7
-                            elif c_type in ["Climatisation / PAC", "Force Motrice"]: ku_def = 0.75
-                            else: ku_def = 0.8
+                        c_type = c3.selectbox("Type", [
+                            "Éclairage", "Prises de courant", "Chauffage électrique", 
+                            "Climatisation / PAC", "Force Motrice", "Cuisson", 
+                            "IRVE (Recharge VE)", "Divers"
+                        ])
+
+                        if c_type in ["Éclairage", "Chauffage", "IRVE"]: ku_def = 1.0
+                        elif c_type == "Prises de courant": ku_def = 0.5
+                        elif c_type == "Cuisson": ku_def = 0.7
+                        elif c_type in ["Climatisation / PAC", "Force Motrice"]: ku_def = 0.75
+                        else: ku_def = 0.8
                                 
-                            c_ku = c4.number_input("Facteur Ku", min_value=0.1, max_value=1.0, value=float(ku_def), step=0.05)
+                        c_ku = c4.number_input("Facteur Ku", min_value=0.1, max_value=1.0, value=float(ku_def), step=0.05)
                             
-                            if st.form_submit_button("➕ Ajouter au tableau"):
-                                st.session_state.projet["tableaux"][nom_tab].append({
-                                    "Circuit": c_nom, "Type": c_type, "P(W)": c_p, "Ku": c_ku, "P.Abs(W)": int(c_p * c_ku)
-                                })
-                                st.rerun()
+                        if st.form_submit_button("➕ Ajouter au tableau"):
+                            arbre.ajouter_circuit(nom_tab, {
+                                "Circuit": c_nom, "Type": c_type, "P(W)": c_p, "Ku": c_ku, "P.Abs(W)": int(c_p * c_ku)
+                            })
+                            st.rerun()
                     
-                    circuits = st.session_state.projet["tableaux"].get(nom_tab, [])
-                    if circuits:
-                        df_tab = pd.DataFrame(circuits)
-                        st.dataframe(df_tab, use_container_width=True)
-                        st.metric(f"Total Absorbé (Tableau {nom_tab})", f"{df_tab['P.Abs(W)'].sum()} W")
-
-            with onglets[-1]:
+                circuits = st.session_state.projet["tableaux"].get(nom_tab, [])
+                if circuits:
+                    df_tab = circuits.dataframe()
+                    st.dataframe(df_tab, use_container_width=True)
+                    st.metric(f"Total Absorbé (Tableau {nom_tab})", f"{arbre.puissance_propre(nom_tab)} W")
+                if arbre.enfants(nom_tab) or arbre.ks(nom_tab) != 1.0:
+                    col_m1, col_m2 = st.columns(2)
+                    col_m1.metric("Total avec tableaux aval", f"{arbre.puissance_totale(nom_tab):.0f} W")
+                    col_m2.metric(f"Puissance d'appel (Ks = {arbre.ks(nom_tab)})", f"{arbre.puissance_appel(nom_tab):.0f} W")
+
+            @fragment("Synthèse globale", sauvegarde=True)
+            def synthese_globale():
                 st.markdown("### 🌍 Bilan Bâtiment (TGBT)")
-                bilan_global = [{"Tableau": t, "Puissance Absorbée (W)": sum(c["P.Abs(W)"] for c in circs)} for t, circs in st.session_state.projet["tableaux"].items()]
+                # Totaux lus dans les caches de l'arbre, sans reparcourir les circuits
+                chutes_tableaux = st.session_state.chutes.tableaux(arbre)
+                st.session_state.courts_circuits.definir_source(st.session_state.projet["source"])
+                icc_tableaux = st.session_state.courts_circuits.icc_tableaux(arbre)
+                bilan_global = [{
+                    "Tableau": t, "Alimenté par": arbre.parent(t) or "Source",
+                    "Puissance Absorbée (W)": arbre.puissance_propre(t),
+                    "Total avec aval (W)": round(arbre.puissance_totale(t)), "Ks": arbre.ks(t),
+                    "Puissance d'appel (W)": round(arbre.puissance_appel(t)),
+                    "dU cumulée (%)": chutes_tableaux[t],
+                    "Icc max (kA)": icc_tableaux[t][0], "Icc min (kA)": icc_tableaux[t][1],
+                } for t, _ in ordre_tableaux]
                 
                 if bilan_global:
                     df_g = pd.DataFrame(bilan_global)
                     st.dataframe(df_g, use_container_width=True)
-                    p_totale = df_g["Puissance Absorbée (W)"].sum()
+                    hors_limite = [t for t, _ in ordre_tableaux if chutes_tableaux[t] > DU_MAX_DEFAUT]
+                    if hors_limite:
+                        st.warning(f"⚠️ Chute cumulée au-delà de {DU_MAX_DEFAUT} % dès le jeu de barres : {', '.join(hors_limite)}")
                     
+                    with st.expander("🏭 Alimentation : réseau amont et transformateur"):
+                        with st.form("source_installation"):
+                            source = st.session_state.projet["source"]
+                            col_s1, col_s2, col_s3 = st.columns(3)
+                            s_scc = col_s1.number_input("Scc réseau amont (MVA)", min_value=1.0, value=float(source["Scc réseau (MVA)"]))
+                            s_transfo = col_s2.number_input("Puissance transformateur (kVA)", min_value=10.0, value=float(source["S transfo (kVA)"]))
+                            s_ucc = col_s3.number_input("Ucc (%)", min_value=1.0, max_value=10.0, value=float(source["Ucc (%)"]))
+                            if st.form_submit_button("💾 Enregistrer l'alimentation"):
+                                st.session_state.projet["source"] = {"Scc réseau (MVA)": s_scc, "S transfo (kVA)": s_transfo, "Ucc (%)": s_ucc}
+                                st.rerun()
+
                     ks_global = st.slider("Coefficient de Foisonnement Global (Ks)", 0.4, 1.0, st.session_state.projet.get("ks_global", 0.8))
                     st.session_state.projet["ks_global"] = ks_global
                     
-                    p_appel = int(p_totale * ks_global)
-                    kva_estime = round(p_appel / 0.8 / 1000, 1)
+                    p_totale, p_appel, kva_estime = synthese_bilan(st.session_state.projet["tableaux"], ks_global)
                     
                     col_res1, col_res2 = st.columns(2)
                     col_res1.success(f"**⚡ PUISSANCE ACTIVE (kW) : {p_appel/1000:.1f} kW**")
                     col_res2.info(f"**🏢 PUISSANCE APPARENTE (kVA) : {kva_estime} kVA**")
 
-                    def generate_pdf_bilan():
-                        pdf = FCELEC_Report()
-                        pdf.set_auto_page_break(auto=True, margin=15)
-                        pdf.add_page()
-                        
-                        pdf.set_font("Helvetica", "B", 14)
-                        titre = sanitize_text(st.session_state.projet['info']['nom']).upper()
-                        pdf.set_text_color(2, 136, 209)
-                        pdf.cell(190, 10, f"BILAN DE PUISSANCE - {titre}", ln=True, align="C")
-                        pdf.set_text_color(0, 0, 0)
-                        pdf.ln(5)
-
-                        for tab_name, circs in st.session_state.projet["tableaux"].items():
-                            if not circs: continue
-                            pdf.set_font("Helvetica", "B", 11)
-                            pdf.set_fill_color(220, 220, 220)
-                            pdf.cell(190, 8, f" TABLEAU : {sanitize_text(tab_name)}", border=1, ln=True, fill=True)
-                            
-                            pdf.set_font("Helvetica", "B", 9)
-                            pdf.cell(60, 6, "Circuit", 1)
-                            pdf.cell(50, 6, "Type", 1, 0, 'C')
-                            pdf.cell(30, 6, "P.Inst (W)", 1, 0, 'C')
-                            pdf.cell(20, 6, "Ku", 1, 0, 'C')
-                            pdf.cell(30, 6, "P.Abs (W)", 1, 1, 'C')
-                            
-                            pdf.set_font("Helvetica", "", 9)
-                            sous_total = 0
-                            for c in circs:
-                                pdf.cell(60, 6, sanitize_text(c['Circuit'], 30), 1)
-                                pdf.cell(50, 6, sanitize_text(c['Type'], 25), 1, 0, 'C')
-                                pdf.cell(30, 6, str(c['P(W)']), 1, 0, 'C')
-                                pdf.cell(20, 6, str(c['Ku']), 1, 0, 'C')
-                                pdf.cell(30, 6, str(c['P.Abs(W)']), 1, 1, 'C')
-                                sous_total += c['P.Abs(W)']
-                            
-                            pdf.set_font("Helvetica", "I", 9)
-                            pdf.cell(190, 6, f"Sous-total absorbé ({sanitize_text(tab_name)}) : {sous_total} W", border='B', ln=True, align="R")
-                            pdf.ln(4)
-
-                        pdf.ln(5)
-                        pdf.set_font("Helvetica", "B", 12)
-                        pdf.set_fill_color(2, 136, 209)
-                        pdf.set_text_color(255, 255, 255)
-                        pdf.cell(190, 10, f"PUISSANCE ACTIVE MAXIMALE (Ks={ks_global}) : {p_appel} W", border=0, ln=True, align="C", fill=True)
-                        pdf.set_fill_color(240, 240, 240)
-                        pdf.set_text_color(0, 0, 0)
-                        pdf.cell(190, 10, f"PUISSANCE SOUSCRITE ESTIMEE (Cos phi 0.8) : {kva_estime} kVA", border=1, ln=True, align="C", fill=True)
-                        
-                        # CORRECTION DE L'ERREUR DE BYTES / FPDF
-                        pdf_out = pdf.output(dest='S')
-                        return pdf_out.encode('latin-1') if isinstance(pdf_out, str) else bytes(pdf_out)
-
-                    # Affichage direct du bouton
+                    st.markdown("#### 🔌 Câbles d'arrivée des tableaux")
+                    lignes_arrivees = st.session_state.arrivees.calculer(arbre)
+                    st.dataframe(pd.DataFrame(lignes_arrivees), use_container_width=True, hide_index=True)
+                    if st.session_state.arrivees.recalculees:
+                        st.caption(f"Redimensionnées suite aux dernières modifications : {', '.join(st.session_state.arrivees.recalculees)}")
+                    if st.button("🔗 Reporter les arrivées dans le Carnet de Câbles", use_container_width=True):
+                        maj, ajoutees, retirees = reporter_dans_carnet(st.session_state.projet["cables"], lignes_arrivees, arbre)
+                        st.success(f"✅ Carnet mis à jour : {ajoutees} ajoutée(s), {maj} modifiée(s), {retirees} retirée(s).")
+
+                    # Affichage direct du bouton (PDF généré au clic, mis en cache selon le contenu)
+                    projet = st.session_state.projet
                     st.download_button(
                         label="📄 EXPORTER BILAN DE PUISSANCE (PDF)",
-                        data=generate_pdf_bilan(),
+                        data=lambda: pdf_bilan(projet),
                         file_name=f"Bilan_{sanitize_text(st.session_state.projet['info']['nom'])}.pdf",
                         mime="application/pdf",
                         type="primary",
                         use_container_width=True
                     )
 
+            for i, (nom_tab, niveau) in enumerate(ordre_tableaux):
+                with onglets[i]:
+                    onglet_tableau(nom_tab, niveau, i)
+            with onglets[-1]:
+                synthese_globale()
+
     # =========================================================
     # MODULE 4 : NOMENCLATURE & DEVIS
     # =========================================================
-    elif menu == "💰 4. Nomenclature & Devis":
+    @fragment("Module 4 · Devis", sauvegarde=True)
+    def module_devis():
         st.title("💰 Chiffrage et Quantitatifs")
-        nomenclatures = []
-        
-        for cab in st.session_state.projet["cables"]:
-            nature = cab.get("Métal", "Cuivre")
-            type_c = cab.get("Type Câble", "U1000 R2V").split(" (")[0]
-            nomenclatures.append({"Catégorie": "Câble", "Désignation": f"Câble {nature} {type_c} - {cab['Section(mm2)']} mm2", "Quantité": cab["Long.(m)"], "Unité": "m", "Prix Unitaire HT": 15.0})
-            nomenclatures.append({"Catégorie": "Protection", "Désignation": f"Disjoncteur TGBT {cab['Calibre(A)']}A", "Quantité": 1, "Unité": "U", "Prix Unitaire HT": 80.0})
-
-        for tab, circs in st.session_state.projet["tableaux"].items():
-            for c in circs:
-                cal_estime = 16 if c["P(W)"] <= 3500 else 20 if c["P(W)"] <= 4500 else 32
-                nomenclatures.append({"Catégorie": "Protection", "Désignation": f"Disjoncteur Modulaire {cal_estime}A", "Quantité": 1, "Unité": "U", "Prix Unitaire HT": 65.0})
-
-        if not nomenclatures:
+        # Seules les sources modifiées (carnet, tableaux) sont recomptées
+        nomenclature = st.session_state.nomenclature
+        nomenclature.mettre_a_jour(st.session_state.projet)
+
+        # Tarifs fournisseurs : catalogue SQLite partagé, prioritaire sur les prix par défaut
+        with st.expander("📚 Catalogue de prix fournisseurs"):
+            nb_cables_cat, nb_disj_cat = catalogue_partage().compter()
+            st.caption(f"{nb_cables_cat} référence(s) câble et {nb_disj_cat} référence(s) disjoncteur au catalogue. "
+                       "Colonnes : Référence, Fournisseur, Métal, Type, Section (mm2) ou Calibre (A) et Courbe, Prix HT. "
+                       f"Disjoncteurs du devis chiffrés en courbe {COURBE_DEFAUT}.")
+            fichier_tarif = st.file_uploader("Tarif fournisseur", type=["csv", "xlsx"], key="import_tarif")
+            fournisseur = st.text_input("Fournisseur (si absent du fichier)", key="fournisseur_tarif")
+            if fichier_tarif is not None and st.button("📥 Importer le tarif", use_container_width=True):
+                barre = st.progress(0.0, text="Lecture du tarif...")
+                def suivi_tarif(nb_lignes, avancement):
+                    barre.progress(avancement if avancement is not None else 0.0, text=f"{nb_lignes} références lues...")
+                try:
+                    nb_c, nb_d, erreurs_tarif = catalogue_partage().importer(fichier_tarif, fichier_tarif.name, fournisseur, progression=suivi_tarif)
+                except ValueError as e:
+                    st.error(f"❌ {e}")
+                else:
+                    barre.progress(1.0, text="Import terminé.")
+                    st.success(f"✅ {nb_c} câble(s) et {nb_d} disjoncteur(s) importés ou mis à jour.")
+                    if erreurs_tarif:
+                        st.warning(f"⚠️ {len(erreurs_tarif)} anomalie(s) : les lignes concernées ont été ignorées.")
+                        st.dataframe(pd.DataFrame(erreurs_tarif), use_container_width=True, hide_index=True)
+
+        if not len(nomenclature):
             st.info("Veuillez générer des lignes ou des bilans dans les modules précédents.")
         else:
             with st.container(border=True):
                 st.markdown("### 🛒 Édition des prix")
-                df_nom = pd.DataFrame(nomenclatures)
-                df_nom["Prix Unitaire HT"] = pd.to_numeric(df_nom["Prix Unitaire HT"], errors='coerce').fillna(0)
-                df_nom["Quantité"] = pd.to_numeric(df_nom["Quantité"], errors='coerce').fillna(0)
-                
-                df_grouped = df_nom.groupby(["Catégorie", "Désignation", "Unité"], as_index=False).agg({"Quantité": "sum", "Prix Unitaire HT": "mean"})
-                
+                df_grouped = nomenclature.table()
+
+                # Éditeur recréé quand la liste change : les prix saisis sont déjà dans la table
                 df_edited = st.data_editor(
                     df_grouped,
-                    key="editeur_devis",
+                    key=f"editeur_devis_{nomenclature.version_structure}",
                     column_config={"Prix Unitaire HT": st.column_config.NumberColumn("Prix U. HT (MAD)", format="%.2f")},
                     hide_index=True, use_container_width=True
                 )
                 
+                # Prix saisis gardés par clé (devis suivants et optimisation des sections du module 2)
+                nomenclature.saisir_prix(df_edited)
+                df_edited = df_edited.copy()
                 df_edited["Total HT"] = df_edited["Quantité"] * df_edited["Prix Unitaire HT"]
                 total_ht = df_edited["Total HT"].sum()
                 
@@ -729,12 +908,13 @@ if check_password():
                 c1.metric("💰 Total Matériel (HT)", f"{total_ht:,.2f} MAD")
                 c2.metric("💳 Total Matériel (TTC 20%)", f"{total_ht * 1.20:,.2f} MAD")
 
-                st.download_button("📊 EXPORTER LE DEVIS VERS EXCEL (.XLSX)", data=to_excel(df_edited), file_name=f"Devis_{sanitize_text(st.session_state.projet['info']['nom'])}.xlsx", type="primary", use_container_width=True)
+                st.download_button("📊 EXPORTER LE DEVIS VERS EXCEL (.XLSX)", data=partial(devis_xlsx, df_edited), file_name=f"Devis_{sanitize_text(st.session_state.projet['info']['nom'])}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", type="primary", use_container_width=True)
 
     # =========================================================
     # MODULE 5 : OUTILS
     # =========================================================
-    elif menu == "📉 5. Outils (Cos φ & IRVE)":
+    @fragment("Module 5 · Outils")
+    def module_outils():
         st.title("🛠️ Outils Pratiques")
         onglets = st.tabs(["📉 Batterie Condensateurs", "🚘 Bornes IRVE"])
         with onglets[0]:
@@ -744,7 +924,7 @@ if check_password():
                 c1, c2 = st.columns(2)
                 cos_i = c1.slider("Cos φ Initial (actuel)", 0.5, 0.95, 0.75)
                 cos_v = c2.slider("Cos φ Visé (cible)", 0.9, 1.0, 0.95)
-                qc = p_kw * (math.tan(math.acos(cos_i)) - math.tan(math.acos(cos_v)))
+                qc = compensation_reactive(p_kw, cos_i, cos_v)
                 st.info(f"Puissance réactive à installer : **{math.ceil(qc)} kVAR**")
             
         with onglets[1]:
@@ -753,6 +933,16 @@ if check_password():
                 p_b = st.selectbox("Puissance de la borne", ["7.4 kW (32A Monophasé)", "22 kW (32A Triphasé)"])
                 st.warning("Rappel Norme : Protection Différentielle 30mA Type B ou Type A-EV exigée. Câblage 10 mm² minimum recommandé.")
 
+    MODULES = {
+        "📚 1. Catalogue des Formations": module_formations,
+        "🔌 2. Carnet de Câbles": module_carnet_cables,
+        "🏢 3. Bilan de Puissance": module_bilan,
+        "💰 4. Nomenclature & Devis": module_devis,
+        "📉 5. Outils (Cos φ & IRVE)": module_outils,
+    }
+
+    MODULES[menu]()
+
     # ---------------------------------------------------------
     # PIED DE PAGE GLOBAL
     # ---------------------------------------------------------
@@ -804,3 +994,8 @@ if check_password():
     if st.sidebar.button("🔴 DÉCONNEXION", use_container_width=True):
         st.session_state.clear()
         st.rerun()
+
+MESURES.enregistrer("Rendu · Page complète", time.perf_counter() - debut_rechargement)
+profil = st.session_state.pop("profil_en_cours", None)
+if profil is not None:
+    st.session_state.rapport_profil = rapport_profil(profil)
@@ -0,0 +1,177 @@
+"""Débit et mémoire de pointe de chaque moteur sur des projets synthétiques, comparés à une
+référence enregistrée pour repérer les régressions.
+
+    python benchmarks/bench_moteurs.py [câbles:tableaux ...] [--enregistrer] [--tolerance 0.3]
+
+Moteurs : dimensionnement (module 2), arbre et synthèse du bilan (module 3), nomenclature
+(module 4), PDF du carnet et du bilan, export XLSX du devis, sauvegarde et chargement du
+projet. Chaque cas garde son meilleur temps sur quelques appels sans traçage, puis est
+relancé une fois sous tracemalloc pour la mémoire. Code de sortie 1 si un débit baisse ou une mémoire augmente au-delà de la
+tolérance ; --enregistrer remplace la référence (à faire sur la machine de référence).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from fcelec import rapports
+from fcelec.bilan import synthese_bilan
+from fcelec.modele import ArbreTableaux, nouveau_projet
+from fcelec.moteur_cables import LETTRES_POSE, dimensionner_lot, enregistrements
+from fcelec.nomenclature import devis_xlsx
+from fcelec.projet import charger, serialiser
+from fcelec.traitement import chiffrer
+
+REFERENCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reference_moteurs.json")
+TAILLES = [(100, 10), (1_000, 10), (10_000, 100), (100_000, 1_000)]
+CIRCUITS_PAR_TABLEAU = 10
+TYPES_CABLE = ["U1000 R2V / RO2V (PR)", "H07VU / H07VR (PVC)", "XAV / AR2V (Armé)"]
+TYPES_CIRCUIT = ["Éclairage", "Prises de courant", "Chauffage", "Climatisation", "Moteur"]
+
+
+def tableaux_synthetiques(nb_tableaux, alea):
+    """[(nom, parent, circuits)] : un TGBT puis des tableaux rattachés à un tableau déjà créé."""
+    definitions = []
+    for i in range(nb_tableaux):
+        nom = "TGBT" if i == 0 else f"TD {i}"
+        parent = None if i == 0 else definitions[alea.randrange(i)][0]
+        circuits = []
+        for j in range(CIRCUITS_PAR_TABLEAU):
+            p_w, ku = float(alea.randrange(100, 6000, 50)), alea.choice([0.5, 0.75, 1.0])
+            circuits.append({"Circuit": f"Circuit {j + 1}", "Type": alea.choice(TYPES_CIRCUIT),
+                             "P(W)": p_w, "Ku": ku, "P.Abs(W)": int(p_w * ku)})
+        definitions.append((nom, parent, circuits))
+    return definitions
+
+
+def circuits_synthetiques(nb_cables, noms_tableaux, alea):
+    """DataFrame de circuits au format de l'import en masse."""
+    return pd.DataFrame({
+        "Tableau": [alea.choice(noms_tableaux) for _ in range(nb_cables)],
+        "Repère": [f"Départ {i}" for i in range(nb_cables)],
+        "Type Câble": [alea.choice(TYPES_CABLE) for _ in range(nb_cables)],
+        "Tension": [alea.choice(["230V Mono", "400V Tri"]) for _ in range(nb_cables)],
+        "P(W)": [float(alea.randrange(500, 60000, 100)) for _ in range(nb_cables)],
+        "Long.(m)": [float(alea.randint(1, 300)) for _ in range(nb_cables)],
+        "Métal": [alea.choice(["Cuivre", "Cuivre", "Aluminium"]) for _ in range(nb_cables)],
+        "Pose": [alea.choice(LETTRES_POSE) for _ in range(nb_cables)],
+        "Cos φ": [alea.choice([0.8, 0.85, 0.9, 1.0]) for _ in range(nb_cables)],
+        "dU max(%)": [alea.choice([3.0, 5.0]) for _ in range(nb_cables)],
+    })
+
+
+def construire_arbre(definitions):
+    arbre = ArbreTableaux()
+    for nom, parent, circuits in definitions:
+        arbre.ajouter_tableau(nom, parent=parent, ks=0.8, circuits=circuits)
+    return arbre
+
+
+def projet_synthetique(nb_cables, nb_tableaux, graine=0):
+    """(projet dimensionné, circuits du carnet, définitions des tableaux)."""
+    alea = random.Random(graine)
+    definitions = tableaux_synthetiques(nb_tableaux, alea)
+    circuits = circuits_synthetiques(nb_cables, [nom for nom, _, _ in definitions], alea)
+    projet = nouveau_projet(f"Benchmark {nb_cables} cables")
+    projet["cables"].extend(enregistrements(circuits, dimensionner_lot(circuits, memo=False)))
+    projet["tableaux"] = construire_arbre(definitions)
+    return projet, circuits, definitions
+
+
+def cas_de_mesure(projet, circuits, definitions):
+    """[(moteur, unités traitées, fonction sans argument)] ; le débit est en unités par seconde."""
+    nb_cables, nb_circuits = len(projet["cables"]), len(definitions) * CIRCUITS_PAR_TABLEAU
+    devis = chiffrer(projet)
+    octets = serialiser(projet)
+    return [
+        ("dimensionnement", nb_cables, lambda: dimensionner_lot(circuits, memo=False)),
+        ("bilan", nb_circuits, lambda: synthese_bilan(construire_arbre(definitions), projet["ks_global"])),
+        ("nomenclature", nb_cables + nb_circuits, lambda: chiffrer(projet)),
+        ("pdf carnet", nb_cables, lambda: rapports.generate_pdf_cables(projet["info"]["nom"], projet["cables"])),
+        ("pdf bilan", nb_circuits, lambda: rapports.generate_pdf_bilan(projet["info"]["nom"], projet["tableaux"], projet["ks_global"])),
+        ("xlsx devis", len(devis), lambda: devis_xlsx(devis)),
+        ("json sauvegarde", nb_cables, lambda: serialiser(projet)),
+        ("json chargement", nb_cables, lambda: charger(octets)),
+    ]
+
+
+def mesurer(fonction, *args, repetitions=30, budget=0.5):
+    """Meilleur temps (s) sur quelques appels, arrêtés dès que `budget` secondes sont écoulées."""
+    meilleur = total = 0.0
+    for i in range(repetitions):
+        debut = time.perf_counter()
+        fonction(*args)
+        duree = time.perf_counter() - debut
+        meilleur, total = duree if i == 0 else min(meilleur, duree), total + duree
+        if total >= budget:
+            break
+    return meilleur
+
+
+def memoire_max(fonction, *args):
+    """Pic d'allocation (Mo) pendant l'appel, mesuré par tracemalloc."""
+    tracemalloc.start()
+    try:
+        fonction(*args)
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def comparer(resultat, reference, tolerance):
+    """Écart de débit (%) et liste des dépassements de tolérance d'un cas face à sa référence."""
+    if not reference:
+        return "", []
+    ecart = resultat["debit"] / reference["debit"] - 1
+    regressions = []
+    if ecart < -tolerance:
+        regressions.append(f"débit {ecart:+.0%}")
+    if resultat["memoire_mo"] > reference["memoire_mo"] * (1 + tolerance) + 1:  # 1 Mo : bruit des petits cas
+        regressions.append(f"mémoire {resultat['memoire_mo']:.1f} Mo (réf. {reference['memoire_mo']:.1f})")
+    return f"{ecart:+.0%}", regressions
+
+
+def main(tailles, enregistrer=False, tolerance=0.3, chemin_reference=REFERENCE):
+    warnings.simplefilter("ignore", DeprecationWarning)
+    reference = {}
+    if os.path.exists(chemin_reference):
+        with open(chemin_reference, encoding="utf-8") as f:
+            reference = json.load(f)
+    resultats, regressions = {}, []
+    print(f"{'taille':>13} {'moteur':<16} {'débit':>14} {'mémoire':>10} {'réf.':>6}")
+    for nb_cables, nb_tableaux in tailles:
+        taille = f"{nb_cables}:{nb_tableaux}"
+        projet, circuits, definitions = projet_synthetique(nb_cables, nb_tableaux)
+        for moteur, unites, fonction in cas_de_mesure(projet, circuits, definitions):
+            resultat = {"debit": round(unites / mesurer(fonction), 1), "memoire_mo": round(memoire_max(fonction), 2)}
+            resultats.setdefault(taille, {})[moteur] = resultat
+            ecart, depassements = comparer(resultat, reference.get(taille, {}).get(moteur), tolerance)
+            regressions.extend(f"{taille} {moteur} : {d}" for d in depassements)
+            print(f"{taille:>13} {moteur:<16} {resultat['debit']:>10.0f} u/s {resultat['memoire_mo']:>7.1f} Mo {ecart:>6}"
+                  + (" ⚠️" if depassements else ""))
+    if enregistrer:
+        with open(chemin_reference, "w", encoding="utf-8") as f:
+            json.dump({**reference, **resultats}, f, ensure_ascii=False, indent=1)
+        print(f"Référence enregistrée : {chemin_reference}")
+    for regression in regressions:
+        print(f"❌ Régression {regression}", file=sys.stderr)
+    return 1 if regressions and not enregistrer else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark des moteurs FC ELEC sur des projets synthétiques.")
+    parser.add_argument("tailles", nargs="*", help="Tailles câbles:tableaux (défaut : 100:10 1000:10 10000:100 100000:1000)")
+    parser.add_argument("--enregistrer", action="store_true", help="Remplace la référence par les résultats de ce passage")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Baisse de débit / hausse de mémoire tolérée (défaut : 0.3)")
+    parser.add_argument("--reference", default=REFERENCE, help="Fichier JSON de référence")
+    args = parser.parse_args()
+    tailles = [tuple(int(n) for n in t.split(":")) for t in args.tailles] or TAILLES
+    sys.exit(main(tailles, args.enregistrer, args.tolerance, args.reference))
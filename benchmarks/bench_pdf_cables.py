@@ -0,0 +1,84 @@
+"""Débit (lignes/s) du rendu PDF du carnet de câbles : rendu historique cellule par cellule
+contre le rendu par pages de fcelec.rapports, sur un carnet synthétique.
+
+    python benchmarks/bench_pdf_cables.py [nb_lignes ...]
+"""
+import os
+import random
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fcelec import rapports
+from fcelec.rapports import FCELEC_Report, _octets, sanitize_text
+
+
+def carnet_synthetique(nb_lignes, graine=0):
+    alea = random.Random(graine)
+    return [{
+        "Tableau": alea.choice(["TGBT", "TD RDC", "TD Étage 1"]), "Repère": f"Départ {i}",
+        "Type Câble": alea.choice(["U1000 R2V / RO2V (PR)", "H07VU / H07VR (PVC)", "XAV / AR2V (Armé)"]),
+        "Métal": "Cuivre", "Pose": "B", "Tension": "400V Tri", "P(W)": 3500.0,
+        "Long.(m)": float(alea.randint(1, 300)), "Ib(A)": round(alea.uniform(1, 300), 1),
+        "Calibre(A)": alea.choice([10, 16, 20, 32, 63]), "Iz(A)": round(alea.uniform(10, 400), 1),
+        "Section(mm2)": alea.choice([1.5, 2.5, 4, 6, 10, 16]), "dU(%)": round(alea.uniform(0, 5), 2),
+    } for i in range(nb_lignes)]
+
+
+def rendu_historique(nom_projet, cables):
+    """Rendu d'origine : neuf appels pdf.cell et des changements de police/couleur à chaque ligne."""
+    pdf = FCELEC_Report()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.set_fill_color(2, 136, 209)
+    pdf.set_text_color(255, 255, 255)
+    pdf.cell(190, 10, f" CARNET DE CABLES - {sanitize_text(nom_projet).upper()}", border=0, ln=True, align="C", fill=True)
+    pdf.ln(5)
+    pdf.set_font("Helvetica", "B", 8)
+    pdf.set_fill_color(230, 230, 230)
+    pdf.set_text_color(0, 0, 0)
+    headers = ["Tab.", "Repere", "Type Cable", "L(m)", "Ib(A)", "In(A)", "Iz(A)", "Section", "dU(%)"]
+    widths = [14, 26, 40, 12, 15, 15, 15, 35, 18]
+    for i in range(len(headers)):
+        pdf.cell(widths[i], 8, headers[i], 1, 0, 'C', True)
+    pdf.ln()
+    pdf.set_font("Helvetica", "", 8)
+    for row in cables:
+        pdf.cell(widths[0], 8, sanitize_text(row.get("Tableau", "TGBT"), 12), 1)
+        pdf.cell(widths[1], 8, sanitize_text(row["Repère"], 18), 1)
+        pdf.cell(widths[2], 8, sanitize_text(row.get("Type Câble", "U1000 R2V").split(" (")[0], 25), 1, 0, 'C')
+        pdf.cell(widths[3], 8, str(row["Long.(m)"]), 1, 0, 'C')
+        pdf.cell(widths[4], 8, str(row["Ib(A)"]), 1, 0, 'C')
+        pdf.set_font("Helvetica", "B", 8)
+        pdf.cell(widths[5], 8, f"{row['Calibre(A)']}A", 1, 0, 'C')
+        pdf.set_text_color(0, 128, 0)
+        pdf.cell(widths[6], 8, f"{row.get('Iz(A)', '-')}A", 1, 0, 'C')
+        pdf.set_text_color(255, 100, 0)
+        pdf.cell(widths[7], 8, f"{row['Section(mm2)']} mm2", 1, 0, 'C')
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font("Helvetica", "", 8)
+        pdf.cell(widths[8], 8, str(row["dU(%)"]), 1, 1, 'C')
+    return _octets(pdf)
+
+
+def mesurer(fonction, *args):
+    debut = time.perf_counter()
+    fonction(*args)
+    return time.perf_counter() - debut
+
+
+def main(tailles):
+    warnings.simplefilter("ignore", DeprecationWarning)
+    print(f"{'lignes':>8} {'historique':>14} {'par pages':>14} {'gain':>6}")
+    for n in tailles:
+        cables = carnet_synthetique(n)
+        t_histo = mesurer(rendu_historique, "Benchmark", cables)
+        t_pages = mesurer(rapports.generate_pdf_cables, "Benchmark", cables)
+        print(f"{n:>8} {n / t_histo:>10.0f} l/s {n / t_pages:>10.0f} l/s {t_histo / t_pages:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1000, 10000])
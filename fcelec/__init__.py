@@ -0,0 +1 @@
+"""Moteurs de calcul FC ELEC, indépendants de l'interface Streamlit."""
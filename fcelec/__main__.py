@@ -0,0 +1,5 @@
+import sys
+
+from fcelec.cli import main
+
+sys.exit(main())
@@ -0,0 +1,158 @@
+"""Câbles d'arrivée des tableaux, dimensionnés à partir du bilan de puissance.
+
+L'arrivée d'un tableau part de son tableau amont (ou de la source) ; son courant d'emploi
+vient de la puissance d'appel du tableau (puissance totale avec l'aval x Ks). Toutes les
+arrivées à recalculer passent ensemble dans le moteur de câbles, en un seul lot.
+"""
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+from fcelec.moteur_cables import dimensionner_lot, enregistrements
+
+SOURCE = "Source"
+PREFIXE_REPERE = "Arrivée "
+
+
+def repere_arrivee(nom_tableau):
+    return f"{PREFIXE_REPERE}{nom_tableau}"
+
+
+class ArriveesTableaux:
+    """Arrivées de tous les tableaux d'un arbre, gardées en cache avec leurs données d'entrée.
+
+    Après la modification d'un circuit, seules les arrivées du tableau concerné et de ses
+    ancêtres (dont la puissance d'appel a changé) sont redimensionnées.
+    """
+
+    def __init__(self):
+        self._lignes = {}  # nom du tableau -> (données d'entrée, ligne du carnet)
+        self._arbre, self._version = None, None
+        self._resultat = []
+        self.recalculees = []  # tableaux redimensionnés au dernier calcul
+
+    def _entree(self, arbre, nom, appel):
+        return {
+            "Tableau": arbre.parent(nom) or SOURCE, "Repère": repere_arrivee(nom),
+            **arbre.arrivee(nom), "P(W)": round(float(appel), 3),
+        }
+
+    def calculer(self, arbre):
+        """Lignes du carnet des arrivées, dans l'ordre de l'arborescence."""
+        if arbre is self._arbre and arbre.version == self._version:
+            return self._resultat
+        ordre = [nom for nom, _ in arbre.parcours()]
+        appels = arbre.puissances_appel()
+        a_calculer = []
+        for nom in ordre:
+            entree = self._entree(arbre, nom, appels[nom])
+            deja = self._lignes.get(nom)
+            if deja is None or deja[0] != entree:
+                a_calculer.append((nom, entree))
+        if a_calculer:
+            circuits = pd.DataFrame([entree for _, entree in a_calculer])
+            for (nom, entree), ligne in zip(a_calculer, enregistrements(circuits, dimensionner_lot(circuits))):
+                self._lignes[nom] = (entree, ligne)
+        for nom in set(self._lignes).difference(ordre):
+            del self._lignes[nom]
+        self._arbre, self._version = arbre, arbre.version
+        self.recalculees = [nom for nom, _ in a_calculer]
+        self._resultat = [self._lignes[nom][1] for nom in ordre]
+        return self._resultat
+
+    def ligne(self, arbre, nom):
+        """Ligne du carnet de l'arrivée d'un tableau."""
+        self.calculer(arbre)
+        return self._lignes[nom][1]
+
+
+class CumulArbre(ABC):
+    """Grandeur cumulée de la source vers l'aval le long des câbles d'arrivée, mémorisée par tableau.
+
+    Valeur d'un tableau = `_cumuler(valeur de son amont, _locale(ligne de son arrivée))`,
+    `origine()` pour un départ de la source. Après une modification, seuls les sous-arbres
+    dont l'arrivée ou l'amont a changé sont recalculés, de haut en bas, une fois chacun.
+    """
+
+    def __init__(self, arrivees):
+        self.arrivees = arrivees
+        self._locales = {}  # tableau -> (amont, grandeur propre à son arrivée)
+        self._cumul = {}    # tableau -> grandeur cumulée à son jeu de barres
+        self._arbre, self._version = None, None
+        self._a_propager = set()  # tableaux recalculés, pas encore reportés sur le carnet
+        self.recalcules = []  # tableaux recalculés au dernier calcul
+
+    @abstractmethod
+    def origine(self):
+        """Grandeur au départ de la source."""
+
+    @abstractmethod
+    def _locale(self, ligne):
+        """Grandeur propre au câble d'arrivée (ligne du carnet des arrivées)."""
+
+    @abstractmethod
+    def _cumuler(self, amont, locale):
+        """Grandeur au jeu de barres d'un tableau, depuis celle de son amont."""
+
+    def _reinitialiser(self):
+        """Tout recalculer au prochain appel (autre arbre, origine modifiée)."""
+        self._locales, self._cumul = {}, {}
+        self._arbre = None
+
+    def tableaux(self, arbre):
+        """{tableau: grandeur cumulée à son jeu de barres}."""
+        if arbre is self._arbre and arbre.version == self._version:
+            return self._cumul
+        if arbre is not self._arbre:
+            self._reinitialiser()
+        ordre = [nom for nom, _ in arbre.parcours()]
+        touches = []
+        for nom, ligne in zip(ordre, self.arrivees.calculer(arbre)):
+            locale = (arbre.parent(nom), self._locale(ligne))
+            if self._locales.get(nom) != locale:
+                self._locales[nom] = locale
+                touches.append(nom)
+        for nom in set(self._cumul).difference(ordre):
+            del self._cumul[nom], self._locales[nom]
+            self._a_propager.add(nom)
+        # Ordre de l'arborescence : un sous-arbre touché est recalculé en entier avant ses descendants touchés
+        recalcules, vus, origine = [], set(), self.origine()
+        for racine in touches:
+            if racine in vus:
+                continue
+            pile = [racine]
+            while pile:
+                nom = pile.pop()
+                vus.add(nom)
+                amont, locale = self._locales[nom]
+                self._cumul[nom] = self._cumuler(self._cumul[amont] if amont is not None else origine, locale)
+                recalcules.append(nom)
+                pile.extend(arbre.enfants(nom))
+        self._arbre, self._version = arbre, arbre.version
+        self._a_propager.update(recalcules)
+        self.recalcules = recalcules
+        return self._cumul
+
+
+def reporter_dans_carnet(carnet, lignes, tableaux):
+    """Met à jour les arrivées du carnet de câbles (repère "Arrivée <tableau>").
+
+    Les lignes existantes sont remplacées si elles ont changé, les nouvelles ajoutées, et les
+    arrivées de tableaux supprimés retirées. Renvoie (mises à jour, ajoutées, retirées).
+    """
+    reperes = carnet.colonne("Repère", "")
+    positions = {repere: i for i, repere in enumerate(reperes) if repere.startswith(PREFIXE_REPERE)}
+    mises_a_jour, nouvelles = 0, []
+    for ligne in lignes:
+        i = positions.pop(ligne["Repère"], None)
+        if i is None:
+            nouvelles.append(ligne)
+        elif carnet[i] != ligne:
+            carnet[i] = ligne
+            mises_a_jour += 1
+    # Arrivées restantes : tableaux qui n'existent plus
+    obsoletes = sorted(i for repere, i in positions.items() if repere[len(PREFIXE_REPERE):] not in tableaux)
+    for i in reversed(obsoletes):
+        del carnet[i]
+    carnet.extend(nouvelles)
+    return mises_a_jour, len(nouvelles), len(obsoletes)
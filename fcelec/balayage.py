@@ -0,0 +1,68 @@
+"""Balayage paramétrique du dimensionnement : grille longueur x puissance x méthode de pose.
+
+Toute la grille passe en un seul appel de dimensionner_lot ; le résultat est gardé en cache
+par processus (les arguments sont des tuples hashables), de sorte que changer la tranche
+affichée ne recalcule rien.
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+
+from fcelec.moteur_cables import COLONNE_K, LETTRES_POSE, SECTIONS, dimensionner_lot
+
+
+def grille(debut, fin, nb):
+    """Tuple de `nb` valeurs régulières (clé du cache de `balayer`)."""
+    return tuple(float(v) for v in np.round(np.linspace(debut, fin, int(nb)), 3))
+
+
+@functools.lru_cache(maxsize=16)
+def balayer(tension, metal, cos_phi, du_max, longueurs, puissances, poses=tuple(LETTRES_POSE), k=1.0):
+    """Dimensionne chaque point de la grille ; renvoie un dict de tableaux numpy de forme
+    (longueurs, puissances, poses) : "Section(mm2)", "Calibre(A)", "dU(%)", plus les axes.
+
+    Résultat partagé par le cache : à ne pas modifier.
+    """
+    forme = (len(longueurs), len(puissances), len(poses))
+    l, p, i_pose = np.meshgrid(np.asarray(longueurs), np.asarray(puissances), np.arange(len(poses)), indexing="ij")
+    points = pd.DataFrame({
+        "Tension": tension, "Métal": metal, "Pose": np.asarray(poses)[i_pose.ravel()],
+        "P(W)": p.ravel(), "Long.(m)": l.ravel(), "Cos φ": cos_phi, "dU max(%)": du_max, COLONNE_K: k,
+    })
+    resultats = dimensionner_lot(points, memo=False)  # grille déjà en cache : MEMO garde les vrais circuits
+    return {
+        "Long.(m)": np.asarray(longueurs), "P(W)": np.asarray(puissances), "Pose": list(poses),
+        "Section(mm2)": resultats["Section(mm2)"].to_numpy().reshape(forme),
+        "Calibre(A)": resultats["Calibre(A)"].to_numpy().reshape(forme),
+        "dU(%)": resultats["dU(%)"].to_numpy().reshape(forme),
+        "_i_section": resultats["_i_section"].to_numpy().reshape(forme),
+    }
+
+
+def sections_selon_longueur(balayage, i_puissance):
+    """DataFrame section retenue (index : longueur, une colonne par pose) pour une puissance de la grille."""
+    return pd.DataFrame(balayage["Section(mm2)"][:, i_puissance, :], index=pd.Index(balayage["Long.(m)"], name="Long.(m)"),
+                        columns=[f"Pose {p}" for p in balayage["Pose"]])
+
+
+def longueurs_limites(balayage, i_pose):
+    """DataFrame des longueurs maximales admises par section (index : puissance, une colonne par section).
+
+    Point de rupture : au-delà de cette longueur, la section passe à la taille supérieure.
+    NaN quand la section ne suffit à aucune longueur de la grille.
+    """
+    i_sections = balayage["_i_section"][:, :, i_pose]  # (longueurs, puissances)
+    # La section croît avec la longueur : nombre de longueurs admises -> dernière longueur admise
+    nb_admises = (i_sections[:, :, None] <= np.arange(len(SECTIONS))[None, None, :]).sum(axis=0)
+    limites = np.where(nb_admises > 0, balayage["Long.(m)"][np.maximum(nb_admises - 1, 0)], np.nan)
+    utilisees = np.unique(i_sections).tolist()
+    return pd.DataFrame(limites[:, utilisees], index=pd.Index(balayage["P(W)"], name="P(W)"),
+                        columns=[f"{SECTIONS[i]} mm²" for i in utilisees])
+
+
+def points_de_rupture(balayage, i_puissance, i_pose):
+    """[(longueur, section avant, section après)] : longueurs où la section augmente."""
+    sections = balayage["Section(mm2)"][:, i_puissance, i_pose]
+    sauts = np.flatnonzero(np.diff(sections) > 0) + 1
+    return [(float(balayage["Long.(m)"][i]), float(sections[i - 1]), float(sections[i])) for i in sauts]
@@ -0,0 +1,31 @@
+"""Bilan de puissance : totaux par tableau, puissance d'appel du bâtiment et compensation."""
+import math
+
+from fcelec.modele import ArbreTableaux, Circuits
+
+
+def total_tableau(circuits):
+    """Puissance absorbée (W) d'un tableau."""
+    if isinstance(circuits, Circuits):
+        return sum(circuits.colonne("P.Abs(W)", 0))
+    return sum(c["P.Abs(W)"] for c in circuits)
+
+
+def synthese_bilan(tableaux, ks_global):
+    """Renvoie (puissance absorbée totale W, puissance d'appel W, puissance apparente kVA).
+
+    Pour un arbre de tableaux, la puissance totale est lue dans les totaux en cache
+    (départs de la source, Ks de chaque tableau appliqués).
+    """
+    if isinstance(tableaux, ArbreTableaux):
+        p_totale = tableaux.puissance_totale()
+    else:
+        p_totale = sum(total_tableau(circs) for circs in tableaux.values())
+    p_appel = int(p_totale * ks_global)
+    kva_estime = round(p_appel / 0.8 / 1000, 1)
+    return p_totale, p_appel, kva_estime
+
+
+def compensation_reactive(p_kw, cos_initial, cos_vise):
+    """Puissance réactive (kVAR) de la batterie de condensateurs : P x (tan φ initial - tan φ visé)."""
+    return p_kw * (math.tan(math.acos(cos_initial)) - math.tan(math.acos(cos_vise)))
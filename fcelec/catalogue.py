@@ -0,0 +1,178 @@
+"""Catalogue local des prix fournisseurs (SQLite), pour chiffrer le devis par jointure.
+
+Deux tables indexées par leur clé : câbles (métal, type, section) et disjoncteurs
+(calibre, courbe). Les tarifs fournisseurs (CSV ou XLSX) sont importés par blocs, en une
+seule transaction. Le catalogue est chargé une fois par processus en DataFrames et
+rechargé seulement après un import (compteur de génération stocké dans la base).
+"""
+import contextlib
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from fcelec.courts_circuits import COURBE_DEFAUT
+from fcelec.import_cables import lire_par_blocs, nombre, normaliser_entetes
+from fcelec.nomenclature import attributs_devis
+from fcelec.ressources import DOSSIER_DONNEES
+
+COLONNES_CABLES = ["metal", "type_cable", "section", "prix", "reference", "fournisseur"]
+COLONNES_DISJONCTEURS = ["calibre", "courbe", "prix", "reference", "fournisseur"]
+
+# En-têtes tolérés (sans accents ni casse) -> champ du catalogue
+ALIAS_CATALOGUE = {
+    "reference": "reference", "ref": "reference", "code article": "reference",
+    "fournisseur": "fournisseur",
+    "metal": "metal", "nature": "metal",
+    "type cable": "type_cable", "type": "type_cable", "isolant": "type_cable",
+    "section": "section", "section(mm2)": "section", "section (mm2)": "section",
+    "calibre": "calibre", "calibre(a)": "calibre", "calibre (a)": "calibre", "in": "calibre",
+    "courbe": "courbe",
+    "prix": "prix", "prix ht": "prix", "prix unitaire ht": "prix", "prix unitaire": "prix",
+}
+
+_tables = {}  # chemin -> (génération, câbles, disjoncteurs)
+_verrou_tables = threading.Lock()
+
+
+class CataloguePrix:
+    """Catalogue de prix SQLite (WAL) ; `tables()` sert les DataFrames en cache."""
+
+    def __init__(self, chemin=None):
+        self.chemin = chemin or os.path.join(DOSSIER_DONNEES, "catalogue.sqlite3")
+        os.makedirs(os.path.dirname(os.path.abspath(self.chemin)), exist_ok=True)
+        with self._connexion() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""CREATE TABLE IF NOT EXISTS prix_cables (
+                metal TEXT NOT NULL, type_cable TEXT NOT NULL, section REAL NOT NULL, prix REAL NOT NULL,
+                reference TEXT, fournisseur TEXT, PRIMARY KEY (metal, type_cable, section)) WITHOUT ROWID""")
+            db.execute("""CREATE TABLE IF NOT EXISTS prix_disjoncteurs (
+                calibre INTEGER NOT NULL, courbe TEXT NOT NULL, prix REAL NOT NULL,
+                reference TEXT, fournisseur TEXT, PRIMARY KEY (calibre, courbe)) WITHOUT ROWID""")
+            db.execute("CREATE TABLE IF NOT EXISTS catalogue_info (cle TEXT PRIMARY KEY, valeur INTEGER NOT NULL)")
+            db.execute("INSERT OR IGNORE INTO catalogue_info VALUES ('generation', 0)")
+
+    @contextlib.contextmanager
+    def _connexion(self):
+        """Une connexion par opération (sûr entre les threads des sessions), validée puis fermée."""
+        db = sqlite3.connect(self.chemin, timeout=30)
+        try:
+            db.execute("PRAGMA synchronous=NORMAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def generation(self):
+        """Incrémentée à chaque import : clé des caches de prix."""
+        with self._connexion() as db:
+            return db.execute("SELECT valeur FROM catalogue_info WHERE cle = 'generation'").fetchone()[0]
+
+    def tables(self):
+        """(câbles, disjoncteurs) en DataFrames indexés par leur clé ; partagés, à ne pas modifier."""
+        generation = self.generation()
+        with _verrou_tables:
+            en_cache = _tables.get(self.chemin)
+        if en_cache is not None and en_cache[0] == generation:
+            return en_cache[1], en_cache[2]
+        with self._connexion() as db:
+            cables = pd.read_sql_query(f"SELECT {', '.join(COLONNES_CABLES)} FROM prix_cables", db)
+            disjoncteurs = pd.read_sql_query(f"SELECT {', '.join(COLONNES_DISJONCTEURS)} FROM prix_disjoncteurs", db)
+        cables = cables.set_index(["metal", "type_cable", "section"]).sort_index()
+        disjoncteurs = disjoncteurs.set_index(["calibre", "courbe"]).sort_index()
+        with _verrou_tables:
+            _tables[self.chemin] = (generation, cables, disjoncteurs)
+        return cables, disjoncteurs
+
+    def compter(self):
+        cables, disjoncteurs = self.tables()
+        return len(cables), len(disjoncteurs)
+
+    def importer(self, fichier, nom_fichier, fournisseur="", progression=None):
+        """Importe un tarif fournisseur ; les références existantes sont mises à jour.
+
+        Une ligne avec une section est un câble, une ligne avec un calibre un disjoncteur.
+        Renvoie (nb câbles, nb disjoncteurs, erreurs) ; les numéros de ligne des erreurs
+        sont ceux du fichier (en-tête = ligne 1), les lignes concernées ne sont pas importées.
+        """
+        nb_cables = nb_disjoncteurs = lues = 0
+        erreurs = []
+        with self._connexion() as db:
+            for bloc, avancement in lire_par_blocs(fichier, nom_fichier):
+                bloc = bloc.rename(columns=normaliser_entetes(bloc.columns, ALIAS_CATALOGUE))
+                bloc = bloc.loc[:, ~bloc.columns.duplicated()]
+                if "prix" not in bloc.columns:
+                    raise ValueError("Colonne de prix absente du tarif.")
+                bloc = bloc.reset_index(drop=True)
+                cables, disjoncteurs, erreurs_bloc = _valider_tarif(bloc, fournisseur, premiere_ligne=lues + 2)
+                erreurs.extend(erreurs_bloc)
+                db.executemany(f"""INSERT INTO prix_cables ({', '.join(COLONNES_CABLES)}) VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (metal, type_cable, section) DO UPDATE SET
+                    prix = excluded.prix, reference = excluded.reference, fournisseur = excluded.fournisseur""",
+                               cables.itertuples(index=False, name=None))
+                db.executemany(f"""INSERT INTO prix_disjoncteurs ({', '.join(COLONNES_DISJONCTEURS)}) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (calibre, courbe) DO UPDATE SET
+                    prix = excluded.prix, reference = excluded.reference, fournisseur = excluded.fournisseur""",
+                               disjoncteurs.itertuples(index=False, name=None))
+                nb_cables += len(cables)
+                nb_disjoncteurs += len(disjoncteurs)
+                lues += len(bloc)
+                if progression:
+                    progression(lues, avancement)
+            db.execute("UPDATE catalogue_info SET valeur = valeur + 1 WHERE cle = 'generation'")
+        return nb_cables, nb_disjoncteurs, erreurs
+
+    def tarifer(self, devis, courbe=COURBE_DEFAUT):
+        """Prix catalogue de chaque ligne du devis (NaN si absent), par jointure sur les clés."""
+        cables, disjoncteurs = self.tables()
+        attributs = attributs_devis(devis)
+        prix = pd.Series(np.nan, index=devis.index)
+        est_cable = attributs["section"].notna()
+        if est_cable.any() and len(cables):
+            cles = pd.MultiIndex.from_frame(attributs.loc[est_cable, ["metal", "type_cable", "section"]])
+            prix[est_cable] = cables["prix"].reindex(cles).to_numpy()
+        est_disjoncteur = attributs["calibre"].notna()
+        if est_disjoncteur.any() and len(disjoncteurs):
+            cles = pd.MultiIndex.from_arrays([attributs.loc[est_disjoncteur, "calibre"].astype(int), [courbe] * int(est_disjoncteur.sum())])
+            prix[est_disjoncteur] = disjoncteurs["prix"].reindex(cles).to_numpy()
+        return prix
+
+    def prix_cables(self, metaux_types):
+        """{(métal, type, section): prix} des câbles du catalogue pour ces couples (métal, type court)."""
+        cables, _ = self.tables()
+        if not len(cables):
+            return {}
+        garder = pd.MultiIndex.from_frame(cables.index.to_frame()[["metal", "type_cable"]]).isin(list(metaux_types))
+        return cables.loc[garder, "prix"].to_dict()
+
+
+def _valider_tarif(bloc, fournisseur, premiere_ligne):
+    """Bloc brut -> (câbles, disjoncteurs prêts à insérer, erreurs par ligne)."""
+    texte = {c: bloc[c].astype(str).str.strip() if c in bloc.columns else pd.Series("", index=bloc.index)
+             for c in ["reference", "fournisseur", "metal", "type_cable", "courbe"]}
+    prix = nombre(bloc["prix"])
+    section = nombre(bloc["section"]) if "section" in bloc.columns else pd.Series(np.nan, index=bloc.index)
+    calibre = nombre(bloc["calibre"]) if "calibre" in bloc.columns else pd.Series(np.nan, index=bloc.index)
+    # Même reconnaissance que l'import du carnet : un métal vide ou inconnu ne devient pas du cuivre
+    metal = texte["metal"].str.lower()
+    metal = pd.Series(np.select([metal.str.startswith("cu"), metal.str.startswith("al")], ["Cuivre", "Aluminium"], ""),
+                      index=bloc.index)
+    # Même désignation courte que le devis : "U1000 R2V / RO2V (PR)" -> "U1000 R2V / RO2V"
+    type_cable = texte["type_cable"].str.split(" (", regex=False).str[0].where(texte["type_cable"] != "", "U1000 R2V")
+    source = texte["fournisseur"].where(texte["fournisseur"] != "", fournisseur)
+    courbe = texte["courbe"].str.upper().str.replace("COURBE", "", regex=False).str.strip()
+    courbe = courbe.where(courbe != "", COURBE_DEFAUT)
+
+    est_cable = prix.notna() & section.notna() & (section > 0)
+    ok_cable = est_cable & (metal != "")
+    ok_disjoncteur = prix.notna() & ~est_cable & calibre.notna() & (calibre > 0)
+    erreurs = [{"Ligne": premiere_ligne + int(pos), "Erreur": "Métal invalide (Cuivre ou Aluminium)" if est_cable.iloc[pos]
+                else "Ligne sans prix, section ni calibre"}
+               for pos in (~ok_cable & ~ok_disjoncteur).to_numpy().nonzero()[0]]
+    cables = pd.DataFrame({"metal": metal, "type_cable": type_cable, "section": section, "prix": prix,
+                           "reference": texte["reference"], "fournisseur": source})[ok_cable]
+    disjoncteurs = pd.DataFrame({"calibre": calibre.round().astype("Int64"), "courbe": courbe, "prix": prix,
+                                 "reference": texte["reference"], "fournisseur": source})[ok_disjoncteur]
+    return cables, disjoncteurs.astype({"calibre": int}), erreurs
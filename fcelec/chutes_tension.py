@@ -0,0 +1,69 @@
+"""Chute de tension cumulée de la source jusqu'aux circuits terminaux (NF C 15-100).
+
+Les limites de la norme portent sur la chute totale depuis l'origine de l'installation :
+chute au jeu de barres d'un tableau = chute à son tableau amont + chute de son câble
+d'arrivée ; chute d'un câble du carnet = chute à son tableau source + sa propre chute.
+"""
+import numpy as np
+
+from fcelec.arrivees import CumulArbre
+
+# Chute de tension totale admissible depuis l'origine (installation alimentée par le réseau BT public)
+LIMITES_DU = {"Éclairage (3 %)": 3.0, "Autres usages (5 %)": 5.0}
+DU_MAX_DEFAUT = 5.0
+
+
+class ChutesTension(CumulArbre):
+    """Chutes cumulées des tableaux et des câbles, mémorisées par tableau.
+
+    Les chutes des câbles d'arrivée viennent de ArriveesTableaux ; seuls les câbles du carnet
+    alimentés par des tableaux recalculés sont mis à jour.
+    """
+
+    def __init__(self, arrivees):
+        super().__init__(arrivees)
+        self._carnet, self._version_carnet = None, None
+        self._cumul_cables = np.zeros(0)
+
+    def origine(self):
+        return 0.0
+
+    def _locale(self, ligne):
+        return ligne["dU(%)"]
+
+    def _cumuler(self, amont, locale):
+        return round(amont + locale, 2)
+
+    def _reinitialiser(self):
+        super()._reinitialiser()
+        self._carnet = None  # autre projet : câbles à recalculer entièrement
+
+    def cables(self, carnet, arbre):
+        """Chute cumulée (%) de chaque câble du carnet, dans l'ordre du carnet.
+
+        Un câble dont le tableau source n'est pas dans l'arbre part directement de la source.
+        """
+        cumul = self.tableaux(arbre)
+        codes, libelles = carnet.codes("Tableau")
+        amont = np.array([cumul.get(t, 0.0) for t in libelles] + [0.0])  # dernier : tableau absent (code -1)
+        if carnet is self._carnet and carnet.version == self._version_carnet:
+            if self._a_propager:
+                # Carnet inchangé : seuls les câbles des tableaux recalculés
+                concernes = [i for i, t in enumerate(libelles) if t in self._a_propager]
+                masque = np.isin(codes, concernes)
+                self._cumul_cables[masque] = np.round(amont[codes[masque]] + np.nan_to_num(carnet.numpy("dU(%)")[masque]), 2)
+        elif len(carnet):
+            self._cumul_cables = np.round(amont[codes] + np.nan_to_num(carnet.numpy("dU(%)")), 2)
+        else:
+            self._cumul_cables = np.zeros(0)
+        self._carnet, self._version_carnet = carnet, carnet.version
+        self._a_propager = set()
+        return self._cumul_cables
+
+    def depassements(self, carnet, arbre, du_max=DU_MAX_DEFAUT):
+        """DataFrame (Tableau, Repère, dU(%), dU amont(%), dU cumulée(%)) des câbles au-delà de `du_max`."""
+        cumul = self.cables(carnet, arbre)
+        indices = np.flatnonzero(cumul > du_max)
+        df = carnet.dataframe().reindex(columns=["Tableau", "Repère", "dU(%)"]).iloc[indices]
+        return df.assign(**{"dU amont(%)": np.round(cumul[indices] - df["dU(%)"].fillna(0.0).to_numpy(dtype=float), 2),
+                            "dU cumulée(%)": cumul[indices]})
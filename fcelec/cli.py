@@ -0,0 +1,86 @@
+"""Ligne de commande : traitement de projets en lot, sans lancer Streamlit.
+
+    python -m fcelec traiter projets/ autre.fcelec --sortie notes/ --processus 4
+    python -m fcelec dimensionner circuits.csv --sortie chantier.fcelec
+    python -m fcelec servir --port 8765
+
+Les moteurs ne sont importés qu'après l'analyse des arguments : `--help` reste immédiat.
+"""
+import argparse
+import json
+import os
+import sys
+
+
+def _traiter(args):
+    from fcelec.traitement import lister_projets, traiter_lot
+
+    chemins = lister_projets(args.projets)
+    if not chemins:
+        print("Aucun fichier projet (.fcelec, .json) trouvé.", file=sys.stderr)
+        return 1
+    syntheses, nb_erreurs = [], 0
+    for synthese in traiter_lot(chemins, args.sortie, args.processus, not args.sans_catalogue):
+        syntheses.append(synthese)
+        if "Erreur" in synthese:
+            nb_erreurs += 1
+            print(f"❌ {synthese['Fichier']} : {synthese['Erreur']}", file=sys.stderr)
+        else:
+            print(f"✅ {synthese['Fichier']} : {synthese['Câbles']} câbles, {synthese['Tableaux']} tableaux, "
+                  f"{synthese['S estimée(kVA)']} kVA, {synthese['Total HT(MAD)']:,.2f} MAD HT")
+    if args.synthese:
+        with open(args.synthese, "w", encoding="utf-8") as f:
+            json.dump(syntheses, f, ensure_ascii=False, indent=1)
+    return 1 if nb_erreurs else 0
+
+
+def _dimensionner(args):
+    from fcelec.projet import EXTENSION, serialiser
+    from fcelec.traitement import projet_depuis_circuits
+
+    projet, erreurs = projet_depuis_circuits(args.circuits, args.nom)
+    for erreur in erreurs:
+        print(f"⚠️ Ligne {erreur['Ligne']} : {erreur['Erreur']}", file=sys.stderr)
+    sortie = args.sortie or f"{os.path.splitext(args.circuits)[0]}.{EXTENSION}"
+    with open(sortie, "wb") as f:
+        f.write(serialiser(projet))
+    print(f"✅ {len(projet['cables'])} circuits dimensionnés -> {sortie}")
+    return 0
+
+
+def _servir(args):
+    from fcelec.service import servir
+
+    servir(args.hote, args.port, args.processus)
+    return 0
+
+
+def analyseur():
+    parser = argparse.ArgumentParser(prog="python -m fcelec", description="Calculs FC ELEC sans interface.")
+    commandes = parser.add_subparsers(dest="commande", required=True)
+
+    traiter = commandes.add_parser("traiter", help="Notes de calcul PDF, bilan et devis XLSX de projets .fcelec/.json")
+    traiter.add_argument("projets", nargs="+", help="Fichiers projet ou dossiers de projets")
+    traiter.add_argument("--sortie", default="sorties", help="Dossier des résultats (un sous-dossier par projet)")
+    traiter.add_argument("--processus", type=int, default=None, help="Taille du pool de processus (défaut : nombre de cœurs)")
+    traiter.add_argument("--sans-catalogue", action="store_true", help="Prix par défaut, sans le catalogue fournisseurs")
+    traiter.add_argument("--synthese", help="Fichier JSON des synthèses par projet")
+    traiter.set_defaults(executer=_traiter)
+
+    dimensionner = commandes.add_parser("dimensionner", help="Carnet de câbles dimensionné depuis un fichier de circuits")
+    dimensionner.add_argument("circuits", help="Fichier de circuits CSV ou XLSX (même format que l'import en masse)")
+    dimensionner.add_argument("--sortie", help="Projet à écrire (défaut : même nom, extension .fcelec)")
+    dimensionner.add_argument("--nom", help="Nom du projet (défaut : nom du fichier)")
+    dimensionner.set_defaults(executer=_dimensionner)
+
+    service = commandes.add_parser("servir", help="Service HTTP/JSON local (dimensionnement, projet, métriques)")
+    service.add_argument("--hote", default="127.0.0.1")
+    service.add_argument("--port", type=int, default=8765)
+    service.add_argument("--processus", type=int, default=None, help="Taille du pool de processus (défaut : nombre de cœurs)")
+    service.set_defaults(executer=_servir)
+    return parser
+
+
+def main(argv=None):
+    args = analyseur().parse_args(argv)
+    return args.executer(args)
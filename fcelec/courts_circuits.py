@@ -0,0 +1,143 @@
+"""Courants de court-circuit par la méthode des impédances (NF C 15-100 / NF C 15-105).
+
+Impédance au jeu de barres d'un tableau = réseau amont + transformateur + câbles d'arrivée
+depuis la source ; elle est mémorisée par tableau (CumulArbre). Pour chaque câble du carnet :
+- Icc max à l'origine (triphasé, conducteurs à 20 °C) comparé au pouvoir de coupure ;
+- Icc min en bout de ligne (phase-neutre, conducteurs chauds) comparé au seuil magnétique,
+  d'où la longueur maximale protégée.
+Tout le carnet est vérifié en une passe vectorisée.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from fcelec.arrivees import CumulArbre
+from fcelec.modele import SOURCE_DEFAUT
+
+U_N = 400.0
+U_0 = 230.0
+C_MAX, C_MIN = 1.05, 0.95
+# Résistivités (ohm.mm²/m) : 20 °C pour l'Icc max, 1,25 x pour l'Icc min
+RHO_FROID = {"Cuivre": 0.01851, "Aluminium": 0.02941}
+RHO_CHAUD = {"Cuivre": 0.023, "Aluminium": 0.037}
+X_CABLE = 0.08e-3  # ohm/m
+# Seuil magnétique haut des courbes de déclenchement (x In)
+COURBES = {"B": 5.0, "C": 10.0, "D": 20.0}
+COURBE_DEFAUT = "C"
+# Pouvoir de coupure retenu par défaut selon le calibre : (calibre max, kA)
+PDC_DEFAUT = ((63, 10.0), (125, 25.0), (630, 36.0), (math.inf, 50.0))
+_PDC_CALIBRES = np.array([c for c, _ in PDC_DEFAUT])
+_PDC_KA = np.array([p for _, p in PDC_DEFAUT])
+
+
+def impedance_source(source=None):
+    """(R, X) en ohms du réseau amont et du transformateur, ramenés au secondaire."""
+    source = {**SOURCE_DEFAUT, **(source or {})}
+    z_reseau = C_MAX * U_N ** 2 / (source["Scc réseau (MVA)"] * 1e6)
+    x_reseau = 0.995 * z_reseau
+    z_transfo = source["Ucc (%)"] / 100 * U_N ** 2 / (source["S transfo (kVA)"] * 1e3)
+    x_transfo = z_transfo / math.hypot(1.0, 0.3)  # R/X = 0,3
+    return 0.1 * x_reseau + 0.3 * x_transfo, x_reseau + x_transfo
+
+
+def pdc_defaut(calibres):
+    """Pouvoir de coupure (kA) par défaut des disjoncteurs de ces calibres."""
+    return _PDC_KA[np.searchsorted(_PDC_CALIBRES, np.asarray(calibres, dtype=float), side="left")]
+
+
+def _impedances_cables(longueurs, sections, alu):
+    """(R à 20 °C, R chaude, X) d'un conducteur, en ohms ; tableaux numpy."""
+    rho_froid = np.where(alu, RHO_FROID["Aluminium"], RHO_FROID["Cuivre"])
+    rho_chaud = np.where(alu, RHO_CHAUD["Aluminium"], RHO_CHAUD["Cuivre"])
+    return rho_froid * longueurs / sections, rho_chaud * longueurs / sections, X_CABLE * longueurs
+
+
+def _icc_max(r, x):
+    return C_MAX * U_N / (math.sqrt(3) * np.hypot(r, x))
+
+
+def _icc_min(r_boucle, x_boucle):
+    return C_MIN * U_0 / np.hypot(r_boucle, x_boucle)
+
+
+class CourtsCircuits(CumulArbre):
+    """Impédances cumulées au jeu de barres de chaque tableau et vérification du carnet.
+
+    Valeur mémorisée par tableau : (R, X) de phase à 20 °C pour l'Icc max et (R, X) de la
+    boucle phase-neutre à chaud pour l'Icc min.
+    """
+
+    def __init__(self, arrivees):
+        super().__init__(arrivees)
+        self._source = dict(SOURCE_DEFAUT)
+        self._cle_carnet, self._verification = None, None
+
+    def definir_source(self, source):
+        source = {**SOURCE_DEFAUT, **source}
+        if source != self._source:
+            self._source = source
+            self._reinitialiser()
+
+    def origine(self):
+        r, x = impedance_source(self._source)
+        return r, x, r, x
+
+    def _locale(self, ligne):
+        r_froid, r_chaud, x = _impedances_cables(float(ligne["Long.(m)"]), float(ligne["Section(mm2)"]),
+                                                 "Aluminium" in ligne["Métal"])
+        return float(r_froid), float(x), 2 * float(r_chaud), 2 * float(x)
+
+    def _cumuler(self, amont, locale):
+        return tuple(a + b for a, b in zip(amont, locale))
+
+    def icc_tableaux(self, arbre):
+        """{tableau: (Icc max kA, Icc min kA)} au jeu de barres."""
+        return {nom: (round(float(_icc_max(z[0], z[1])) / 1e3, 2), round(float(_icc_min(z[2], z[3])) / 1e3, 2))
+                for nom, z in self.tableaux(arbre).items()}
+
+    def verifier(self, carnet, arbre, courbe=COURBE_DEFAUT):
+        """DataFrame d'une ligne par câble : Icc à l'origine et en bout, PdC, seuil magnétique,
+        longueur maximale protégée et conformité. Mis en cache tant que rien ne change."""
+        cumul = self.tableaux(arbre)
+        cle = (id(carnet), carnet.version, id(arbre), arbre.version, tuple(self._source.items()), courbe)
+        if cle == self._cle_carnet:
+            return self._verification
+        codes, libelles = carnet.codes("Tableau")
+        origine = self.origine()
+        # Impédance amont de chaque câble, par code de tableau (dernier : hors arbre -> source)
+        amont = np.array([cumul.get(t, origine) for t in libelles] + [origine]).T[:, codes]
+        longueurs = np.nan_to_num(carnet.numpy("Long.(m)"))
+        sections = carnet.numpy("Section(mm2)")
+        codes_metal, metaux = carnet.codes("Métal")
+        alu = np.isin(codes_metal, [i for i, m in enumerate(metaux) if "Aluminium" in m])
+        calibres = carnet.numpy("Calibre(A)").astype(float)
+        _, r_chaud, x = _impedances_cables(longueurs, sections, alu)
+
+        icc_max = _icc_max(amont[0], amont[1])
+        r_boucle, x_boucle = amont[2] + 2 * r_chaud, amont[3] + 2 * x
+        icc_min = _icc_min(r_boucle, x_boucle)
+        pdc = pdc_defaut(calibres)
+        i_m = COURBES[courbe] * calibres
+        # Longueur pour laquelle Icc min = Im : |Z amont + L.z| = C_MIN.U0/Im (racine positive)
+        _, r_m, x_m = _impedances_cables(2.0, sections, alu)
+        a = r_m ** 2 + x_m ** 2
+        b = amont[2] * r_m + amont[3] * x_m
+        c = amont[2] ** 2 + amont[3] ** 2 - (C_MIN * U_0 / i_m) ** 2
+        l_max = np.maximum((-b + np.sqrt(np.maximum(b ** 2 - a * c, 0.0))) / a, 0.0)
+
+        self._verification = pd.DataFrame({
+            "Tableau": pd.Categorical.from_codes(codes.copy(), libelles),
+            "Repère": carnet.colonne("Repère", ""),
+            "Calibre(A)": calibres.astype(int),
+            "Icc max(kA)": np.round(icc_max / 1e3, 2),
+            "PdC(kA)": pdc,
+            "Icc min(kA)": np.round(icc_min / 1e3, 2),
+            "Im(A)": i_m,
+            "Long.(m)": longueurs,
+            "L max(m)": np.round(l_max, 1),
+            "PdC OK": icc_max <= pdc * 1e3,
+            "Longueur OK": icc_min >= i_m,
+        })
+        self._cle_carnet = cle
+        return self._verification
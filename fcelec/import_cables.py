@@ -0,0 +1,193 @@
+"""Import en masse d'un carnet de câbles (CSV ou XLSX), lu et dimensionné par blocs."""
+import csv
+import io
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from fcelec.moteur_cables import COLONNE_K, LETTRES_POSE, dimensionner_lot, enregistrements, lettre_pose
+from fcelec.tables_iz import FACTEURS_GROUPEMENT, FACTEURS_RESISTIVITE_SOL, FACTEURS_TEMPERATURE, facteur_correction
+
+TAILLE_BLOC = 5000
+
+# Les trois dernières colonnes (conditions d'installation) donnent le facteur de correction COLONNE_K
+COLONNES_IMPORT = ["Tableau", "Repère", "Type Câble", "Tension", "P(W)", "Long.(m)", "Métal", "Pose", "Cos φ", "dU max(%)",
+                   "Temp.(°C)", "Circuits jointifs", "Résistivité sol(K.m/W)"]
+COLONNES_OBLIGATOIRES = ["Tension", "P(W)", "Long.(m)", "Métal", "Pose"]
+TENSIONS = ["230V Mono", "400V Tri"]
+VALEURS_DEFAUT = {"Tableau": "TGBT", "Repère": "", "Type Câble": "U1000 R2V / RO2V (PR)", "Cos φ": 0.85, "dU max(%)": 5.0,
+                  "Temp.(°C)": 30, "Circuits jointifs": 1}
+
+# En-têtes tolérés (sans accents ni casse) -> colonne du carnet
+ALIAS = {
+    "tableau": "Tableau", "tableau source": "Tableau",
+    "repere": "Repère", "designation": "Repère",
+    "type cable": "Type Câble", "type": "Type Câble",
+    "tension": "Tension",
+    "p(w)": "P(W)", "puissance": "P(W)", "puissance (w)": "P(W)",
+    "long.(m)": "Long.(m)", "longueur": "Long.(m)", "longueur (m)": "Long.(m)",
+    "metal": "Métal", "metal conducteur": "Métal", "nature": "Métal",
+    "pose": "Pose", "methode de pose": "Pose",
+    "cos φ": "Cos φ", "cos phi": "Cos φ", "cosphi": "Cos φ",
+    "du max(%)": "dU max(%)", "du max": "dU max(%)", "du max (%)": "dU max(%)",
+    "temp.(°c)": "Temp.(°C)", "temperature": "Temp.(°C)", "temperature ambiante": "Temp.(°C)", "temperature (°c)": "Temp.(°C)",
+    "circuits jointifs": "Circuits jointifs", "groupement": "Circuits jointifs", "nb circuits": "Circuits jointifs",
+    "resistivite sol(k.m/w)": "Résistivité sol(K.m/W)", "resistivite sol": "Résistivité sol(K.m/W)",
+    "resistivite du sol": "Résistivité sol(K.m/W)",
+}
+
+
+def _cle_entete(entete):
+    texte = unicodedata.normalize("NFKD", str(entete).strip().lower())
+    return "".join(c for c in texte if not unicodedata.combining(c))
+
+
+def normaliser_entetes(colonnes, alias=ALIAS):
+    """Associe les en-têtes du fichier aux colonnes du carnet ; les inconnues sont ignorées."""
+    return {c: alias[_cle_entete(c)] for c in colonnes if _cle_entete(c) in alias}
+
+
+def _blocs_csv(fichier, taille_bloc):
+    echantillon = fichier.read(4096)
+    if isinstance(echantillon, bytes):
+        echantillon = echantillon.decode("utf-8-sig", errors="ignore")
+    fichier.seek(0)
+    try:
+        separateur = csv.Sniffer().sniff(echantillon, delimiters=";,\t").delimiter
+    except csv.Error:
+        separateur = ";"
+    taille = getattr(fichier, "size", None)
+    for bloc in pd.read_csv(fichier, sep=separateur, chunksize=taille_bloc, dtype=str,
+                            keep_default_na=False, encoding="utf-8-sig"):
+        yield bloc, (min(fichier.tell() / taille, 1.0) if taille else None)
+
+
+def _blocs_xlsx(fichier, taille_bloc):
+    from openpyxl import load_workbook
+
+    # Mode lecture seule : les lignes sont lues en flux, sans charger tout le classeur
+    classeur = load_workbook(fichier, read_only=True, data_only=True)
+    try:
+        feuille = classeur.worksheets[0]
+        total = feuille.max_row
+        lignes = feuille.iter_rows(values_only=True)
+        entetes = [str(e) if e is not None else "" for e in next(lignes, [])]
+        bloc, lues = [], 0
+        for ligne in lignes:
+            bloc.append(["" if v is None else str(v) for v in ligne[:len(entetes)]])
+            lues += 1
+            if len(bloc) == taille_bloc:
+                yield pd.DataFrame(bloc, columns=entetes), (min(lues / total, 1.0) if total else None)
+                bloc = []
+        if bloc:
+            yield pd.DataFrame(bloc, columns=entetes), 1.0
+    finally:
+        classeur.close()
+
+
+def lire_par_blocs(fichier, nom_fichier, taille_bloc=TAILLE_BLOC):
+    """Générateur de (DataFrame de texte brut, avancement 0..1 ou None) selon l'extension du fichier."""
+    if str(nom_fichier).lower().endswith((".xlsx", ".xlsm")):
+        return _blocs_xlsx(fichier, taille_bloc)
+    return _blocs_csv(fichier, taille_bloc)
+
+
+def nombre(serie):
+    """Colonne de texte -> réels (virgule décimale acceptée, NaN si illisible)."""
+    return pd.to_numeric(serie.astype(str).str.strip().str.replace(",", ".", regex=False), errors="coerce").astype(float)
+
+
+def valider_bloc(bloc, premiere_ligne):
+    """Contrôle un bloc brut ; renvoie (circuits valides prêts à dimensionner, liste des erreurs par ligne)."""
+    bloc = bloc.rename(columns=normaliser_entetes(bloc.columns))
+    bloc = bloc.loc[:, ~bloc.columns.duplicated()]
+    manquantes = [c for c in COLONNES_OBLIGATOIRES if c not in bloc.columns]
+    if manquantes:
+        raise ValueError(f"Colonnes obligatoires absentes : {', '.join(manquantes)}")
+
+    circuits = pd.DataFrame(index=bloc.index)
+    for col in COLONNES_IMPORT:
+        if col in bloc.columns:
+            circuits[col] = bloc[col].astype(str).str.strip()
+        else:
+            circuits[col] = ""
+        if col in VALEURS_DEFAUT:
+            circuits[col] = circuits[col].where(circuits[col] != "", str(VALEURS_DEFAUT[col]))
+
+    # Seuls les deux libellés du formulaire sont reconnus (casse et espaces ignorés) : "230/400" est refusé
+    circuits["Tension"] = circuits["Tension"].str.split().str.join(" ").str.upper().map({t.upper(): t for t in TENSIONS})
+    metal = circuits["Métal"].str.lower()
+    circuits["Métal"] = None
+    circuits.loc[metal.str.startswith("cu"), "Métal"] = "Cuivre"
+    circuits.loc[metal.str.startswith("al"), "Métal"] = "Aluminium"
+    circuits["Pose"] = circuits["Pose"].map(lettre_pose).str.upper()
+    sans_resistivite = circuits["Résistivité sol(K.m/W)"] == ""
+    for col in ["P(W)", "Long.(m)", "Cos φ", "dU max(%)", "Temp.(°C)", "Circuits jointifs", "Résistivité sol(K.m/W)"]:
+        circuits[col] = nombre(circuits[col])
+    temperature, groupement, resistivite = circuits["Temp.(°C)"], circuits["Circuits jointifs"], circuits["Résistivité sol(K.m/W)"]
+
+    controles = [
+        (circuits["Tension"].isna(), "Tension invalide (230V Mono ou 400V Tri)"),
+        (~np.isfinite(circuits["P(W)"]) | (circuits["P(W)"] < 0), "Puissance invalide"),
+        (~np.isfinite(circuits["Long.(m)"]) | (circuits["Long.(m)"] < 1), "Longueur invalide (min 1 m)"),
+        (circuits["Métal"].isna(), "Métal invalide (Cuivre ou Aluminium)"),
+        (~circuits["Pose"].isin(LETTRES_POSE), f"Méthode de pose invalide ({', '.join(LETTRES_POSE)})"),
+        (circuits["Cos φ"].isna() | (circuits["Cos φ"] <= 0) | (circuits["Cos φ"] > 1), "Cos φ invalide (0 à 1)"),
+        (~np.isfinite(circuits["dU max(%)"]) | (circuits["dU max(%)"] <= 0), "dU max invalide"),
+        # Au-delà des abaques le facteur n'est pas connu : la ligne est refusée plutôt qu'extrapolée
+        (~(temperature <= max(FACTEURS_TEMPERATURE["PR"])),
+         f"Température ambiante invalide (max {max(FACTEURS_TEMPERATURE['PR'])} °C)"),
+        (~((groupement >= 1) & (groupement <= max(FACTEURS_GROUPEMENT))),
+         f"Circuits jointifs invalides (1 à {max(FACTEURS_GROUPEMENT)})"),
+        (~sans_resistivite & ~((resistivite > 0) & (resistivite <= max(FACTEURS_RESISTIVITE_SOL))),
+         f"Résistivité du sol invalide (0 à {max(FACTEURS_RESISTIVITE_SOL):g} K.m/W)"),
+    ]
+    erreurs = []
+    invalides = pd.Series(False, index=circuits.index)
+    for masque, message in controles:
+        for pos in masque.to_numpy().nonzero()[0]:
+            erreurs.append({"Ligne": premiere_ligne + int(pos), "Erreur": message})
+        invalides |= masque
+    erreurs.sort(key=lambda e: e["Ligne"])
+    valides = circuits[~invalides].copy()
+    # k3 (résistivité thermique du sol) ne concerne que la pose enterrée
+    valides[COLONNE_K] = facteur_correction(valides["Temp.(°C)"].to_numpy(), valides["Type Câble"].to_numpy(),
+                                            valides["Circuits jointifs"].to_numpy(),
+                                            valides["Résistivité sol(K.m/W)"].where(valides["Pose"] == "D").to_numpy())
+    return valides, erreurs
+
+
+def importer_cables(fichier, nom_fichier, taille_bloc=TAILLE_BLOC, progression=None):
+    """Lit, valide et dimensionne un carnet complet bloc par bloc.
+
+    Renvoie (lignes au format projet["cables"], erreurs). Les numéros de ligne des erreurs
+    sont ceux du fichier (en-tête = ligne 1). `progression(nb_lignes, avancement)` est
+    appelée après chaque bloc.
+    """
+    lignes, erreurs, lues = [], [], 0
+    for bloc, avancement in lire_par_blocs(fichier, nom_fichier, taille_bloc):
+        bloc = bloc.reset_index(drop=True)
+        valides, erreurs_bloc = valider_bloc(bloc, premiere_ligne=lues + 2)
+        erreurs.extend(erreurs_bloc)
+        if not valides.empty:
+            lignes.extend(enregistrements(valides, dimensionner_lot(valides)))
+        lues += len(bloc)
+        if progression:
+            progression(lues, avancement)
+    return lignes, erreurs
+
+
+def modele_csv():
+    """Fichier CSV d'exemple au format attendu par l'import."""
+    exemple = pd.DataFrame([
+        {"Tableau": "TGBT", "Repère": "Départ Sous-sol", "Type Câble": "U1000 R2V / RO2V (PR)", "Tension": "400V Tri",
+         "P(W)": 12000, "Long.(m)": 45, "Métal": "Cuivre", "Pose": "E/F", "Cos φ": 0.85, "dU max(%)": 5,
+         "Temp.(°C)": 35, "Circuits jointifs": 3, "Résistivité sol(K.m/W)": ""},
+        {"Tableau": "TD RDC", "Repère": "Eclairage Hall", "Type Câble": "H07VU / H07VR (PVC)", "Tension": "230V Mono",
+         "P(W)": 1500, "Long.(m)": 30, "Métal": "Cuivre", "Pose": "B", "Cos φ": 0.9, "dU max(%)": 3,
+         "Temp.(°C)": 30, "Circuits jointifs": 1, "Résistivité sol(K.m/W)": ""},
+    ])
+    sortie = io.StringIO()
+    exemple.to_csv(sortie, sep=";", index=False)
+    return sortie.getvalue().encode("utf-8-sig")
@@ -0,0 +1,504 @@
+"""Enregistrement et consultation des demandes d'inscription.
+
+Deux stockages interchangeables sont proposés au formulaire et à l'espace Direction :
+- Google Sheets : chaque demande est d'abord écrite dans un journal local en ajout seul
+  (une ligne JSON), puis les demandes en attente sont envoyées par lots, en arrière-plan,
+  en ajout de lignes ; le coût ne dépend plus de la taille de la feuille et deux envois
+  simultanés ne s'écrasent plus ;
+- SQLite (mode WAL) : base locale indexée pour le travail hors ligne et les gros volumes,
+  la feuille Google Sheets n'étant plus qu'une cible de synchronisation.
+"""
+import contextlib
+import datetime
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+
+import pandas as pd
+
+from fcelec.mesures import MESURES, mesure
+from fcelec.ressources import DOSSIER_DONNEES
+
+FEUILLE_INSCRIPTIONS = "Inscriptions"
+COLONNES_INSCRIPTIONS = ["Date", "Nom et Prénom", "Sexe", "E-mail", "Pays", "WhatsApp", "Formation Demandée"]
+
+_verrous = {}
+_verrou_verrous = threading.Lock()
+
+
+def _verrou(chemin):
+    """Un verrou par fichier journal, partagé par toutes les sessions du processus."""
+    with _verrou_verrous:
+        return _verrous.setdefault(chemin, threading.Lock())
+
+
+def _feuille_gspread(conn, feuille):
+    """Feuille gspread sous-jacente d'une GSheetsConnection, ou None.
+
+    st-gsheets-connection n'expose pas l'ajout de lignes : seul accès à son API privée
+    (`client._select_worksheet`), abandonné si une autre version de la connexion ne l'a plus.
+    """
+    selectionner = getattr(getattr(conn, "client", None), "_select_worksheet", None)
+    if not callable(selectionner):
+        return None
+    try:
+        ws = selectionner(worksheet=feuille)
+    except TypeError:  # Signature changée
+        return None
+    return ws if hasattr(ws, "append_rows") else None
+
+
+@mesure("gsheets.update")
+def ajouter_lignes(conn, feuille, lignes):
+    """Ajoute des lignes en fin de feuille, sans relire ni réécrire l'existant si possible.
+
+    Sans ajout disponible, repli sur l'API publique de la connexion : relecture puis réécriture.
+    """
+    if hasattr(conn, "append_rows"):
+        return conn.append_rows(feuille, lignes)
+    ws = _feuille_gspread(conn, feuille)
+    if ws is not None:
+        if not ws.row_values(1):
+            ws.append_row(COLONNES_INSCRIPTIONS, value_input_option="USER_ENTERED")
+        return ws.append_rows(lignes, value_input_option="USER_ENTERED")
+    existant = conn.read(worksheet=feuille, ttl=0)
+    conn.update(worksheet=feuille, data=pd.concat([existant, pd.DataFrame(lignes, columns=COLONNES_INSCRIPTIONS)], ignore_index=True))
+
+
+class FileAttenteInscriptions:
+    """Journal local des inscriptions non encore synchronisées avec la feuille."""
+
+    def __init__(self, conn, feuille=FEUILLE_INSCRIPTIONS, chemin=None):
+        self.conn = conn
+        self.feuille = feuille
+        self.chemin = chemin or os.path.join(DOSSIER_DONNEES, f"{feuille.lower()}_attente.jsonl")
+        self._en_envoi = self.chemin + ".envoi"
+        self.illisibles = self.chemin + ".illisibles"  # lignes corrompues (arrêt en pleine écriture...)
+        self._verrou_journal = _verrou(self.chemin)
+        self._verrou_envoi = _verrou(self._en_envoi)
+
+    def enregistrer(self, inscription):
+        """Écrit la demande sur disque (durable dès le retour de l'appel)."""
+        ligne = json.dumps({c: inscription.get(c, "") for c in COLONNES_INSCRIPTIONS}, ensure_ascii=False)
+        with self._verrou_journal:
+            os.makedirs(os.path.dirname(self.chemin), exist_ok=True)
+            with open(self.chemin, "ab+") as f:
+                # Dernière ligne tronquée (arrêt en pleine écriture) : la nouvelle demande n'y est pas collée
+                if f.seek(0, os.SEEK_END):
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        ligne = "\n" + ligne
+                f.write((ligne + "\n").encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+
+    @staticmethod
+    def _lire(chemin, illisibles=None):
+        """Demandes du fichier ; les lignes illisibles sont ignorées (et ajoutées à `illisibles`)."""
+        if not os.path.exists(chemin):
+            return []
+        demandes = []
+        with open(chemin, encoding="utf-8", errors="replace") as f:
+            for ligne in f:
+                if not ligne.strip():
+                    continue
+                try:
+                    demande = json.loads(ligne)
+                except json.JSONDecodeError:
+                    demande = None
+                if isinstance(demande, dict):
+                    demandes.append(demande)
+                elif illisibles is not None:
+                    illisibles.append(ligne.rstrip("\n"))
+        return demandes
+
+    def en_attente(self):
+        """Nombre de demandes pas encore envoyées."""
+        with self._verrou_journal:
+            return len(self._lire(self.chemin)) + len(self._lire(self._en_envoi))
+
+    def vider(self):
+        """Envoie toutes les demandes en attente en un seul ajout ; renvoie le nombre envoyé.
+
+        En cas d'échec réseau, rien n'est perdu : le lot est conservé et renvoyé au prochain appel.
+        """
+        with self._verrou_envoi:
+            return self._envoyer_lot()
+
+    def vider_en_arriere_plan(self):
+        """Lance l'envoi dans un thread : le formulaire n'attend pas l'aller-retour réseau."""
+        threading.Thread(target=self._envois_en_attente, name=f"envoi-{self.feuille}", daemon=True).start()
+
+    def _envois_en_attente(self):
+        while os.path.exists(self.chemin) or os.path.exists(self._en_envoi):
+            # Un envoi déjà en cours reprendra les demandes écrites entre-temps (boucle ci-dessus)
+            if not self._verrou_envoi.acquire(blocking=False):
+                return
+            try:
+                self._envoyer_lot()
+            except Exception:
+                return  # Lot conservé, renvoyé au prochain envoi
+            finally:
+                self._verrou_envoi.release()
+
+    def _envoyer_lot(self):
+        with self._verrou_journal:
+            # Le journal courant est mis de côté ; les nouvelles demandes repartent dans un journal neuf
+            if os.path.exists(self.chemin):
+                if os.path.exists(self._en_envoi):
+                    with open(self._en_envoi, "a", encoding="utf-8") as dest, open(self.chemin, encoding="utf-8") as src:
+                        dest.write("\n" + src.read())  # Lignes vides ignorées à la lecture
+                    os.remove(self.chemin)
+                else:
+                    os.replace(self.chemin, self._en_envoi)
+        illisibles = []
+        lot = self._lire(self._en_envoi, illisibles)
+        if lot:
+            ajouter_lignes(self.conn, self.feuille, [[i.get(c, "") for c in COLONNES_INSCRIPTIONS] for i in lot])
+        if illisibles:
+            # Mises de côté pour examen : elles ne bloquent plus les envois suivants
+            with open(self.illisibles, "a", encoding="utf-8") as f:
+                f.write("\n".join(illisibles) + "\n")
+        if os.path.exists(self._en_envoi):
+            os.remove(self._en_envoi)
+        return len(lot)
+
+
+class GSheetsLocal:
+    """Doublure locale de GSheetsConnection (développement hors ligne, essais).
+
+    Les feuilles sont des fichiers CSV d'un dossier ; `read`/`update` ont la même
+    signature que la connexion Streamlit et `append_rows` ajoute en fin de fichier.
+    """
+
+    def __init__(self, dossier=None):
+        self.dossier = dossier or os.path.join(DOSSIER_DONNEES, "feuilles")
+        os.makedirs(self.dossier, exist_ok=True)
+
+    def _chemin(self, worksheet):
+        return os.path.join(self.dossier, f"{worksheet}.csv")
+
+    def read(self, worksheet=FEUILLE_INSCRIPTIONS, ttl=None, **kwargs):
+        chemin = self._chemin(worksheet)
+        if not os.path.exists(chemin):
+            return pd.DataFrame(columns=COLONNES_INSCRIPTIONS)
+        return pd.read_csv(chemin, dtype=str, keep_default_na=False)
+
+    def update(self, worksheet=FEUILLE_INSCRIPTIONS, data=None, **kwargs):
+        data.to_csv(self._chemin(worksheet), index=False)
+        return data
+
+    def append_rows(self, worksheet, lignes):
+        chemin = self._chemin(worksheet)
+        pd.DataFrame(lignes, columns=COLONNES_INSCRIPTIONS).to_csv(
+            chemin, mode="a", index=False, header=not os.path.exists(chemin))
+
+
+# --- STOCKAGES ---
+STOCKAGE_PAR_DEFAUT = os.environ.get("FCELEC_STOCKAGE", "gsheets")
+
+
+def _date_iso(date_fr):
+    """'31/12/2026' -> '2026-12-31' (tri et filtres par période) ; valeur inchangée sinon."""
+    try:
+        return datetime.datetime.strptime(str(date_fr), "%d/%m/%Y").date().isoformat()
+    except ValueError:
+        return str(date_fr)
+
+
+def _date_fr(date_iso):
+    """Inverse de `_date_iso`."""
+    try:
+        return datetime.date.fromisoformat(date_iso).strftime("%d/%m/%Y")
+    except ValueError:
+        return date_iso
+
+
+def _filtrer_df(df, formation=None, pays=None, date_debut=None, date_fin=None):
+    if formation:
+        df = df[df["Formation Demandée"] == formation]
+    if pays:
+        df = df[df["Pays"].astype(str).str.strip().str.lower() == pays.strip().lower()]
+    if date_debut or date_fin:
+        dates = pd.to_datetime(df["Date"], format="%d/%m/%Y", errors="coerce")
+        garde = dates.notna()
+        if date_debut:
+            garde &= dates >= pd.Timestamp(date_debut)
+        if date_fin:
+            garde &= dates <= pd.Timestamp(date_fin)
+        df = df[garde]
+    return df
+
+
+def _agreger_df(df):
+    """Nombre de prospects par formation, par pays et par mois (AAAA-MM)."""
+    mois = pd.to_datetime(df["Date"], format="%d/%m/%Y", errors="coerce").dt.strftime("%Y-%m")
+    pays = df["Pays"].astype(str).str.strip().str.title()
+    return {
+        "Formation": df.groupby("Formation Demandée").size().sort_values(ascending=False).rename_axis("Formation").reset_index(name="Nb"),
+        "Pays": pays.groupby(pays).size().sort_values(ascending=False).rename_axis("Pays").reset_index(name="Nb"),
+        "Mois": mois.groupby(mois).size().sort_index().rename_axis("Mois").reset_index(name="Nb"),
+    }
+
+
+class StockageGSheets:
+    """Feuille Google Sheets comme stockage principal (écritures via la file d'attente)."""
+
+    def __init__(self, conn, feuille=FEUILLE_INSCRIPTIONS):
+        self.conn = conn
+        self.feuille = feuille
+        self.file = FileAttenteInscriptions(conn, feuille)
+
+    def ajouter(self, inscription):
+        self.file.enregistrer(inscription)
+        self.file.vider_en_arriere_plan()
+
+    def synchroniser(self):
+        return self.file.vider()
+
+    def _lire(self, **filtres):
+        with MESURES.chrono("gsheets.read"):
+            df = self.conn.read(worksheet=self.feuille, ttl=5)
+        return _filtrer_df(df, **filtres)
+
+    def compter(self, **filtres):
+        return len(self._lire(**filtres))
+
+    def lister(self, decalage=0, limite=50, **filtres):
+        """Page de résultats, les plus récentes en premier."""
+        df = self._lire(**filtres)
+        return df.iloc[::-1].iloc[decalage:decalage + limite].reset_index(drop=True)
+
+    def tout(self, **filtres):
+        return self._lire(**filtres)
+
+    def iterer(self, **filtres):
+        """Lignes (tuples) dans l'ordre de la feuille, pour l'export."""
+        df = self._lire(**filtres)[COLONNES_INSCRIPTIONS].astype(object)
+        return df.where(df.notna(), "").itertuples(index=False, name=None)
+
+    def agregats(self, **filtres):
+        return _agreger_df(self._lire(**filtres))
+
+
+class StockageSQLite:
+    """Base SQLite locale (WAL, index sur date, formation et pays).
+
+    Les lignes non encore envoyées à Google Sheets sont marquées `synchronise = 0`.
+    Les comptages par mois, formation et pays sont tenus à jour par un trigger dans
+    `compteurs_inscriptions` : les agrégats ne relisent pas la table des prospects.
+    À la première ouverture avec une feuille de synchronisation, l'historique de la feuille
+    est repris dans la base (`reprendre_feuille`).
+    """
+
+    VERSION_SCHEMA = 3  # 2 : compteurs par trigger ; 3 : historique de la feuille repris
+
+    _COLONNES_SQL = ["date", "nom", "sexe", "email", "pays", "whatsapp", "formation"]
+
+    def __init__(self, chemin=None, conn_sync=None, feuille=FEUILLE_INSCRIPTIONS):
+        self.chemin = chemin or os.path.join(DOSSIER_DONNEES, "inscriptions.sqlite3")
+        self.conn_sync = conn_sync
+        self.feuille = feuille
+        self._verrou_sync = _verrou(self.chemin)
+        os.makedirs(os.path.dirname(os.path.abspath(self.chemin)), exist_ok=True)
+        with self._connexion() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""CREATE TABLE IF NOT EXISTS inscriptions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date TEXT NOT NULL, nom TEXT, sexe TEXT, email TEXT, pays TEXT,
+                whatsapp TEXT, formation TEXT, synchronise INTEGER NOT NULL DEFAULT 0)""")
+            db.execute("CREATE INDEX IF NOT EXISTS idx_inscriptions_date ON inscriptions(date)")
+            db.execute("CREATE INDEX IF NOT EXISTS idx_inscriptions_formation ON inscriptions(formation, date)")
+            db.execute("CREATE INDEX IF NOT EXISTS idx_inscriptions_pays ON inscriptions(pays COLLATE NOCASE, date)")
+            db.execute("CREATE INDEX IF NOT EXISTS idx_inscriptions_sync ON inscriptions(synchronise) WHERE synchronise = 0")
+            if db.execute("PRAGMA user_version").fetchone()[0] < 2:
+                db.execute("""CREATE TABLE IF NOT EXISTS compteurs_inscriptions (
+                    mois TEXT NOT NULL, formation TEXT NOT NULL, pays TEXT NOT NULL COLLATE NOCASE,
+                    nb INTEGER NOT NULL, PRIMARY KEY (mois, formation, pays))""")
+                db.execute("""CREATE TRIGGER IF NOT EXISTS trg_compteurs_inscriptions AFTER INSERT ON inscriptions BEGIN
+                    INSERT INTO compteurs_inscriptions (mois, formation, pays, nb)
+                    VALUES (substr(NEW.date, 1, 7), coalesce(NEW.formation, ''), coalesce(NEW.pays, ''), 1)
+                    ON CONFLICT (mois, formation, pays) DO UPDATE SET nb = nb + 1;
+                END""")
+                # Base créée avant les compteurs : rattrapage unique
+                db.execute("DELETE FROM compteurs_inscriptions")
+                db.execute("""INSERT INTO compteurs_inscriptions (mois, formation, pays, nb)
+                    SELECT substr(date, 1, 7), coalesce(formation, ''), coalesce(pays, '') COLLATE NOCASE, COUNT(*)
+                    FROM inscriptions GROUP BY 1, 2, 3""")
+                db.execute("PRAGMA user_version = 2")
+        if self.conn_sync is not None:
+            try:
+                self.reprendre_feuille()
+            except Exception:
+                pass  # Feuille injoignable : nouvel essai à la prochaine ouverture
+
+    def reprendre_feuille(self):
+        """Copie unique des lignes de la feuille dans la base ; renvoie leur nombre.
+
+        Faite tant que la base n'a encore rien synchronisé (sinon ses lignes sont déjà dans la
+        feuille et seraient dupliquées). Les lignes reprises sont marquées synchronisées.
+        """
+        with self._connexion() as db:
+            if db.execute("PRAGMA user_version").fetchone()[0] >= 3:
+                return 0
+        df = self.conn_sync.read(worksheet=self.feuille, ttl=0)
+        df = df.reindex(columns=COLONNES_INSCRIPTIONS).astype(object)
+        df = df.where(df.notna(), "")
+        lignes = [self._valeurs(l) for l in df.to_dict("records") if any(str(v).strip() for v in l.values())]
+        with self._connexion() as db:
+            db.execute("BEGIN IMMEDIATE")  # Une seule reprise si plusieurs processus ouvrent la base
+            if db.execute("PRAGMA user_version").fetchone()[0] >= 3:
+                return 0
+            if db.execute("SELECT 1 FROM inscriptions WHERE synchronise = 1 LIMIT 1").fetchone():
+                lignes = []
+            db.executemany(
+                f"INSERT INTO inscriptions ({', '.join(self._COLONNES_SQL)}, synchronise) VALUES (?, ?, ?, ?, ?, ?, ?, 1)",
+                lignes)
+            db.execute(f"PRAGMA user_version = {self.VERSION_SCHEMA}")
+        return len(lignes)
+
+    @contextlib.contextmanager
+    def _connexion(self):
+        """Une connexion par opération (sûr entre les threads des sessions), validée puis fermée."""
+        db = sqlite3.connect(self.chemin, timeout=30)
+        try:
+            db.execute("PRAGMA synchronous=NORMAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def _valeurs(inscription):
+        valeurs = [str(inscription.get(c, "")) for c in COLONNES_INSCRIPTIONS]
+        return (_date_iso(valeurs[0]), *valeurs[1:4], valeurs[4].strip(), *valeurs[5:])
+
+    def ajouter(self, inscription):
+        self.ajouter_lot([inscription])
+        if self.conn_sync is not None:
+            try:
+                self.synchroniser()
+            except Exception:
+                pass  # Reste marquée non synchronisée, renvoyée au prochain envoi
+
+    def ajouter_lot(self, inscriptions):
+        with self._connexion() as db:
+            db.executemany(
+                f"INSERT INTO inscriptions ({', '.join(self._COLONNES_SQL)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [self._valeurs(i) for i in inscriptions])
+
+    def synchroniser(self):
+        """Envoie en un seul ajout toutes les lignes non synchronisées ; renvoie leur nombre."""
+        if self.conn_sync is None:
+            return 0
+        with self._verrou_sync:
+            with self._connexion() as db:
+                lignes = db.execute(
+                    f"SELECT id, {', '.join(self._COLONNES_SQL)} FROM inscriptions WHERE synchronise = 0 ORDER BY id").fetchall()
+            if not lignes:
+                return 0
+            ajouter_lignes(self.conn_sync, self.feuille, [[_date_fr(l[1]), *l[2:]] for l in lignes])
+            with self._connexion() as db:
+                db.execute("UPDATE inscriptions SET synchronise = 1 WHERE synchronise = 0 AND id <= ?", (lignes[-1][0],))
+            return len(lignes)
+
+    @staticmethod
+    def _where(formation=None, pays=None, date_debut=None, date_fin=None):
+        clauses, params = [], []
+        if formation:
+            clauses.append("formation = ?")
+            params.append(formation)
+        if pays:
+            clauses.append("pays = ? COLLATE NOCASE")
+            params.append(pays.strip())
+        if date_debut:
+            clauses.append("date >= ?")
+            params.append(date_debut.isoformat())
+        if date_fin:
+            clauses.append("date <= ?")
+            params.append(date_fin.isoformat())
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def compter(self, **filtres):
+        if not (filtres.get("date_debut") or filtres.get("date_fin")):
+            # Sans borne de dates, les compteurs suffisent
+            where, params = self._where(**filtres)
+            with self._connexion() as db:
+                return db.execute(f"SELECT coalesce(SUM(nb), 0) FROM compteurs_inscriptions{where}", params).fetchone()[0]
+        where, params = self._where(**filtres)
+        with self._connexion() as db:
+            return db.execute(f"SELECT COUNT(*) FROM inscriptions{where}", params).fetchone()[0]
+
+    def agregats(self, **filtres):
+        """Nombre de prospects par formation, par pays et par mois (AAAA-MM).
+
+        Lus dans les compteurs, sauf si une période est demandée (jour près) :
+        regroupement sur la table des prospects via l'index de date.
+        """
+        table = "inscriptions" if filtres.get("date_debut") or filtres.get("date_fin") else "compteurs_inscriptions"
+        nb = "COUNT(*)" if table == "inscriptions" else "SUM(nb)"
+        mois = "substr(date, 1, 7)" if table == "inscriptions" else "mois"
+        where, params = self._where(**filtres)
+        requetes = {
+            "Formation": f"SELECT formation, {nb} AS n FROM {table}{where} GROUP BY formation ORDER BY n DESC",
+            "Pays": f"SELECT pays, {nb} AS n FROM {table}{where} GROUP BY pays COLLATE NOCASE ORDER BY n DESC",
+            "Mois": f"SELECT {mois} AS m, {nb} FROM {table}{where} GROUP BY m ORDER BY m",
+        }
+        with self._connexion() as db:
+            return {nom: pd.DataFrame(db.execute(sql, params).fetchall(), columns=[nom, "Nb"])
+                    for nom, sql in requetes.items()}
+
+    def _requete(self, sql, params):
+        with self._connexion() as db:
+            lignes = db.execute(sql, params).fetchall()
+        df = pd.DataFrame(lignes, columns=COLONNES_INSCRIPTIONS)
+        df["Date"] = df["Date"].map(_date_fr)
+        return df
+
+    def lister(self, decalage=0, limite=50, **filtres):
+        """Page de résultats, les plus récentes en premier (LIMIT/OFFSET côté SQLite)."""
+        where, params = self._where(**filtres)
+        return self._requete(
+            f"SELECT {', '.join(self._COLONNES_SQL)} FROM inscriptions{where} ORDER BY date DESC, id DESC LIMIT ? OFFSET ?",
+            params + [limite, decalage])
+
+    def tout(self, **filtres):
+        where, params = self._where(**filtres)
+        return self._requete(f"SELECT {', '.join(self._COLONNES_SQL)} FROM inscriptions{where} ORDER BY date, id", params)
+
+    def iterer(self, taille_lot=5000, **filtres):
+        """Lignes (tuples) par ordre chronologique, lues par lots sans tout charger."""
+        where, params = self._where(**filtres)
+        with self._connexion() as db:
+            curseur = db.execute(f"SELECT {', '.join(self._COLONNES_SQL)} FROM inscriptions{where} ORDER BY date, id", params)
+            while lot := curseur.fetchmany(taille_lot):
+                for ligne in lot:
+                    yield (_date_fr(ligne[0]), *ligne[1:])
+
+
+def stockage_inscriptions(conn, type_stockage=STOCKAGE_PAR_DEFAUT):
+    """Stockage choisi par FCELEC_STOCKAGE : 'gsheets' (par défaut) ou 'sqlite' synchronisé vers la feuille."""
+    if type_stockage == "sqlite":
+        return StockageSQLite(conn_sync=conn)
+    return StockageGSheets(conn)
+
+
+def exporter_xlsx(stockage, **filtres):
+    """Classeur XLSX des prospects filtrés.
+
+    Écrit ligne à ligne (openpyxl en écriture seule) dans un fichier temporaire :
+    seul le fichier final est chargé en mémoire, pour le téléchargement.
+    """
+    from openpyxl import Workbook
+
+    classeur = Workbook(write_only=True)
+    feuille = classeur.create_sheet(FEUILLE_INSCRIPTIONS)
+    feuille.append(COLONNES_INSCRIPTIONS)
+    for ligne in stockage.iterer(**filtres):
+        feuille.append(list(ligne))
+    with tempfile.TemporaryFile() as f:
+        classeur.save(f)
+        f.seek(0)
+        return f.read()
@@ -0,0 +1,123 @@
+"""Instrumentation : durées et compteurs des chemins coûteux, communs à tout le processus.
+
+`mesure(nom)` chronomètre une fonction (décorateur), `MESURES.chrono(nom)` un bloc. Chaque
+durée va dans une fenêtre glissante par nom (percentiles p50/p95) et dans un journal
+structuré borné, exportable en JSON lines. `demarrer_profil` / `rapport_profil` capturent
+un rechargement complet de l'application avec cProfile.
+"""
+import contextlib
+import cProfile
+import datetime
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+FENETRE = int(os.environ.get("FCELEC_MESURES_FENETRE", 1000))  # durées gardées par mesure
+TAILLE_JOURNAL = 10_000
+
+
+class Mesures:
+    """Durées par nom (fenêtre glissante et cumul), compteurs et journal des dernières mesures."""
+
+    def __init__(self, fenetre=FENETRE, taille_journal=TAILLE_JOURNAL):
+        self.fenetre = fenetre
+        self._verrou = threading.Lock()
+        self._durees = {}     # nom -> deque des dernières durées (s)
+        self._cumuls = {}     # nom -> [appels, durée totale]
+        self._compteurs = {}
+        self._journal = deque(maxlen=taille_journal)
+
+    def enregistrer(self, nom, duree, **contexte):
+        with self._verrou:
+            if nom not in self._durees:
+                self._durees[nom] = deque(maxlen=self.fenetre)
+                self._cumuls[nom] = [0, 0.0]
+            self._durees[nom].append(duree)
+            cumul = self._cumuls[nom]
+            cumul[0] += 1
+            cumul[1] += duree
+            self._journal.append((time.time(), nom, duree, contexte))
+
+    def compter(self, nom, n=1):
+        with self._verrou:
+            self._compteurs[nom] = self._compteurs.get(nom, 0) + n
+
+    @contextlib.contextmanager
+    def chrono(self, nom, **contexte):
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.enregistrer(nom, time.perf_counter() - debut, **contexte)
+
+    def statistiques(self):
+        """Une ligne par mesure, la plus coûteuse en premier : appels, total, p50/p95/max de la fenêtre."""
+        with self._verrou:
+            instantane = [(nom, np.array(durees), *self._cumuls[nom]) for nom, durees in self._durees.items()]
+        lignes = [{
+            "Mesure": nom, "Appels": appels, "Total (s)": round(total, 3),
+            "p50 (ms)": round(float(np.percentile(durees, 50)) * 1000, 2),
+            "p95 (ms)": round(float(np.percentile(durees, 95)) * 1000, 2),
+            "Max (ms)": round(float(durees.max()) * 1000, 2),
+        } for nom, durees, appels, total in instantane]
+        return sorted(lignes, key=lambda l: -l["Total (s)"])
+
+    def compteurs(self):
+        with self._verrou:
+            return dict(self._compteurs)
+
+    def journal_jsonl(self):
+        """Journal des dernières mesures, une ligne JSON par mesure (horodatage ISO, nom, durée, contexte)."""
+        with self._verrou:
+            journal = list(self._journal)
+        sortie = io.StringIO()
+        for horodatage, nom, duree, contexte in journal:
+            sortie.write(json.dumps({"horodatage": datetime.datetime.fromtimestamp(horodatage).isoformat(timespec="milliseconds"),
+                                     "mesure": nom, "duree_ms": round(duree * 1000, 3), **contexte},
+                                    ensure_ascii=False, default=str) + "\n")
+        return sortie.getvalue().encode("utf-8")
+
+    def vider(self):
+        with self._verrou:
+            self._durees.clear()
+            self._cumuls.clear()
+            self._compteurs.clear()
+            self._journal.clear()
+
+
+MESURES = Mesures()
+
+
+def mesure(nom):
+    """Décorateur : chaque appel de la fonction est chronométré sous `nom`."""
+    def decorateur(fonction):
+        @functools.wraps(fonction)
+        def chronometre(*args, **kwargs):
+            debut = time.perf_counter()
+            try:
+                return fonction(*args, **kwargs)
+            finally:
+                MESURES.enregistrer(nom, time.perf_counter() - debut)
+        return chronometre
+    return decorateur
+
+
+def demarrer_profil():
+    profil = cProfile.Profile()
+    profil.enable()
+    return profil
+
+
+def rapport_profil(profil, lignes=40):
+    """Arrête le profil ; texte pstats des `lignes` fonctions au temps cumulé le plus élevé."""
+    profil.disable()
+    sortie = io.StringIO()
+    pstats.Stats(profil, stream=sortie).strip_dirs().sort_stats("cumulative").print_stats(lignes)
+    return sortie.getvalue()
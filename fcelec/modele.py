@@ -0,0 +1,598 @@
+"""Modèle de projet en colonnes : câbles et circuits rangés en tableaux typés.
+
+Une table remplace une liste de dicts : une colonne par champ (réels et entiers dans des
+`array`, libellés répétitifs - tableau, métal, pose, tension... - codés par catégorie).
+Elle se parcourt et s'indexe comme la liste d'origine (chaque ligne est rendue sous forme
+de dict), et sa vue DataFrame est mise en cache jusqu'à la prochaine modification.
+
+Les tableaux électriques forment un arbre (TGBT -> TD -> sous-tableaux) dont les totaux
+de puissance sont tenus à jour de proche en proche.
+"""
+import hashlib
+import json
+import math
+from array import array
+from collections.abc import MutableMapping
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from fcelec.mesures import MESURES
+
+CATEGORIE, TEXTE, REEL, ENTIER, NOMBRE = "categorie", "texte", "reel", "entier", "nombre"
+# NOMBRE : réel rendu en int s'il est entier (sections 1.5, 2.5, 4, 6...)
+
+SCHEMA_CABLES = (
+    ("Tableau", CATEGORIE), ("Repère", TEXTE), ("Type Câble", CATEGORIE), ("Métal", CATEGORIE),
+    ("Pose", CATEGORIE), ("Tension", CATEGORIE), ("P(W)", REEL), ("Long.(m)", REEL), ("Ib(A)", REEL),
+    ("Calibre(A)", ENTIER), ("Iz(A)", REEL), ("Section(mm2)", NOMBRE), ("dU(%)", REEL),
+)
+SCHEMA_CIRCUITS = (
+    ("Circuit", TEXTE), ("Type", CATEGORIE), ("P(W)", REEL), ("Ku", REEL), ("P.Abs(W)", ENTIER),
+)
+
+# Câble d'arrivée d'un tableau (depuis son amont) : valeurs par défaut d'une ligne principale
+ARRIVEE_DEFAUT = {
+    "Type Câble": "U1000 R2V / RO2V (PR)", "Tension": "400V Tri", "Long.(m)": 20.0,
+    "Métal": "Cuivre", "Pose": "E/F", "Cos φ": 0.85, "dU max(%)": 2.0,
+}
+
+# Alimentation de l'installation : réseau HTA amont et transformateur HTA/BT
+SOURCE_DEFAUT = {"Scc réseau (MVA)": 500.0, "S transfo (kVA)": 630.0, "Ucc (%)": 4.0}
+
+_ABSENT = object()
+_ENTIER_ABSENT = -2 ** 63
+_TYPECODES = {CATEGORIE: "i", REEL: "d", NOMBRE: "d", ENTIER: "q"}
+
+
+class _Colonne:
+    __slots__ = ("nom", "type", "valeurs", "categories", "codes")
+
+    def __init__(self, nom, type_colonne):
+        self.nom = nom
+        self.type = type_colonne
+        self.valeurs = array(_TYPECODES[type_colonne]) if type_colonne in _TYPECODES else []
+        self.categories = []  # CATEGORIE : code -> libellé
+        self.codes = {}       # CATEGORIE : libellé -> code
+
+    def encoder(self, valeur):
+        """Valeur Python -> valeur stockée (absente : NaN, sentinelle ou code -1)."""
+        if self.type == CATEGORIE:
+            if valeur is _ABSENT or valeur is None:
+                return -1
+            code = self.codes.get(valeur)
+            if code is None:
+                code = self.codes[valeur] = len(self.categories)
+                self.categories.append(valeur)
+            return code
+        if self.type == ENTIER:
+            return _ENTIER_ABSENT if valeur is _ABSENT or valeur is None else int(valeur)
+        if self.type in (REEL, NOMBRE):
+            return math.nan if valeur is _ABSENT or valeur is None else float(valeur)
+        return valeur
+
+    def decoder(self, brut):
+        """Valeur stockée -> valeur Python (ou _ABSENT)."""
+        if self.type == CATEGORIE:
+            return _ABSENT if brut < 0 else self.categories[brut]
+        if self.type == ENTIER:
+            return _ABSENT if brut == _ENTIER_ABSENT else brut
+        if self.type == REEL:
+            return _ABSENT if brut != brut else brut
+        if self.type == NOMBRE:
+            return _ABSENT if brut != brut else int(brut) if brut.is_integer() else brut
+        return brut
+
+    def vide(self):
+        """Vrai si aucune ligne ne renseigne ce champ."""
+        if self.type == CATEGORIE:
+            return not any(c >= 0 for c in self.valeurs)
+        if self.type == ENTIER:
+            return bool((np.frombuffer(self.valeurs, dtype=np.int64) == _ENTIER_ABSENT).all())
+        if self.type in (REEL, NOMBRE):
+            return bool(np.isnan(np.frombuffer(self.valeurs, dtype=np.float64)).all())
+        return all(v is _ABSENT for v in self.valeurs)
+
+    def serie(self):
+        if self.type == CATEGORIE:
+            return pd.Categorical.from_codes(np.frombuffer(self.valeurs, dtype=np.int32), self.categories)
+        if self.type == ENTIER:
+            entiers = np.frombuffer(self.valeurs, dtype=np.int64)
+            absents = entiers == _ENTIER_ABSENT
+            return pd.arrays.IntegerArray(entiers.copy(), absents) if absents.any() else entiers.copy()
+        if self.type in (REEL, NOMBRE):
+            return np.frombuffer(self.valeurs, dtype=np.float64).copy()
+        return pd.array([None if v is _ABSENT else v for v in self.valeurs], dtype=object)
+
+
+class TableColonnes:
+    """Liste de lignes (dicts) stockée par colonnes.
+
+    Les champs hors schéma sont gardés dans des colonnes génériques ajoutées au besoin ;
+    un champ absent d'une ligne reste absent du dict rendu.
+    """
+
+    SCHEMA = ()
+
+    def __init__(self, lignes=()):
+        self._colonnes = {nom: _Colonne(nom, type_colonne) for nom, type_colonne in self.SCHEMA}
+        self._n = 0
+        self.version = 0  # incrémentée à chaque modification
+        self._df = None
+        self._empreinte = None
+        self._suivis = []  # appelés à chaque modification (ArbreTableaux : tableau à resynchroniser)
+        self.extend(lignes)
+
+    # --- Lecture ---
+    def __len__(self):
+        return self._n
+
+    def _ligne(self, i):
+        ligne = {}
+        for nom, col in self._colonnes.items():
+            valeur = col.decoder(col.valeurs[i])
+            if valeur is not _ABSENT:
+                ligne[nom] = valeur
+        return ligne
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._ligne(j) for j in range(*i.indices(self._n))]
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        return self._ligne(i)
+
+    def __iter__(self):
+        decodees = [(nom, col.decoder, col.valeurs) for nom, col in self._colonnes.items()]
+        for i in range(self._n):
+            ligne = {}
+            for nom, decoder, valeurs in decodees:
+                valeur = decoder(valeurs[i])
+                if valeur is not _ABSENT:
+                    ligne[nom] = valeur
+            yield ligne
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._n} lignes)"
+
+    def colonne(self, nom, defaut=None):
+        """Valeurs Python d'un champ, `defaut` pour les lignes où il est absent."""
+        col = self._colonnes.get(nom)
+        if col is None:
+            return [defaut] * self._n
+        if col.type == CATEGORIE:
+            libelles = col.categories
+            return [libelles[c] if c >= 0 else defaut for c in col.valeurs]
+        if col.type == REEL:
+            return [defaut if v != v else v for v in col.valeurs]
+        return [defaut if v is _ABSENT else v for v in map(col.decoder, col.valeurs)]
+
+    def numpy(self, nom):
+        """Colonne numérique en tableau numpy (sans copie ; NaN pour les réels absents)."""
+        return np.frombuffer(self._colonnes[nom].valeurs, dtype=np.float64 if self._colonnes[nom].type in (REEL, NOMBRE) else np.int64)
+
+    def codes(self, nom):
+        """Colonne catégorielle -> (codes numpy sans copie, -1 si absent ; libellés par code)."""
+        col = self._colonnes.get(nom)
+        if col is None:
+            return np.full(self._n, -1, dtype=np.int32), []
+        return np.frombuffer(col.valeurs, dtype=np.int32), col.categories
+
+    def dataframe(self):
+        """Vue DataFrame, reconstruite seulement après une modification. À ne pas modifier."""
+        if self._df is None:
+            with MESURES.chrono("dataframe.construction", lignes=self._n):
+                self._df = pd.DataFrame({nom: col.serie() for nom, col in self._colonnes.items() if not col.vide()},
+                                        index=pd.RangeIndex(self._n))
+        return self._df
+
+    def empreinte(self):
+        """Empreinte du contenu (clé des caches PDF, sauvegarde automatique)."""
+        if self._empreinte is None:
+            h = hashlib.blake2b(digest_size=16)
+            h.update(str(self._n).encode())
+            for nom, col in self._colonnes.items():
+                h.update(nom.encode("utf-8"))
+                if col.type == CATEGORIE:
+                    # Codes renumérotés par ordre d'apparition : même empreinte quel que soit
+                    # l'historique des libellés (lignes supprimées, projet rechargé...)
+                    codes = np.frombuffer(col.valeurs, dtype=np.int32)
+                    utilises, premiers, inverses = np.unique(codes, return_index=True, return_inverse=True)
+                    ordre = np.argsort(premiers)
+                    h.update(np.argsort(ordre).astype(np.int32)[inverses].tobytes())
+                    libelles = [col.categories[c] if c >= 0 else None for c in utilises[ordre]]
+                    h.update(json.dumps(libelles, ensure_ascii=False, default=str).encode("utf-8"))
+                elif col.type in _TYPECODES:
+                    h.update(col.valeurs.tobytes())
+                else:
+                    h.update(json.dumps([None if v is _ABSENT else v for v in col.valeurs], ensure_ascii=False, default=str).encode("utf-8"))
+            self._empreinte = h.hexdigest()
+        return self._empreinte
+
+    # --- Modification ---
+    def _modifiee(self):
+        self.version += 1
+        self._df = None
+        self._empreinte = None
+        for suivi in self._suivis:
+            suivi()
+
+    def _colonne_generique(self, nom):
+        col = self._colonnes[nom] = _Colonne(nom, TEXTE)
+        col.valeurs.extend([_ABSENT] * self._n)
+        return col
+
+    def append(self, ligne):
+        self.extend([ligne])
+
+    def extend(self, lignes):
+        lignes = list(lignes)
+        if not lignes:
+            return
+        for nom in {k for l in lignes for k in l}.difference(self._colonnes):
+            self._colonne_generique(nom)
+        for col in self._colonnes.values():
+            col.valeurs.extend([col.encoder(l.get(col.nom, _ABSENT)) for l in lignes])
+        self._n += len(lignes)
+        self._modifiee()
+
+    def __setitem__(self, i, ligne):
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        for nom in set(ligne).difference(self._colonnes):
+            self._colonne_generique(nom)
+        for col in self._colonnes.values():
+            col.valeurs[i] = col.encoder(ligne.get(col.nom, _ABSENT))
+        self._modifiee()
+
+    def __delitem__(self, i):
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        for col in self._colonnes.values():
+            del col.valeurs[i]
+        self._n -= 1
+        self._modifiee()
+
+    def clear(self):
+        version, suivis = self.version, self._suivis
+        self.__init__()
+        self.version, self._suivis = version, suivis
+        self._modifiee()
+
+    # --- Échange (fichiers projet) ---
+    def en_colonnes(self):
+        """{"colonnes", "valeurs", "n"} ; None pour un champ absent."""
+        colonnes = list(self._colonnes)
+        return {"colonnes": colonnes, "valeurs": [self.colonne(nom) for nom in colonnes], "n": self._n}
+
+    @classmethod
+    def depuis_colonnes(cls, bloc):
+        table = cls()
+        n = bloc.get("n", 0)
+        if n == 0:
+            return table
+        for nom, valeurs in zip(bloc["colonnes"], bloc["valeurs"]):
+            col = table._colonnes.get(nom) or _Colonne(nom, TEXTE)
+            table._colonnes[nom] = col
+            col.valeurs.extend([col.encoder(_ABSENT if v is None else v) for v in valeurs])
+        for col in table._colonnes.values():
+            if len(col.valeurs) < n:
+                col.valeurs.extend([col.encoder(_ABSENT)] * (n - len(col.valeurs)))
+        table._n = n
+        return table
+
+
+class CarnetCables(TableColonnes):
+    """projet["cables"]."""
+
+    SCHEMA = SCHEMA_CABLES
+
+
+class Circuits(TableColonnes):
+    """Circuits d'un tableau du bilan de puissance."""
+
+    SCHEMA = SCHEMA_CIRCUITS
+
+
+class ArbreTableaux(MutableMapping):
+    """Tableaux du bilan (nom -> Circuits) organisés en arbre, avec un Ks par tableau.
+
+    Puissance totale d'un tableau = ses circuits + la puissance d'appel de ses tableaux
+    aval ; puissance d'appel = totale x Ks. Ces totaux sont mis en cache : ajouter ou
+    retirer un circuit ne met à jour que le tableau et ses ancêtres (O(profondeur)).
+    Se manipule comme l'ancien dict `projet["tableaux"]` ; un tableau ajouté sans
+    précision est un départ direct de la source, avec Ks = 1.
+    """
+
+    def __init__(self, tableaux=(), parents=None, ks=None, arrivees=None):
+        self._circuits = {}
+        self._parents = {}
+        self._enfants = {}
+        self._ks = {}
+        self._arrivees = {}  # nom -> paramètres du câble d'arrivée différents d'ARRIVEE_DEFAUT
+        self._propre = {}   # nom -> [version des circuits, somme P.Abs]
+        self._total = {}
+        self._total_source = 0
+        self._version = 0
+        self._a_synchroniser = set()  # tableaux dont les circuits ont été modifiés sur leur table
+        for nom, circuits in dict(tableaux).items():
+            self._circuits[nom] = circuits if isinstance(circuits, Circuits) else Circuits(circuits)
+            self._suivre(nom)
+            self._parents[nom] = None
+            self._enfants[nom] = []
+            self._ks[nom] = float((ks or {}).get(nom, 1.0))
+            self._arrivees[nom] = dict((arrivees or {}).get(nom) or {})
+        for nom, parent in (parents or {}).items():
+            if parent is not None and nom in self._circuits and parent in self._circuits:
+                self._attacher(nom, parent)
+        self._recalculer()
+
+    @property
+    def version(self):
+        """Incrémentée à chaque modification, y compris des circuits modifiés sur leur table."""
+        self._synchroniser()
+        return self._version
+
+    # --- Structure ---
+    def __getitem__(self, nom):
+        return self._circuits[nom]
+
+    def __iter__(self):
+        return iter(self._circuits)
+
+    def __len__(self):
+        return len(self._circuits)
+
+    def __repr__(self):
+        return f"ArbreTableaux({len(self)} tableaux)"
+
+    def __setitem__(self, nom, circuits):
+        if nom in self._circuits:
+            self._ne_plus_suivre(nom)
+            self._circuits[nom] = circuits if isinstance(circuits, Circuits) else Circuits(circuits)
+            self._suivre(nom)
+            self._propre[nom][0] = None
+            self._a_synchroniser.add(nom)
+            self._synchroniser()
+        else:
+            self.ajouter_tableau(nom, circuits=circuits)
+
+    def ajouter_tableau(self, nom, parent=None, ks=1.0, circuits=()):
+        if nom in self._circuits:
+            raise ValueError(f"Le tableau '{nom}' existe déjà.")
+        if parent is not None and parent not in self._circuits:
+            raise KeyError(parent)
+        self._circuits[nom] = circuits if isinstance(circuits, Circuits) else Circuits(circuits)
+        self._suivre(nom)
+        self._parents[nom] = None
+        self._enfants[nom] = []
+        self._ks[nom] = float(ks)
+        self._arrivees[nom] = {}
+        self._propre[nom] = [self._circuits[nom].version, self._somme(nom)]
+        self._total[nom] = self._propre[nom][1]
+        self._total_source += self._appel(nom)
+        self._version += 1
+        if parent is not None:
+            self.deplacer(nom, parent)
+
+    def __delitem__(self, nom):
+        """Supprime un tableau ; ses tableaux aval sont rattachés à son amont."""
+        self._synchroniser()
+        parent = self._parents[nom]
+        for enfant in list(self._enfants[nom]):
+            self.deplacer(enfant, parent)
+        self._propager(nom, -self._total[nom])
+        self._detacher(nom)
+        self._ne_plus_suivre(nom)
+        for dico in (self._circuits, self._parents, self._enfants, self._ks, self._arrivees, self._propre, self._total):
+            del dico[nom]
+        self._version += 1
+
+    def _suivre(self, nom):
+        self._circuits[nom]._suivis.append(partial(self._a_synchroniser.add, nom))
+
+    def _ne_plus_suivre(self, nom):
+        circuits = self._circuits[nom]
+        circuits._suivis = [s for s in circuits._suivis if getattr(s, "func", None) != self._a_synchroniser.add]
+
+    def _attacher(self, nom, parent):
+        # Tableaux aval rangés dans leur ordre de création : même arborescence après rechargement
+        self._parents[nom] = parent
+        rang = {t: i for i, t in enumerate(self._circuits)}
+        self._enfants[parent].append(nom)
+        self._enfants[parent].sort(key=rang.__getitem__)
+
+    def _detacher(self, nom):
+        parent = self._parents[nom]
+        if parent is not None:
+            self._enfants[parent].remove(nom)
+        self._parents[nom] = None
+
+    def deplacer(self, nom, parent):
+        """Rattache un tableau (et tout son aval) à un autre tableau amont, ou à la source (None)."""
+        if parent is not None and (parent == nom or nom in self.ancetres(parent)):
+            raise ValueError(f"'{parent}' est en aval de '{nom}' : boucle impossible.")
+        if parent == self._parents[nom]:
+            return
+        self._synchroniser()
+        appel = self._appel(nom)
+        self._propager_appel(self._parents[nom], -appel)
+        self._detacher(nom)
+        if parent is not None:
+            self._attacher(nom, parent)
+        self._propager_appel(parent, appel)
+        self._version += 1
+
+    def parent(self, nom):
+        return self._parents[nom]
+
+    def enfants(self, nom):
+        return list(self._enfants[nom])
+
+    def racines(self):
+        return [nom for nom, parent in self._parents.items() if parent is None]
+
+    def ancetres(self, nom):
+        chemin = []
+        nom = self._parents[nom]
+        while nom is not None:
+            chemin.append(nom)
+            nom = self._parents[nom]
+        return chemin
+
+    def parcours(self):
+        """[(nom, niveau)] en profondeur d'abord, de la source vers l'aval."""
+        ordre, pile = [], [(nom, 0) for nom in reversed(self.racines())]
+        while pile:
+            nom, niveau = pile.pop()
+            ordre.append((nom, niveau))
+            pile.extend((enfant, niveau + 1) for enfant in reversed(self._enfants[nom]))
+        return ordre
+
+    # --- Puissances ---
+    def _somme(self, nom):
+        return sum(self._circuits[nom].colonne("P.Abs(W)", 0))
+
+    def _appel(self, nom, total=None):
+        total = self._total[nom] if total is None else total
+        ks = self._ks[nom]
+        return total if ks == 1.0 else total * ks
+
+    def _propager(self, nom, delta):
+        """Ajoute `delta` à la puissance totale de `nom`, puis remonte l'écart d'appel vers la source."""
+        while delta:
+            self._total[nom] += delta
+            delta = self._appel(nom, delta)
+            nom = self._parents[nom]
+            if nom is None:
+                self._total_source += delta
+                return
+
+    def _propager_appel(self, parent, delta):
+        if parent is None:
+            self._total_source += delta
+        else:
+            self._propager(parent, delta)
+
+    def _recalculer(self):
+        """Recalcul complet (chargement d'un projet)."""
+        self._total_source = 0
+        for nom, _ in reversed(self.parcours()):
+            self._propre[nom] = [self._circuits[nom].version, self._somme(nom)]
+            self._total[nom] = self._propre[nom][1] + sum(self._appel(e) for e in self._enfants[nom])
+        self._total_source = sum(self._appel(r) for r in self.racines())
+        self._version += 1
+
+    def _synchroniser(self):
+        """Prend en compte les circuits modifiés directement sur leur table (append, del...).
+
+        Seuls les tableaux signalés par leur table sont relus : O(1) quand rien n'a changé.
+        """
+        while self._a_synchroniser:
+            nom = self._a_synchroniser.pop()
+            circuits, propre = self._circuits[nom], self._propre[nom]
+            if propre[0] != circuits.version:
+                somme = self._somme(nom)
+                delta, propre[:] = somme - propre[1], [circuits.version, somme]
+                self._propager(nom, delta)
+                self._version += 1
+
+    def ajouter_circuit(self, nom, circuit):
+        circuits = self._circuits[nom]
+        self._synchroniser()
+        circuits.append(circuit)
+        self._a_synchroniser.discard(nom)
+        self._propre[nom] = [circuits.version, self._propre[nom][1] + circuit.get("P.Abs(W)", 0)]
+        self._propager(nom, circuit.get("P.Abs(W)", 0))
+        self._version += 1
+
+    def supprimer_circuit(self, nom, indice):
+        circuits = self._circuits[nom]
+        self._synchroniser()
+        p_abs = circuits[indice].get("P.Abs(W)", 0)
+        del circuits[indice]
+        self._a_synchroniser.discard(nom)
+        self._propre[nom] = [circuits.version, self._propre[nom][1] - p_abs]
+        self._propager(nom, -p_abs)
+        self._version += 1
+
+    def ks(self, nom):
+        return self._ks[nom]
+
+    def definir_ks(self, nom, ks):
+        self._synchroniser()
+        ancien = self._appel(nom)
+        self._ks[nom] = float(ks)
+        self._propager_appel(self._parents[nom], self._appel(nom) - ancien)
+        self._version += 1
+
+    def arrivee(self, nom):
+        """Paramètres du câble d'arrivée du tableau (clés d'ARRIVEE_DEFAUT)."""
+        return {**ARRIVEE_DEFAUT, **self._arrivees[nom]}
+
+    def arrivee_modifiee(self, nom):
+        """Paramètres différents des valeurs par défaut (ceux enregistrés dans le fichier projet)."""
+        return dict(self._arrivees[nom])
+
+    def definir_arrivee(self, nom, **parametres):
+        inconnus = set(parametres).difference(ARRIVEE_DEFAUT)
+        if inconnus:
+            raise KeyError(", ".join(sorted(inconnus)))
+        arrivee = self._arrivees[nom]
+        for cle, valeur in parametres.items():
+            if valeur == ARRIVEE_DEFAUT[cle]:
+                arrivee.pop(cle, None)
+            else:
+                arrivee[cle] = valeur
+        self._version += 1
+
+    def puissance_propre(self, nom):
+        """Puissance absorbée par les circuits du tableau seul (W)."""
+        self._synchroniser()
+        return self._propre[nom][1]
+
+    def puissance_totale(self, nom=None):
+        """Puissance absorbée d'un tableau avec son aval, ou de toute l'installation (nom=None)."""
+        self._synchroniser()
+        return self._total_source if nom is None else self._total[nom]
+
+    def puissance_appel(self, nom):
+        self._synchroniser()
+        return self._appel(nom)
+
+    def puissances_appel(self):
+        """{tableau: puissance d'appel} pour tout l'arbre, en une seule synchronisation."""
+        self._synchroniser()
+        return {nom: self._appel(nom) for nom in self._circuits}
+
+    def empreinte(self):
+        h = hashlib.blake2b(digest_size=16)
+        for nom, circuits in self._circuits.items():
+            h.update(json.dumps([nom, self._parents[nom], self._ks[nom], self._arrivees[nom], circuits.empreinte()],
+                                sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        return h.hexdigest()
+
+
+def normaliser_projet(projet):
+    """Complète un projet chargé et range câbles et circuits dans les tables en colonnes."""
+    projet.setdefault("cables", [])
+    projet.setdefault("tableaux", {})
+    projet.setdefault("ks_global", 0.8)
+    projet.setdefault("source", dict(SOURCE_DEFAUT))
+    if not isinstance(projet["cables"], CarnetCables):
+        projet["cables"] = CarnetCables(projet["cables"])
+    if not isinstance(projet["tableaux"], ArbreTableaux):
+        projet["tableaux"] = ArbreTableaux(projet["tableaux"])
+    return projet
+
+
+def nouveau_projet(nom="Chantier Résidentiel"):
+    return {"info": {"nom": nom}, "cables": CarnetCables(), "tableaux": ArbreTableaux(), "ks_global": 0.8,
+            "source": dict(SOURCE_DEFAUT)}
@@ -0,0 +1,213 @@
+"""Dimensionnement des lignes selon la NF C 15-100 (Ib, In, section, Iz, chute de tension).
+
+Le moteur travaille sur un tableau de circuits et calcule toutes les lignes en une
+seule passe vectorisée ; le formulaire "Calculer et Mémoriser" n'est qu'un lot d'une ligne.
+Les résultats sont mémorisés par jeu de paramètres normalisés dans un cache LRU borné,
+partagé par toutes les sessions du processus : imports en masse et redimensionnements
+répétés ne recalculent que les combinaisons jamais vues.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from fcelec.mesures import mesure
+from fcelec.tables_iz import METHODES_POSE, TABLE_IZ
+
+# --- DONNÉES NORMATIVES ---
+CALIBRES = [10, 16, 20, 25, 32, 40, 50, 63, 80, 100, 125, 160, 200, 250, 400, 630, 800, 1000]
+SECTIONS = list(TABLE_IZ.sections)
+LETTRES_POSE = list(TABLE_IZ.lettres_pose)
+
+_CALIBRES = np.array(CALIBRES, dtype=float)
+_SECTIONS = np.array(SECTIONS, dtype=float)
+
+COLONNES_ENTREE = ["Tension", "P(W)", "Long.(m)", "Métal", "Pose", "Cos φ", "dU max(%)"]
+# Colonne optionnelle : produit des facteurs de correction k1*k2*k3 (1.0 si absente)
+COLONNE_K = "K correction"
+COLONNES_SORTIE = ["Ib(A)", "Calibre(A)", "Iz(A)", "Section(mm2)", "dU(%)"]
+
+# Paramètres normalisés d'un circuit (clé du cache) : booléens, indices et réels exacts.
+# Pas d'arrondi : le calcul part de la clé, il doit rester celui du formulaire au bit près.
+_CLE = np.dtype([("mono", "?"), ("alu", "?"), ("pose", "i2"), ("p_w", "f8"), ("longueur", "f8"),
+                 ("cos_phi", "f8"), ("du_max", "f8"), ("k", "f8")])
+TAILLE_MEMO = int(os.environ.get("FCELEC_MEMO_TAILLE", 100_000))
+
+
+class _MemoLRU:
+    """Résultats par clé normalisée, les moins récemment utilisés évincés au-delà de `taille`."""
+
+    def __init__(self, taille):
+        self.taille = taille
+        self._entrees = OrderedDict()
+        self._verrou = threading.Lock()
+        self.succes = 0
+        self.echecs = 0
+
+    def chercher(self, cles):
+        """[résultat ou None] pour chaque clé ; met à jour l'ordre d'usage et les compteurs."""
+        with self._verrou:
+            resultats = []
+            for cle in cles:
+                valeur = self._entrees.get(cle)
+                if valeur is not None:
+                    self._entrees.move_to_end(cle)
+                resultats.append(valeur)
+            trouves = sum(r is not None for r in resultats)
+            self.succes += trouves
+            self.echecs += len(resultats) - trouves
+            return resultats
+
+    def ranger(self, cles, valeurs):
+        with self._verrou:
+            self._entrees.update(zip(cles, valeurs))
+            while len(self._entrees) > self.taille:
+                self._entrees.popitem(last=False)
+
+    def vider(self):
+        with self._verrou:
+            self._entrees.clear()
+            self.succes = self.echecs = 0
+
+    def statistiques(self):
+        with self._verrou:
+            total = self.succes + self.echecs
+            return {"entrees": len(self._entrees), "taille": self.taille, "succes": self.succes,
+                    "echecs": self.echecs, "taux": self.succes / total if total else 0.0}
+
+
+MEMO = _MemoLRU(TAILLE_MEMO)
+
+
+def du_max_application(type_charge):
+    """Chute de tension admissible (%) selon le type d'application du formulaire."""
+    if "3%" in type_charge: return 3.0
+    elif "2%" in type_charge: return 2.0
+    else: return 5.0
+
+
+def lettre_pose(methode_pose):
+    """'Méthode B (Sous conduit...)' -> 'B' ; une lettre seule est renvoyée telle quelle."""
+    methode_pose = str(methode_pose).strip()
+    if methode_pose.startswith("Méthode ") and len(methode_pose.split(" ")) > 1:
+        return methode_pose.split(" ")[1]
+    return methode_pose
+
+
+def _indices_pose(poses):
+    # Conversion faite une fois par libellé distinct
+    codes, libelles = pd.factorize(pd.Series(poses).astype(str))
+    lettres = pd.Series(libelles).map(lettre_pose)
+    idx = lettres.map({l: i for i, l in enumerate(LETTRES_POSE)})
+    if idx.isna().any():
+        inconnues = sorted(set(lettres[idx.isna()]))
+        raise ValueError(f"Méthode de pose inconnue : {', '.join(inconnues)}")
+    return idx.to_numpy(dtype=int)[codes]
+
+
+def _normaliser(circuits):
+    """DataFrame de circuits -> tableau structuré de clés (_CLE)."""
+    cles = np.empty(len(circuits), dtype=_CLE)
+    cles["mono"] = circuits["Tension"].astype(str).str.contains("230V").to_numpy()
+    cles["alu"] = circuits["Métal"].astype(str).str.contains("Aluminium").to_numpy()
+    cles["pose"] = _indices_pose(circuits["Pose"])
+    cles["p_w"] = circuits["P(W)"].to_numpy(dtype=float)
+    cles["longueur"] = circuits["Long.(m)"].to_numpy(dtype=float)
+    cles["cos_phi"] = circuits["Cos φ"].to_numpy(dtype=float)
+    cles["du_max"] = circuits["dU max(%)"].to_numpy(dtype=float)
+    cles["k"] = circuits[COLONNE_K].to_numpy(dtype=float) if COLONNE_K in circuits else 1.0
+    return cles
+
+
+def _calculer(cles):
+    """Calcul vectorisé sur des clés normalisées -> (Ib, indice calibre, Iz, indice section, dU %)."""
+    mono, alu, pose = cles["mono"], cles["alu"], cles["pose"].astype(int)
+    p_w, longueur, cos_phi, du_max, k = cles["p_w"], cles["longueur"], cles["cos_phi"], cles["du_max"], cles["k"]
+
+    V = np.where(mono, 230.0, 400.0)
+    rho = np.where(alu, 0.036, 0.0225)
+    b = np.where(mono, 2.0, 1.0)
+
+    Ib = np.where(mono, p_w / (V * cos_phi), p_w / (V * np.sqrt(3) * cos_phi))
+    i_in = np.minimum(np.searchsorted(_CALIBRES, Ib, side="left"), len(CALIBRES) - 1)
+    In = _CALIBRES[i_in]
+
+    S_calc_du = (b * rho * longueur * Ib) / ((du_max / 100) * V)
+    i_du = np.minimum(np.searchsorted(_SECTIONS, S_calc_du, side="left"), len(SECTIONS) - 1)
+
+    # Plus petite section dont l'Iz corrigé couvre In (recherche dichotomique dans l'abaque)
+    i_metal = alu.astype(int)
+    i_ph = mono.astype(int)
+    i_iz = TABLE_IZ.indice_section_min(pose, i_metal, i_ph, In, k)
+
+    i_ret = np.maximum(i_du, i_iz)
+    S_ret = _SECTIONS[i_ret]
+    Iz_reel = TABLE_IZ.iz(pose, i_metal, i_ph, i_ret, k)
+    du_reel_pct = (((b * rho * longueur * Ib) / S_ret) / V) * 100
+    return Ib, i_in, Iz_reel, i_ret, du_reel_pct
+
+
+@mesure("cables.dimensionner_lot")
+def dimensionner_lot(circuits, memo=True):
+    """Dimensionne tous les circuits d'un DataFrame (colonnes COLONNES_ENTREE, COLONNE_K en option).
+
+    Renvoie un DataFrame de même index avec les colonnes COLONNES_SORTIE, identique
+    au calcul historique ligne par ligne du formulaire. Avec `memo`, les circuits identiques
+    du lot ne sont calculés qu'une fois et les combinaisons déjà vues sont lues dans MEMO.
+    """
+    cles = _normaliser(circuits)
+    if memo and len(cles):
+        # Dédoublonnage sur les octets des clés (plus rapide que le tri d'un tableau structuré)
+        _, premiers, inverse = np.unique(cles.view(f"V{_CLE.itemsize}"), return_index=True, return_inverse=True)
+        uniques = cles[premiers]
+        cles_memo = uniques.tolist()
+        trouves = MEMO.chercher(cles_memo)
+        manquants = [i for i, r in enumerate(trouves) if r is None]
+        if manquants:
+            calcules = list(zip(*(np.asarray(c).tolist() for c in _calculer(uniques[manquants]))))
+            MEMO.ranger([cles_memo[i] for i in manquants], calcules)
+            for i, resultat in zip(manquants, calcules):
+                trouves[i] = resultat
+        Ib, i_in, Iz_reel, i_ret, du_reel_pct = (np.array(c)[inverse.ravel()] for c in zip(*trouves))
+    else:
+        Ib, i_in, Iz_reel, i_ret, du_reel_pct = _calculer(cles)
+
+    return pd.DataFrame({
+        "Ib(A)": Ib,
+        "Calibre(A)": np.array(CALIBRES)[i_in],
+        "Iz(A)": Iz_reel,
+        "Section(mm2)": _SECTIONS[i_ret],
+        "dU(%)": du_reel_pct,
+        "_i_section": i_ret,
+        "_i_calibre": i_in,
+    }, index=circuits.index)
+
+
+def enregistrements(circuits, resultats):
+    """Met les résultats au format des lignes de projet["cables"] (mêmes arrondis et types que le formulaire)."""
+    lignes = []
+    for circ, res in zip(circuits.to_dict("records"), resultats.to_dict("records")):
+        lignes.append({
+            "Tableau": circ.get("Tableau", "TGBT"), "Repère": circ.get("Repère", ""),
+            "Type Câble": circ.get("Type Câble", "U1000 R2V / RO2V (PR)"), "Métal": circ["Métal"],
+            "Pose": lettre_pose(circ["Pose"]), "Tension": circ["Tension"], "P(W)": circ["P(W)"], "Long.(m)": circ["Long.(m)"],
+            "Ib(A)": round(res["Ib(A)"], 1), "Calibre(A)": CALIBRES[res["_i_calibre"]], "Iz(A)": round(res["Iz(A)"], 1),
+            "Section(mm2)": SECTIONS[res["_i_section"]], "dU(%)": round(res["dU(%)"], 2)
+        })
+    return lignes
+
+
+def dimensionner_cable(tension, p_w, longueur, nature, methode_pose, cos_phi, type_charge,
+                       nom_tableau="TGBT", repere="", type_cable="U1000 R2V / RO2V (PR)", k=1.0):
+    """Dimensionne un circuit unique et renvoie la ligne à mémoriser dans le carnet.
+
+    `k` : produit des facteurs de correction (tables_iz.facteur_correction), 1.0 aux conditions de référence.
+    """
+    circuit = pd.DataFrame([{
+        "Tableau": nom_tableau, "Repère": repere, "Type Câble": type_cable,
+        "Tension": tension, "P(W)": p_w, "Long.(m)": longueur, "Métal": nature,
+        "Pose": methode_pose, "Cos φ": cos_phi, "dU max(%)": du_max_application(type_charge), COLONNE_K: k,
+    }])
+    return enregistrements(circuit, dimensionner_lot(circuit))[0]
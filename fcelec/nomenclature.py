@@ -0,0 +1,169 @@
+"""Nomenclature du devis : quantités par (Catégorie, Désignation, Unité), tenues à jour par source.
+
+Chaque source (le carnet de câbles, chaque tableau du bilan) garde sa contribution et la
+version de sa table ; seules les sources modifiées depuis le dernier passage sont
+recomptées, puis leur écart est reporté dans l'index. Les prix saisis dans le devis
+sont gardés par clé et survivent aux changements de la liste.
+"""
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+COLONNES_DEVIS = ["Catégorie", "Désignation", "Unité", "Quantité", "Prix Unitaire HT"]
+DESIGNATION_CABLE = r"^Câble (?P<metal>\S+) (?P<type_cable>.+) - (?P<section>[\d.]+) mm2$"
+DESIGNATION_DISJONCTEUR = r"^Disjoncteur .* (?P<calibre>\d+)A$"
+PRIX_CABLE = 15.0
+PRIX_DISJONCTEUR_TGBT = 80.0
+PRIX_DISJONCTEUR_MODULAIRE = 65.0
+
+
+def _libelle_section(section):
+    return int(section) if float(section).is_integer() else section
+
+
+def contribution_cables(carnet):
+    """{(catégorie, désignation, unité): [quantité, nb de lignes, prix par défaut]} du carnet de câbles."""
+    contribution = {}
+    if not len(carnet):
+        return contribution
+    codes_metal, metaux = carnet.codes("Métal")
+    codes_type, types = carnet.codes("Type Câble")
+    natures = np.array([*metaux, "Cuivre"], dtype=object)  # dernier : métal absent (code -1)
+    types_courts = np.array([*(t.split(" (")[0] for t in types), "U1000 R2V"], dtype=object)
+    sections = carnet.numpy("Section(mm2)")
+    longueurs = carnet.numpy("Long.(m)")
+    # Câbles : longueurs cumulées par (métal, type, section)
+    avec_section = ~np.isnan(sections)
+    cles = pd.DataFrame({"metal": codes_metal[avec_section], "type": codes_type[avec_section],
+                         "section": sections[avec_section], "long": longueurs[avec_section]})
+    for (metal, type_c, section), groupe in cles.groupby(["metal", "type", "section"], sort=False)["long"]:
+        designation = f"Câble {natures[metal]} {types_courts[type_c]} - {_libelle_section(section)} mm2"
+        # Deux libellés de type peuvent donner la même désignation courte
+        ligne = contribution.setdefault(("Câble", designation, "m"), [0.0, 0, PRIX_CABLE])
+        ligne[0] += float(groupe.sum())
+        ligne[1] += len(groupe)
+    # Protections : un disjoncteur par ligne
+    calibres = carnet.numpy("Calibre(A)")
+    calibres, nombres = np.unique(calibres[calibres != np.iinfo(np.int64).min], return_counts=True)
+    for calibre, nombre in zip(calibres.tolist(), nombres.tolist()):
+        contribution[("Protection", f"Disjoncteur TGBT {calibre}A", "U")] = [nombre, nombre, PRIX_DISJONCTEUR_TGBT]
+    return contribution
+
+
+def contribution_circuits(circuits):
+    """Disjoncteurs modulaires estimés d'un tableau du bilan (calibre selon la puissance du circuit)."""
+    p_w = np.array(circuits.colonne("P(W)", 0.0), dtype=float)
+    calibres = np.where(p_w <= 3500, 16, np.where(p_w <= 4500, 20, 32))
+    calibres, nombres = np.unique(calibres, return_counts=True)
+    return {("Protection", f"Disjoncteur Modulaire {calibre}A", "U"): [nombre, nombre, PRIX_DISJONCTEUR_MODULAIRE]
+            for calibre, nombre in zip(calibres.tolist(), nombres.tolist())}
+
+
+def attributs_devis(devis):
+    """DataFrame métal, type court, section (câbles) et calibre (disjoncteurs) lus dans les désignations."""
+    designations = devis["Désignation"].astype(str)
+    attributs = designations.str.extract(DESIGNATION_CABLE)
+    attributs["section"] = pd.to_numeric(attributs["section"])
+    attributs["calibre"] = pd.to_numeric(designations.str.extract(DESIGNATION_DISJONCTEUR)["calibre"])
+    return attributs
+
+
+def devis_xlsx(devis):
+    """Classeur XLSX du devis (feuille Chiffrage_FCELEC)."""
+    sortie = BytesIO()
+    with pd.ExcelWriter(sortie, engine="openpyxl") as classeur:
+        devis.to_excel(classeur, index=False, sheet_name="Chiffrage_FCELEC")
+    return sortie.getvalue()
+
+
+class IndexNomenclature:
+    """Quantités et prix du devis d'un projet, mis à jour source par source."""
+
+    def __init__(self):
+        self._lignes = {}       # clé -> [quantité, nb de lignes, prix par défaut]
+        self._sources = {}      # source -> (version, contribution)
+        self._prix_saisis = {}  # clé -> prix unitaire saisi dans le devis
+        self._table = None
+        self._catalogue, self._generation = None, None
+        self.version_structure = 0  # change quand des clés apparaissent ou disparaissent
+        self.sources_recomptees = []
+
+    def __len__(self):
+        return len(self._lignes)
+
+    def _reporter(self, contribution, signe):
+        for cle, (quantite, nombre, prix) in contribution.items():
+            ligne = self._lignes.get(cle)
+            if ligne is None:
+                ligne = self._lignes[cle] = [0.0, 0, prix]
+                self.version_structure += 1
+            ligne[0] += signe * quantite
+            ligne[1] += signe * nombre
+            if ligne[1] == 0:
+                del self._lignes[cle]
+                self.version_structure += 1
+
+    def _remplacer(self, source, version, calcul):
+        ancienne = self._sources.get(source)
+        if ancienne is not None and ancienne[0] == version:
+            return False
+        nouvelle = calcul()
+        if ancienne is not None:
+            self._reporter(ancienne[1], -1)
+        self._reporter(nouvelle, 1)
+        self._sources[source] = (version, nouvelle)
+        self.sources_recomptees.append(source)
+        return True
+
+    def mettre_a_jour(self, projet):
+        """Recompte les sources modifiées ; renvoie vrai si le devis a changé."""
+        self.sources_recomptees = []
+        carnet = projet["cables"]
+        self._remplacer("cables", (id(carnet), carnet.version), lambda: contribution_cables(carnet))
+        tableaux = projet["tableaux"]
+        for nom, circuits in tableaux.items():
+            self._remplacer(("tableau", nom), (id(circuits), circuits.version), lambda: contribution_circuits(circuits))
+        for source in [s for s in self._sources if s != "cables" and s[1] not in tableaux]:
+            self._reporter(self._sources.pop(source)[1], -1)
+            self.sources_recomptees.append(source)
+        if self.sources_recomptees:
+            self._table = None
+        return bool(self.sources_recomptees)
+
+    def definir_catalogue(self, catalogue):
+        """Catalogue de prix fournisseurs (CataloguePrix) consulté avant les prix par défaut."""
+        if catalogue is not self._catalogue:
+            self._catalogue, self._table = catalogue, None
+
+    def table(self):
+        """DataFrame du devis (COLONNES_DEVIS) trié par clé. À ne pas modifier.
+
+        Prix : saisi dans le devis, sinon catalogue fournisseurs, sinon prix par défaut.
+        """
+        generation = self._catalogue.generation() if self._catalogue is not None else None
+        if self._table is None or generation != self._generation:
+            cles = sorted(self._lignes)
+            table = pd.DataFrame([(*cle, round(self._lignes[cle][0], 6), self._lignes[cle][2]) for cle in cles],
+                                 columns=COLONNES_DEVIS)
+            if self._catalogue is not None and len(table):
+                table["Prix Unitaire HT"] = self._catalogue.tarifer(table).fillna(table["Prix Unitaire HT"])
+            if self._prix_saisis:
+                saisis = pd.Series([self._prix_saisis.get(cle) for cle in cles], index=table.index, dtype=float)
+                table["Prix Unitaire HT"] = saisis.fillna(table["Prix Unitaire HT"])
+            self._table, self._generation = table, generation
+        return self._table
+
+    def saisir_prix(self, table_editee):
+        """Garde les prix unitaires modifiés dans l'éditeur du devis ; renvoie le nombre de prix changés."""
+        reference = self.table()
+        modifies = table_editee["Prix Unitaire HT"].to_numpy() != reference["Prix Unitaire HT"].to_numpy()
+        for _, ligne in table_editee[modifies].iterrows():
+            self._prix_saisis[(ligne["Catégorie"], ligne["Désignation"], ligne["Unité"])] = float(ligne["Prix Unitaire HT"])
+        if modifies.any():
+            self._table = None
+        return int(modifies.sum())
+
+    def prix_saisis(self):
+        """{désignation: prix unitaire} des prix modifiés dans le devis."""
+        return {cle[1]: prix for cle, prix in self._prix_saisis.items()}
@@ -0,0 +1,125 @@
+"""Section économique des câbles : investissement + pertes Joule sur la durée de vie.
+
+La section réglementaire (Iz et chute de tension) est la plus petite admissible ; une section
+supérieure coûte plus cher à l'achat mais réduit les pertes. Pour chaque câble du carnet,
+toutes les sections normalisées sont évaluées en une passe vectorisée (câbles x sections)
+et la section de coût global actualisé minimal est retenue.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from fcelec.arrivees import PREFIXE_REPERE
+from fcelec.moteur_cables import SECTIONS, _indices_pose
+from fcelec.nomenclature import DESIGNATION_CABLE
+from fcelec.tables_iz import TABLE_IZ
+
+_SECTIONS = np.array(SECTIONS, dtype=float)
+# Prix de référence (MAD HT / m) d'un câble U1000 R2V cuivre, par section ; aluminium : x 0,45
+PRIX_CUIVRE = (8, 12, 18, 25, 40, 60, 95, 130, 180, 250, 340, 430, 530, 650, 850, 1060)
+RAPPORT_PRIX_ALU = 0.45
+_PRIX_REFERENCE = np.array([PRIX_CUIVRE, [p * RAPPORT_PRIX_ALU for p in PRIX_CUIVRE]], dtype=float)
+# Résistivités en service (ohm.mm²/m), comme pour la chute de tension
+RHO_SERVICE = (0.0225, 0.036)
+
+PARAMETRES_DEFAUT = {"tarif": 1.2, "heures": 2000.0, "duree": 20, "taux": 5.0}
+_DESIGNATION_CABLE = re.compile(DESIGNATION_CABLE)
+
+
+def prix_depuis_devis(prix_designations):
+    """{désignation du devis: prix/m} -> {(métal, type de câble, section): prix/m} pour les câbles."""
+    prix = {}
+    for designation, valeur in prix_designations.items():
+        m = _DESIGNATION_CABLE.match(designation)
+        if m:
+            prix[(m.group(1), m.group(2), float(m.group(3)))] = float(valeur)
+    return prix
+
+
+def facteur_actualisation(duree, taux):
+    """Somme des 1/(1+a)^t sur la durée de vie : 1 MAD/an -> valeur actuelle."""
+    a = taux / 100
+    return float(duree) if a == 0 else (1 - (1 + a) ** -duree) / a
+
+
+def optimiser_sections(carnet, tarif=1.2, heures=2000.0, duree=20, taux=5.0, prix=None):
+    """Section de coût global minimal pour chaque câble du carnet.
+
+    `tarif` en MAD/kWh, `heures` d'utilisation par an à Ib, `duree` en années, `taux`
+    d'actualisation en %. `prix` : {(métal, type, section): prix/m} venant du catalogue fournisseurs
+    et du devis (module 4), prioritaire sur les prix de référence. Renvoie un DataFrame d'une ligne par câble,
+    indexé par sa position dans le carnet. Les arrivées de tableaux ("Arrivée …") sont exclues : elles sont
+    redimensionnées depuis le bilan à chaque recalcul, une section optimisée n'y tiendrait pas.
+    """
+    df = carnet.dataframe()
+    if "Repère" in df:
+        df = df[~df["Repère"].astype(str).str.startswith(PREFIXE_REPERE)]
+    n = len(df)
+    if n == 0:
+        return pd.DataFrame()
+    longueurs = df["Long.(m)"].to_numpy(dtype=float)
+    ib = df["Ib(A)"].to_numpy(dtype=float)
+    alu = df["Métal"].astype(str).str.contains("Aluminium").to_numpy()
+    mono = df["Tension"].astype(str).str.contains("230V").to_numpy()
+    i_legal = np.minimum(np.searchsorted(_SECTIONS, df["Section(mm2)"].to_numpy(dtype=float), side="left"), len(SECTIONS) - 1)
+
+    # Prix par câble et par section (n x 16) : référence, puis prix du devis pour le même câble
+    prix_m = _PRIX_REFERENCE[alu.astype(int)]
+    if prix:
+        types = df["Type Câble"].astype(str).str.split(" (", regex=False).str[0] if "Type Câble" in df else pd.Series("", index=df.index)
+        metaux = df["Métal"].astype(str)
+        for (metal, type_cable, section), valeur in prix.items():
+            j = np.searchsorted(_SECTIONS, section)
+            if j < len(SECTIONS) and _SECTIONS[j] == section:
+                prix_m[((metaux == metal) & (types == type_cable)).to_numpy(), j] = valeur
+
+    # Pertes Joule (W) par section : conducteurs chargés x rho x L x Ib² / S
+    rho = np.where(alu, RHO_SERVICE[1], RHO_SERVICE[0])
+    conducteurs = np.where(mono, 2.0, 3.0)
+    pertes = (conducteurs * rho * longueurs * ib ** 2)[:, None] / _SECTIONS[None, :]
+    energie = pertes * heures / 1000  # kWh/an
+    investissement = prix_m * longueurs[:, None]
+    cout = investissement + energie * tarif * facteur_actualisation(duree, taux)
+    cout[np.arange(len(SECTIONS))[None, :] < i_legal[:, None]] = np.inf  # sections non admissibles
+    i_opt = np.argmin(cout, axis=1)
+
+    lignes = np.arange(n)
+    du_section = df["dU(%)"].to_numpy(dtype=float) * _SECTIONS[i_legal]  # dU x S constant pour un câble
+    return pd.DataFrame({
+        "Tableau": df["Tableau"].to_numpy() if "Tableau" in df else "",
+        "Repère": df["Repère"].to_numpy() if "Repère" in df else "",
+        "Section légale(mm2)": _SECTIONS[i_legal],
+        "Section optimale(mm2)": _SECTIONS[i_opt],
+        "Coût légal(MAD)": np.round(cout[lignes, i_legal], 2),
+        "Coût optimal(MAD)": np.round(cout[lignes, i_opt], 2),
+        "Gain(MAD)": np.round(cout[lignes, i_legal] - cout[lignes, i_opt], 2),
+        "Pertes légales(kWh/an)": np.round(energie[lignes, i_legal], 1),
+        "Pertes optimales(kWh/an)": np.round(energie[lignes, i_opt], 1),
+        "dU optimale(%)": np.round(du_section / _SECTIONS[i_opt], 2),
+        "_i_section": i_opt,
+    }, index=df.index)
+
+
+def appliquer_sections(carnet, resultats):
+    """Remplace dans le carnet les sections légales par les sections optimales ; renvoie le nombre de câbles modifiés.
+
+    Iz et dU sont mis à l'échelle de la nouvelle section (facteurs de correction conservés).
+    """
+    a_modifier = np.flatnonzero(resultats["Section optimale(mm2)"].to_numpy() != resultats["Section légale(mm2)"].to_numpy())
+    if not len(a_modifier):
+        return 0
+    positions = resultats.index.to_numpy()[a_modifier]
+    df = carnet.dataframe().iloc[positions]
+    i_pose = _indices_pose(df["Pose"].astype(str))
+    i_metal = df["Métal"].astype(str).str.contains("Aluminium").to_numpy().astype(int)
+    i_phases = df["Tension"].astype(str).str.contains("230V").to_numpy().astype(int)
+    i_ancien = np.searchsorted(_SECTIONS, resultats["Section légale(mm2)"].to_numpy()[a_modifier])
+    i_nouveau = resultats["_i_section"].to_numpy()[a_modifier]
+    iz = df["Iz(A)"].to_numpy(dtype=float) * TABLE_IZ.iz(i_pose, i_metal, i_phases, i_nouveau) / TABLE_IZ.iz(i_pose, i_metal, i_phases, i_ancien)
+    du = resultats["dU optimale(%)"].to_numpy()[a_modifier]
+    for k, i in enumerate(positions):
+        ligne = carnet[int(i)]
+        ligne.update({"Section(mm2)": SECTIONS[i_nouveau[k]], "Iz(A)": round(float(iz[k]), 1), "dU(%)": float(du[k])})
+        carnet[int(i)] = ligne
+    return len(a_modifier)
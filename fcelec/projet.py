@@ -0,0 +1,219 @@
+"""Persistance des projets : format compact versionné et sauvegarde automatique par sections.
+
+Format .fcelec (version 2) : en-tête `FCELEC` + octet de version, puis JSON compressé (zlib)
+où les tables de câbles et de circuits sont écrites colonne par colonne (fcelec.modele) :
+les noms de champs ne sont écrits qu'une fois. Les anciens fichiers .json (version 1) se
+chargent toujours.
+"""
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import uuid
+import zlib
+
+from fcelec.mesures import mesure
+from fcelec.modele import ArbreTableaux, CarnetCables, Circuits, TableColonnes, normaliser_projet
+from fcelec.ressources import DOSSIER_DONNEES
+
+ENTETE = b"FCELEC"
+VERSION_FORMAT = 2
+EXTENSION = "fcelec"
+SECTIONS = ("info", "cables", "tableaux", "ks_global", "source")
+DOSSIER_AUTOSAUVEGARDES = os.path.join(DOSSIER_DONNEES, "projets")
+AUTOSAUVEGARDES_MAX = int(os.environ.get("FCELEC_AUTOSAUVEGARDES_MAX", 20))  # gardées par dossier (utilisateur)
+
+
+class FormatProjetInvalide(ValueError):
+    """Fichier qui n'est ni un projet .fcelec ni un projet JSON."""
+
+
+# --- ENCODAGE PAR COLONNES ---
+def _en_colonnes(lignes):
+    """Table en colonnes ou liste de dicts -> {"colonnes": [...], "valeurs": [[...], ...]} si toutes les lignes ont les mêmes clés."""
+    if isinstance(lignes, TableColonnes):
+        return lignes.en_colonnes()
+    if not lignes:
+        return {"colonnes": [], "valeurs": [], "n": 0}
+    colonnes = list(lignes[0])
+    if any(list(l) != colonnes for l in lignes):
+        return {"lignes": lignes}
+    return {"colonnes": colonnes, "valeurs": [[l[c] for l in lignes] for c in colonnes], "n": len(lignes)}
+
+
+def _en_table(classe, bloc):
+    if "lignes" in bloc:
+        return classe(bloc["lignes"])
+    return classe.depuis_colonnes(bloc)
+
+
+def encoder_section(nom, valeur):
+    if nom == "cables":
+        return _en_colonnes(valeur)
+    if nom == "tableaux":
+        blocs = {tableau: _en_colonnes(circuits) for tableau, circuits in valeur.items()}
+        if isinstance(valeur, ArbreTableaux):
+            # Amont et Ks seulement s'ils diffèrent d'un départ direct (Ks = 1)
+            for tableau, bloc in blocs.items():
+                if valeur.parent(tableau) is not None:
+                    bloc["parent"] = valeur.parent(tableau)
+                if valeur.ks(tableau) != 1.0:
+                    bloc["ks"] = valeur.ks(tableau)
+                if valeur.arrivee_modifiee(tableau):
+                    bloc["arrivee"] = valeur.arrivee_modifiee(tableau)
+        return blocs
+    return valeur
+
+
+def decoder_section(nom, valeur):
+    if nom == "cables":
+        return _en_table(CarnetCables, valeur)
+    if nom == "tableaux":
+        return ArbreTableaux({tableau: _en_table(Circuits, bloc) for tableau, bloc in valeur.items()},
+                             parents={tableau: bloc.get("parent") for tableau, bloc in valeur.items()},
+                             ks={tableau: bloc.get("ks", 1.0) for tableau, bloc in valeur.items()},
+                             arrivees={tableau: bloc.get("arrivee") for tableau, bloc in valeur.items()})
+    return valeur
+
+
+def _signature(section, valeur):
+    """Empreinte d'une section ; les tables fournissent la leur sans passer par JSON."""
+    if section == "cables" and isinstance(valeur, TableColonnes):
+        return valeur.empreinte().encode()
+    if section == "tableaux" and isinstance(valeur, ArbreTableaux):
+        return valeur.empreinte().encode()
+    return hashlib.blake2b(_json(encoder_section(section, valeur)), digest_size=16).digest()
+
+
+def _json(contenu):
+    return json.dumps(contenu, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# --- FICHIER PROJET ---
+@mesure("json.serialiser")
+def serialiser(projet):
+    """Projet -> octets .fcelec (appelé seulement au téléchargement)."""
+    contenu = {nom: encoder_section(nom, valeur) for nom, valeur in projet.items()}
+    return ENTETE + bytes([VERSION_FORMAT]) + zlib.compress(_json(contenu), 6)
+
+
+@mesure("json.charger")
+def charger(octets):
+    """Octets d'un fichier .fcelec ou .json -> projet. Lève FormatProjetInvalide."""
+    if octets.startswith(ENTETE) and len(octets) > len(ENTETE) and octets[len(ENTETE)] > VERSION_FORMAT:
+        raise FormatProjetInvalide(f"Format de projet v{octets[len(ENTETE)]} plus récent que l'application.")
+    try:
+        if octets.startswith(ENTETE):
+            contenu = json.loads(zlib.decompress(octets[len(ENTETE) + 1:]))
+            projet = {nom: decoder_section(nom, valeur) for nom, valeur in contenu.items()}
+        else:
+            projet = json.loads(octets)  # Version 1 : JSON brut
+    except (ValueError, KeyError, TypeError, AttributeError, zlib.error) as e:
+        raise FormatProjetInvalide("Fichier projet illisible.") from e
+    if not isinstance(projet, dict) or not isinstance(projet.get("info"), dict):
+        raise FormatProjetInvalide("Fichier projet illisible.")
+    try:
+        return normaliser_projet(projet)
+    except (ValueError, TypeError, AttributeError) as e:
+        raise FormatProjetInvalide("Fichier projet illisible.") from e
+
+
+def empreinte_octets(octets):
+    """Empreinte d'un fichier reçu : évite de le relire à chaque rerun."""
+    return hashlib.blake2b(octets, digest_size=16).hexdigest()
+
+
+# --- SAUVEGARDE AUTOMATIQUE ---
+class AutoSauvegarde:
+    """Sauvegarde côté serveur d'un projet, section par section.
+
+    Chaque section (info, câbles, tableaux, Ks, source) est un fichier compressé ; seules les
+    sections dont l'empreinte a changé depuis la dernière écriture sont réécrites. Chaque
+    nouvelle sauvegarde purge les plus anciennes du dossier au-delà de AUTOSAUVEGARDES_MAX.
+    """
+
+    def __init__(self, identifiant=None, dossier=None):
+        dossier = dossier or DOSSIER_AUTOSAUVEGARDES
+        if identifiant is None:
+            purger_autosauvegardes(dossier)
+        self.identifiant = identifiant or uuid.uuid4().hex
+        self.dossier = os.path.join(dossier, self.identifiant)
+        self._empreintes = {}
+
+    def _chemin(self, section):
+        return os.path.join(self.dossier, f"{section}.json.z")
+
+    @mesure("json.autosauvegarde")
+    def sauvegarder(self, projet):
+        """Écrit les sections modifiées ; renvoie leurs noms."""
+        ecrites = []
+        for section in SECTIONS:
+            if section not in projet:
+                continue
+            signature = _signature(section, projet[section])
+            if self._empreintes.get(section) == signature:
+                continue
+            brut = _json(encoder_section(section, projet[section]))
+            os.makedirs(self.dossier, exist_ok=True)
+            temporaire = self._chemin(section) + ".tmp"
+            with open(temporaire, "wb") as f:
+                f.write(zlib.compress(brut, 1))
+            os.replace(temporaire, self._chemin(section))
+            self._empreintes[section] = signature
+            ecrites.append(section)
+        return ecrites
+
+    def restaurer(self):
+        """Projet tel que sauvegardé ; les empreintes repartent de cet état."""
+        projet = {}
+        for section in SECTIONS:
+            try:
+                with open(self._chemin(section), "rb") as f:
+                    brut = zlib.decompress(f.read())
+            except FileNotFoundError:
+                continue
+            projet[section] = decoder_section(section, json.loads(brut))
+        if "info" not in projet:
+            raise FileNotFoundError(self.dossier)
+        normaliser_projet(projet)
+        for section in SECTIONS:
+            self._empreintes[section] = _signature(section, projet[section])
+        return projet
+
+
+def dossier_utilisateur(utilisateur):
+    """Dossier des sauvegardes automatiques d'un utilisateur (nom haché : sûr comme nom de dossier)."""
+    nom = hashlib.blake2b(str(utilisateur).encode("utf-8"), digest_size=8).hexdigest()
+    return os.path.join(DOSSIER_AUTOSAUVEGARDES, nom)
+
+
+def lister_autosauvegardes(dossier=None):
+    """[(identifiant, nom du projet, date de modification)] du plus récent au plus ancien."""
+    dossier = dossier or DOSSIER_AUTOSAUVEGARDES
+    resultats = []
+    try:
+        entrees = list(os.scandir(dossier))
+    except FileNotFoundError:
+        return []
+    for entree in entrees:
+        chemin_info = os.path.join(entree.path, "info.json.z")
+        try:
+            with open(chemin_info, "rb") as f:
+                nom = json.loads(zlib.decompress(f.read())).get("nom", "")
+            date = max(e.stat().st_mtime for e in os.scandir(entree.path))
+        except (OSError, ValueError, zlib.error):
+            continue
+        resultats.append((entree.name, nom, datetime.datetime.fromtimestamp(date)))
+    return sorted(resultats, key=lambda r: r[2], reverse=True)
+
+
+def purger_autosauvegardes(dossier=None, garder=None):
+    """Supprime les sauvegardes automatiques au-delà des `garder` plus récentes (AUTOSAUVEGARDES_MAX
+    par défaut) ; renvoie leurs identifiants."""
+    dossier = dossier or DOSSIER_AUTOSAUVEGARDES
+    garder = AUTOSAUVEGARDES_MAX if garder is None else garder
+    anciennes = [identifiant for identifiant, _, _ in lister_autosauvegardes(dossier)[garder:]]
+    for identifiant in anciennes:
+        shutil.rmtree(os.path.join(dossier, identifiant), ignore_errors=True)
+    return anciennes
@@ -0,0 +1,308 @@
+"""Notes de calcul PDF (carnet de câbles, bilan de puissance) et leur cache par contenu."""
+import datetime
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from fpdf import FPDF
+
+from fcelec.bilan import synthese_bilan
+from fcelec.mesures import MESURES, mesure
+from fcelec.modele import ArbreTableaux, TableColonnes
+from fcelec.ressources import logo_pdf
+
+TAILLE_CACHE_PDF = 16
+
+
+def sanitize_text(text, max_len=30):
+    """Blindage total contre les crashs PDF (Emojis, Arabe, Symboles spéciaux)"""
+    if not isinstance(text, str):
+        return str(text)
+    clean = text.replace("φ", "phi").replace("€", "Euros").replace("é", "e").replace("è", "e").replace("à", "a").replace("É", "E")
+    clean = clean.encode('latin-1', 'ignore').decode('latin-1')
+    return clean[:max_len] + "..." if len(clean) > max_len else clean
+
+
+# --- CLASSE PDF PROFESSIONNELLE ---
+class FCELEC_Report(FPDF):
+    def header(self):
+        try: self.image(logo_pdf(), 10, 8, 25)
+        except: pass
+
+        # AJOUT DE LA LIGNE VERTICALE BLEUE A COTÉ DU LOGO
+        self.set_draw_color(2, 136, 209) # Bleu FC ELEC
+        self.set_line_width(0.6)
+        self.line(38, 8, 38, 23)
+        self.set_line_width(0.2)
+        self.set_draw_color(0, 0, 0) # Retour au noir pour le texte
+
+        self.set_font("Helvetica", "B", 14)
+        self.cell(30)
+        self.cell(130, 8, "DOSSIER TECHNIQUE ELECTRIQUE", border=0, ln=0, align="C")
+        self.set_font("Helvetica", "I", 9)
+        self.cell(30, 8, f"{datetime.date.today().strftime('%d/%m/%Y')}", border=0, ln=1, align="R")
+        self.set_font("Helvetica", "I", 9)
+        self.cell(30)
+        self.cell(130, 5, "Note de calcul conforme a la norme NF C 15-100", border=0, ln=1, align="C")
+
+        # Ligne horizontale en bleu
+        self.set_draw_color(2, 136, 209)
+        self.line(10, 26, 200, 26)
+        self.set_draw_color(0, 0, 0)
+        self.ln(12)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font("Helvetica", "I", 8)
+        self.set_text_color(128, 128, 128)
+        self.line(10, 282, 200, 282)
+        self.cell(0, 5, f"FC ELEC - formation et consulting | WhatsApp : +212 6 74 53 42 64 | Page {self.page_no()}", 0, 0, "C")
+
+
+def _octets(pdf):
+    # CORRECTION DE L'ERREUR DE BYTES / FPDF
+    pdf_out = pdf.output(dest='S')
+    return pdf_out.encode('latin-1') if isinstance(pdf_out, str) else bytes(pdf_out)
+
+
+# --- CARNET DE CÂBLES : RENDU PAR PAGES ---
+HAUTEUR_LIGNE = 8
+NOIR, VERT, ORANGE = (0, 0, 0), (0, 128, 0), (255, 100, 0)
+# REDIMENSIONNEMENT DES COLONNES DU PDF ET SUPPRESSION DE LA POSE
+# (en-tête, largeur, alignement, style, couleur) ; total exact des largeurs = 190
+COLONNES_CARNET = [
+    ("Tab.", 14, "L", "", NOIR), ("Repere", 26, "L", "", NOIR), ("Type Cable", 40, "C", "", NOIR),
+    ("L(m)", 12, "C", "", NOIR), ("Ib(A)", 15, "C", "", NOIR), ("In(A)", 15, "C", "B", NOIR),
+    ("Iz(A)", 15, "C", "B", VERT), ("Section", 35, "C", "B", ORANGE), ("dU(%)", 18, "C", "", NOIR),
+]
+
+
+def _sanitize_colonne(valeurs, max_len):
+    """sanitize_text sur toute une colonne, une seule fois par valeur distincte."""
+    memo = {}
+    return [memo[v] if v in memo else memo.setdefault(v, sanitize_text(v, max_len)) for v in valeurs]
+
+
+def _champ(cables, nom, defaut=None):
+    if isinstance(cables, TableColonnes):
+        return cables.colonne(nom, defaut)
+    return [c.get(nom, defaut) for c in cables]
+
+
+def formater_lignes_cables(cables):
+    """Prépare en une passe, colonne par colonne, les textes des 9 colonnes du carnet."""
+    types = _champ(cables, "Type Câble", "U1000 R2V")
+    return list(zip(
+        _sanitize_colonne(_champ(cables, "Tableau", "TGBT"), 12),
+        _sanitize_colonne(_champ(cables, "Repère"), 18),
+        _sanitize_colonne([t.split(" (")[0] if isinstance(t, str) else t for t in types], 25),
+        [str(v) for v in _champ(cables, "Long.(m)")],
+        [str(v) for v in _champ(cables, "Ib(A)")],
+        [f"{v}A" for v in _champ(cables, "Calibre(A)")],
+        [f"{v}A" for v in _champ(cables, "Iz(A)", "-")],
+        # La méthode de pose a été supprimée, seul le texte de la section apparait
+        [f"{v} mm2" for v in _champ(cables, "Section(mm2)")],
+        [str(v) for v in _champ(cables, "dU(%)")],
+    ))
+
+
+def _largeur_texte(pdf, style, texte, largeurs):
+    cle = (style, texte)
+    if cle not in largeurs:
+        pdf.set_font("Helvetica", style, 8)
+        largeurs[cle] = pdf.get_string_width(texte)
+    return largeurs[cle]
+
+
+def _mise_en_page(pdf, lignes, largeurs):
+    """Abscisses des textes de chaque colonne ; `largeurs` (propre au document) mémorise la
+    largeur de chaque texte distinct, mesurée une seule fois."""
+    x, colonnes = pdf.l_margin, []
+    for i, (_, largeur, align, style, _) in enumerate(COLONNES_CARNET):
+        if align == "L":
+            colonnes.append([(x + pdf.c_margin, l[i]) for l in lignes])
+        else:
+            colonnes.append([(x + (largeur - _largeur_texte(pdf, style, l[i], largeurs)) / 2, l[i]) for l in lignes])
+        x += largeur
+    return colonnes
+
+
+def _dessiner_page(pdf, y0, lignes, largeurs):
+    """Dessine les lignes d'une page : quadrillage en traits continus, puis texte colonne par
+    colonne pour ne changer de police et de couleur qu'une fois par colonne."""
+    h = HAUTEUR_LIGNE
+    ys = [y0]
+    for _ in lignes:
+        ys.append(ys[-1] + h)
+    x_gauche = pdf.l_margin
+    x_droite = x_gauche + sum(c[1] for c in COLONNES_CARNET)
+    for y in ys:
+        pdf.line(x_gauche, y, x_droite, y)
+    x = x_gauche
+    for _, largeur, *_ in COLONNES_CARNET:
+        pdf.line(x, y0, x, ys[-1])
+        x += largeur
+    pdf.line(x, y0, x, ys[-1])
+
+    colonnes = _mise_en_page(pdf, lignes, largeurs)
+    for (_, _, _, style, couleur), textes in zip(COLONNES_CARNET, colonnes):
+        pdf.set_font("Helvetica", style, 8)
+        pdf.set_text_color(*couleur)
+        decalage = 0.5 * h + 0.3 * pdf.font_size
+        for y, (x, texte) in zip(ys, textes):
+            if texte:
+                pdf.text(x, y + decalage, texte)
+    pdf.set_text_color(*NOIR)
+    pdf.set_font("Helvetica", "", 8)
+    pdf.set_y(ys[-1])
+
+
+@mesure("pdf.carnet_cables")
+def generate_pdf_cables(nom_projet, cables):
+    pdf = FCELEC_Report()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.set_fill_color(2, 136, 209) # Bleu moderne
+    pdf.set_text_color(255, 255, 255)
+    titre = sanitize_text(nom_projet).upper()
+    pdf.cell(190, 10, f" CARNET DE CABLES - {titre}", border=0, ln=True, align="C", fill=True)
+    pdf.ln(5)
+
+    pdf.set_font("Helvetica", "B", 8)
+    pdf.set_fill_color(230, 230, 230)
+    pdf.set_text_color(0, 0, 0)
+
+    for entete, largeur, *_ in COLONNES_CARNET:
+        pdf.cell(largeur, HAUTEUR_LIGNE, entete, 1, 0, 'C', True)
+    pdf.ln()
+
+    pdf.set_font("Helvetica", "", 8)
+    lignes = formater_lignes_cables(cables)
+    largeurs = {}
+    debut = 0
+    while debut < len(lignes):
+        # Autant de lignes que la page peut en contenir (même règle que le saut de page automatique)
+        y, fin = pdf.y, debut
+        while fin < len(lignes) and not y + HAUTEUR_LIGNE > pdf.page_break_trigger:
+            y += HAUTEUR_LIGNE
+            fin += 1
+        if fin == debut:
+            pdf.add_page()
+            continue
+        _dessiner_page(pdf, pdf.y, lignes[debut:fin], largeurs)
+        debut = fin
+
+    return _octets(pdf)
+
+
+@mesure("pdf.bilan")
+def generate_pdf_bilan(nom_projet, tableaux, ks_global):
+    _, p_appel, kva_estime = synthese_bilan(tableaux, ks_global)
+
+    pdf = FCELEC_Report()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+
+    pdf.set_font("Helvetica", "B", 14)
+    titre = sanitize_text(nom_projet).upper()
+    pdf.set_text_color(2, 136, 209)
+    pdf.cell(190, 10, f"BILAN DE PUISSANCE - {titre}", ln=True, align="C")
+    pdf.set_text_color(0, 0, 0)
+    pdf.ln(5)
+
+    arbre = isinstance(tableaux, ArbreTableaux)
+    # Arbre : de la source vers l'aval, chaque tableau sous son amont
+    ordre = tableaux.parcours() if arbre else [(nom, 0) for nom in tableaux]
+    for tab_name, niveau in ordre:
+        circs = tableaux[tab_name]
+        aval = arbre and tableaux.enfants(tab_name)
+        if not circs and not aval: continue
+        pdf.set_font("Helvetica", "B", 11)
+        pdf.set_fill_color(220, 220, 220)
+        amont = f"  (aval de {sanitize_text(tableaux.parent(tab_name))})" if arbre and niveau else ""
+        pdf.cell(190, 8, f" {'  ' * niveau}TABLEAU : {sanitize_text(tab_name)}{amont}", border=1, ln=True, fill=True)
+
+        pdf.set_font("Helvetica", "B", 9)
+        pdf.cell(60, 6, "Circuit", 1)
+        pdf.cell(50, 6, "Type", 1, 0, 'C')
+        pdf.cell(30, 6, "P.Inst (W)", 1, 0, 'C')
+        pdf.cell(20, 6, "Ku", 1, 0, 'C')
+        pdf.cell(30, 6, "P.Abs (W)", 1, 1, 'C')
+
+        pdf.set_font("Helvetica", "", 9)
+        sous_total = 0
+        for c in circs:
+            pdf.cell(60, 6, sanitize_text(c['Circuit'], 30), 1)
+            pdf.cell(50, 6, sanitize_text(c['Type'], 25), 1, 0, 'C')
+            pdf.cell(30, 6, str(c['P(W)']), 1, 0, 'C')
+            pdf.cell(20, 6, str(c['Ku']), 1, 0, 'C')
+            pdf.cell(30, 6, str(c['P.Abs(W)']), 1, 1, 'C')
+            sous_total += c['P.Abs(W)']
+
+        pdf.set_font("Helvetica", "I", 9)
+        pdf.cell(190, 6, f"Sous-total absorbé ({sanitize_text(tab_name)}) : {sous_total} W", border='B', ln=True, align="R")
+        if aval or (arbre and tableaux.ks(tab_name) != 1.0):
+            pdf.cell(190, 6, f"Total avec tableaux aval : {tableaux.puissance_totale(tab_name):.0f} W | "
+                             f"Ks = {tableaux.ks(tab_name)} | Puissance d'appel : {tableaux.puissance_appel(tab_name):.0f} W",
+                     border='B', ln=True, align="R")
+        pdf.ln(4)
+
+    pdf.ln(5)
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.set_fill_color(2, 136, 209)
+    pdf.set_text_color(255, 255, 255)
+    pdf.cell(190, 10, f"PUISSANCE ACTIVE MAXIMALE (Ks={ks_global}) : {p_appel} W", border=0, ln=True, align="C", fill=True)
+    pdf.set_fill_color(240, 240, 240)
+    pdf.set_text_color(0, 0, 0)
+    pdf.cell(190, 10, f"PUISSANCE SOUSCRITE ESTIMEE (Cos phi 0.8) : {kva_estime} kVA", border=1, ln=True, align="C", fill=True)
+
+    return _octets(pdf)
+
+
+# --- CACHE DES PDF PAR CONTENU ---
+_cache_pdf = OrderedDict()
+_verrou_cache = threading.Lock()
+
+
+def _json_defaut(valeur):
+    # Les tables en colonnes sont représentées par leur empreinte, sans être parcourues
+    return valeur.empreinte() if isinstance(valeur, (TableColonnes, ArbreTableaux)) else str(valeur)
+
+
+def empreinte(*contenus):
+    """Hash SHA-256 stable d'un ensemble de données JSON (projet, tableaux, Ks...)."""
+    brut = json.dumps(contenus, sort_keys=True, ensure_ascii=False, default=_json_defaut)
+    return hashlib.sha256(brut.encode("utf-8")).hexdigest()
+
+
+def _pdf_en_cache(cle, fabrique):
+    with _verrou_cache:
+        if cle in _cache_pdf:
+            _cache_pdf.move_to_end(cle)
+            MESURES.compter("pdf.cache_succes")
+            return _cache_pdf[cle]
+    MESURES.compter("pdf.cache_echec")
+    octets = fabrique()
+    with _verrou_cache:
+        _cache_pdf[cle] = octets
+        _cache_pdf.move_to_end(cle)
+        while len(_cache_pdf) > TAILLE_CACHE_PDF:
+            _cache_pdf.popitem(last=False)
+    return octets
+
+
+def pdf_cables(projet):
+    """PDF du carnet de câbles, regénéré seulement si le contenu du projet a changé."""
+    nom, cables = projet["info"]["nom"], projet["cables"]
+    # La date du jour figure dans l'en-tête : elle fait partie de la clé
+    cle = empreinte("cables", datetime.date.today().isoformat(), nom, cables)
+    return _pdf_en_cache(cle, lambda: generate_pdf_cables(nom, cables))
+
+
+def pdf_bilan(projet):
+    """PDF du bilan de puissance, regénéré seulement si les tableaux ou le Ks ont changé."""
+    nom, tableaux, ks_global = projet["info"]["nom"], projet["tableaux"], projet.get("ks_global", 0.8)
+    cle = empreinte("bilan", datetime.date.today().isoformat(), nom, tableaux, ks_global)
+    return _pdf_en_cache(cle, lambda: generate_pdf_bilan(nom, tableaux, ks_global))
@@ -0,0 +1,59 @@
+"""Cache processus des fichiers statiques (logo, programmes de formation PDF).
+
+Chaque ressource est lue et décodée une seule fois par processus, puis rechargée
+uniquement si le fichier change sur le disque (date de modification ou taille).
+"""
+import io
+import os
+import threading
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOGO = os.path.join(RACINE, "logoFCELEC.png")
+# Données locales de l'application (files d'attente, bases SQLite...)
+DOSSIER_DONNEES = os.environ.get("FCELEC_DONNEES", os.path.join(RACINE, ".donnees"))
+
+_cache = {}
+_verrou = threading.Lock()
+
+
+def chemin_ressource(nom):
+    """Chemin absolu d'un fichier livré avec l'application."""
+    return nom if os.path.isabs(nom) else os.path.join(RACINE, nom)
+
+
+def ressource(chemin, chargeur):
+    """Valeur chargée par `chargeur(chemin)`, mise en cache tant que le fichier est inchangé.
+
+    Lève FileNotFoundError si le fichier n'existe pas.
+    """
+    chemin = chemin_ressource(chemin)
+    stat = os.stat(chemin)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cle = (chemin, chargeur)
+    with _verrou:
+        entree = _cache.get(cle)
+        if entree is not None and entree[0] == signature:
+            return entree[1]
+    valeur = chargeur(chemin)
+    with _verrou:
+        _cache[cle] = (signature, valeur)
+    return valeur
+
+
+def _lire(chemin):
+    with open(chemin, "rb") as f:
+        return f.read()
+
+
+def lire_octets(chemin):
+    """Contenu binaire d'un fichier (PDF, PNG...)."""
+    return ressource(chemin, _lire)
+
+
+def logo_pdf():
+    """Logo à passer à `pdf.image()`, lu sur le disque une fois par processus.
+
+    fpdf2 identifie l'image par son contenu : elle n'est décodée qu'une fois par document,
+    quel que soit le nombre de pages.
+    """
+    return io.BytesIO(lire_octets(LOGO))
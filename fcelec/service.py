@@ -0,0 +1,206 @@
+"""Service HTTP/JSON local (asyncio) pour l'intégration ERP.
+
+    POST /dimensionner  {"circuits": [{...}, ...]}  -> {"cables": [...], "erreurs": [...]}
+    POST /projet        projet JSON ou .fcelec        -> {"synthese": {...}, "devis": [...]}
+    GET  /metriques     latences p50/p95 par route, débit, requêtes fusionnées
+    GET  /sante
+
+Les calculs (dimensionner_circuits, chiffrer : le code du formulaire et du module 4)
+s'exécutent dans un pool de processus ; la boucle asyncio ne fait que lire et écrire.
+Deux requêtes identiques reçues pendant le même calcul partagent son résultat. Un pool
+cassé (processus tué) est remplacé : seules les requêtes en cours échouent.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from fcelec.traitement import chiffrer, dimensionner_circuits, synthese
+
+TAILLE_MAX_CORPS = 64 * 1024 * 1024
+FENETRE_METRIQUES = 10_000  # dernières requêtes gardées par route pour les percentiles
+FENETRE_DEBIT = 60.0  # secondes
+MESSAGES_HTTP = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def _en_json(contenu):
+    return json.dumps(contenu, ensure_ascii=False, default=lambda v: v.item() if hasattr(v, "item") else str(v)).encode("utf-8")
+
+
+# --- CALCULS (exécutés dans les processus du pool : fonctions de module, octets en entrée et en sortie) ---
+_catalogue = None  # Un catalogue de prix par processus du pool, ouvert à la première requête
+
+
+def _catalogue_processus():
+    global _catalogue
+    if _catalogue is None:
+        from fcelec.catalogue import CataloguePrix
+        _catalogue = CataloguePrix()
+    return _catalogue
+
+
+def calcul_dimensionnement(corps):
+    contenu = json.loads(corps)
+    circuits = contenu.get("circuits") if isinstance(contenu, dict) else contenu
+    if not isinstance(circuits, list) or not all(isinstance(c, dict) for c in circuits):
+        raise ValueError('Liste de circuits attendue : {"circuits": [{...}, ...]}')
+    cables, erreurs = dimensionner_circuits(circuits)
+    return _en_json({"cables": cables, "erreurs": erreurs})
+
+
+def calcul_projet(corps):
+    from fcelec.projet import charger
+
+    projet = charger(corps)
+    devis = chiffrer(projet, _catalogue_processus())
+    return _en_json({"synthese": synthese(projet, devis), "devis": devis.to_dict("records")})
+
+
+ROUTES = {("POST", "/dimensionner"): calcul_dimensionnement, ("POST", "/projet"): calcul_projet}
+
+
+class Metriques:
+    """Latences par route (fenêtre glissante), débit récent et compteurs du service."""
+
+    def __init__(self):
+        self.debut = time.monotonic()
+        self.requetes = self.erreurs = self.fusionnees = self.en_cours = self.pools_relances = 0
+        self._latences = {}  # route -> deque de (instant, latence s)
+
+    def enregistrer(self, route, latence, erreur=False):
+        self.requetes += 1
+        self.erreurs += erreur
+        self._latences.setdefault(route, deque(maxlen=FENETRE_METRIQUES)).append((time.monotonic(), latence))
+
+    def instantane(self):
+        maintenant = time.monotonic()
+        routes = {}
+        for route, mesures in self._latences.items():
+            latences = np.array([l for _, l in mesures]) * 1000
+            recentes = sum(1 for t, _ in mesures if maintenant - t <= FENETRE_DEBIT)
+            routes[route] = {
+                "requetes": len(mesures), "p50_ms": round(float(np.percentile(latences, 50)), 2),
+                "p95_ms": round(float(np.percentile(latences, 95)), 2), "max_ms": round(float(latences.max()), 2),
+                "debit_req_s": round(recentes / min(FENETRE_DEBIT, maintenant - self.debut), 2),
+            }
+        return {"duree_s": round(maintenant - self.debut, 1), "requetes": self.requetes, "erreurs": self.erreurs,
+                "fusionnees": self.fusionnees, "en_cours": self.en_cours, "pools_relances": self.pools_relances,
+                "routes": routes}
+
+
+class ServiceCalcul:
+    """Serveur HTTP/1.1 minimal (connexions persistantes) adossé à un pool de processus."""
+
+    def __init__(self, processus=None):
+        self.processus = processus
+        self.metriques = Metriques()
+        self._pool = None
+        self._calculs = {}  # (route, empreinte du corps) -> calcul en cours
+
+    def _relancer_pool(self, pool):
+        """Remplace un pool cassé (inutilisable une fois un processus mort), une seule fois par pool."""
+        if self._pool is pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = ProcessPoolExecutor(max_workers=self.processus)
+            self.metriques.pools_relances += 1
+
+    async def _calculer(self, route, fonction, corps):
+        cle = (route, hashlib.blake2b(corps, digest_size=16).digest())
+        calcul = self._calculs.get(cle)
+        if calcul is None:
+            calcul = asyncio.get_running_loop().run_in_executor(self._pool, fonction, corps)
+            self._calculs[cle] = calcul
+            calcul.add_done_callback(lambda _: self._calculs.pop(cle, None))
+        else:
+            self.metriques.fusionnees += 1
+        # shield : un client qui se déconnecte n'annule pas le calcul partagé
+        return await asyncio.shield(calcul)
+
+    async def repondre(self, methode, chemin, corps):
+        """(statut, octets JSON) d'une requête."""
+        if methode == "GET" and chemin == "/sante":
+            return 200, _en_json({"statut": "ok"})
+        if methode == "GET" and chemin == "/metriques":
+            return 200, _en_json(self.metriques.instantane())
+        fonction = ROUTES.get((methode, chemin))
+        if fonction is None:
+            connu = any(c == chemin for _, c in ROUTES)
+            return (405, _en_json({"erreur": "Méthode non autorisée"})) if connu else (404, _en_json({"erreur": "Route inconnue"}))
+        debut = time.perf_counter()
+        self.metriques.en_cours += 1
+        pool = self._pool
+        try:
+            statut, reponse = 200, await self._calculer(chemin, fonction, corps)
+        except (ValueError, KeyError, TypeError) as e:  # JSON ou circuits invalides, projet illisible
+            statut, reponse = 400, _en_json({"erreur": str(e)})
+        except BrokenProcessPool as e:  # Processus du pool tué : les requêtes suivantes partent sur un pool neuf
+            self._relancer_pool(pool)
+            statut, reponse = 500, _en_json({"erreur": f"{type(e).__name__}: {e}"})
+        except Exception as e:
+            statut, reponse = 500, _en_json({"erreur": f"{type(e).__name__}: {e}"})
+        finally:
+            self.metriques.en_cours -= 1
+        self.metriques.enregistrer(chemin, time.perf_counter() - debut, statut != 200)
+        return statut, reponse
+
+    async def _connexion(self, lecteur, ecrivain):
+        try:
+            while True:
+                ligne = await lecteur.readline()
+                if not ligne:
+                    break
+                try:
+                    methode, cible, version = ligne.decode("latin-1").split()
+                except ValueError:
+                    break
+                entetes = {}
+                while (entete := await lecteur.readline()) not in (b"\r\n", b"\n", b""):
+                    nom, _, valeur = entete.decode("latin-1").partition(":")
+                    entetes[nom.strip().lower()] = valeur.strip()
+                longueur = int(entetes.get("content-length") or 0)
+                if longueur > TAILLE_MAX_CORPS:
+                    self._ecrire(ecrivain, 413, _en_json({"erreur": "Requête trop volumineuse"}), False)
+                    await ecrivain.drain()
+                    break
+                corps = await lecteur.readexactly(longueur) if longueur else b""
+                statut, reponse = await self.repondre(methode.upper(), cible.split("?")[0], corps)
+                garder = version == "HTTP/1.1" and entetes.get("connection", "").lower() != "close"
+                self._ecrire(ecrivain, statut, reponse, garder)
+                await ecrivain.drain()
+                if not garder:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):  # Client parti, en-tête invalide
+            pass
+        finally:
+            ecrivain.close()
+
+    @staticmethod
+    def _ecrire(ecrivain, statut, reponse, garder):
+        ecrivain.write(f"HTTP/1.1 {statut} {MESSAGES_HTTP[statut]}\r\nContent-Type: application/json; charset=utf-8\r\n"
+                       f"Content-Length: {len(reponse)}\r\nConnection: {'keep-alive' if garder else 'close'}\r\n\r\n".encode("latin-1"))
+        ecrivain.write(reponse)
+
+    async def servir(self, hote="127.0.0.1", port=8765, pret=None):
+        """Sert jusqu'à annulation ; `pret(serveur)` est appelé une fois le port ouvert."""
+        self._pool = ProcessPoolExecutor(max_workers=self.processus)
+        try:
+            serveur = await asyncio.start_server(self._connexion, hote, port)
+            async with serveur:
+                if pret:
+                    pret(serveur)
+                await serveur.serve_forever()
+        finally:
+            self._pool.shutdown()
+
+
+def servir(hote="127.0.0.1", port=8765, processus=None):
+    try:
+        asyncio.run(ServiceCalcul(processus).servir(hote, port, lambda s: print(f"Service FC ELEC sur http://{hote}:{port}")))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,153 @@
+"""Abaques des courants admissibles Iz (NF C 15-100), précompilés une fois par processus.
+
+La table est indexée par méthode de pose, métal et nombre de phases chargées ; les
+facteurs de correction (température, groupement, résistivité du sol) se combinent en
+un coefficient unique appliqué au moment de la recherche de section.
+"""
+import csv
+import os
+
+import numpy as np
+
+SECTIONS = [1.5, 2.5, 4, 6, 10, 16, 25, 35, 50, 70, 95, 120, 150, 185, 240, 300]
+
+METHODES_POSE = [
+    "Méthode A (Encastré dans paroi isolante)",
+    "Méthode B (Sous conduit apparent ou encastré)",
+    "Méthode C (Câble fixé au mur / apparent)",
+    "Méthode D (Enterré dans le sol)",
+    "Méthode E/F (Chemin de câbles / Air libre)",
+]
+LETTRES_POSE = [m.split(" ")[1] for m in METHODES_POSE]
+
+# Base de données complète des Iz (une ligne par méthode de pose, une colonne par section)
+DICT_IZ = {
+    METHODES_POSE[0]: {1.5: 14.5, 2.5: 19.5, 4: 26, 6: 34, 10: 46, 16: 61, 25: 80, 35: 99, 50: 119, 70: 151, 95: 182, 120: 210, 150: 240, 185: 273, 240: 321, 300: 367},
+    METHODES_POSE[1]: {1.5: 17.5, 2.5: 24, 4: 32, 6: 41, 10: 57, 16: 76, 25: 101, 35: 125, 50: 151, 70: 192, 95: 232, 120: 269, 150: 309, 185: 353, 240: 415, 300: 477},
+    METHODES_POSE[2]: {1.5: 19.5, 2.5: 27, 4: 36, 6: 46, 10: 63, 16: 85, 25: 112, 35: 138, 50: 168, 70: 213, 95: 258, 120: 299, 150: 344, 185: 392, 240: 461, 300: 530},
+    METHODES_POSE[3]: {1.5: 22, 2.5: 29, 4: 37, 6: 46, 10: 61, 16: 79, 25: 101, 35: 122, 50: 144, 70: 178, 95: 211, 120: 240, 150: 271, 185: 304, 240: 351, 300: 396},
+    METHODES_POSE[4]: {1.5: 23, 2.5: 31, 4: 42, 6: 54, 10: 75, 16: 100, 25: 135, 35: 169, 50: 207, 70: 268, 95: 328, 120: 382, 150: 441, 185: 506, 240: 599, 300: 693},
+}
+
+METAUX = ["Cuivre", "Aluminium"]
+K_METAL = (1.0, 0.78)      # k_al
+K_PHASES = (1.0, 1.15)     # index 0 = Tri, 1 = Mono (k_mono)
+
+# --- FACTEURS DE CORRECTION ---
+# Température ambiante (°C) -> k1, selon l'isolant
+FACTEURS_TEMPERATURE = {
+    "PR": {10: 1.15, 15: 1.12, 20: 1.08, 25: 1.04, 30: 1.00, 35: 0.96, 40: 0.91, 45: 0.87, 50: 0.82, 55: 0.76, 60: 0.71},
+    "PVC": {10: 1.22, 15: 1.17, 20: 1.12, 25: 1.06, 30: 1.00, 35: 0.94, 40: 0.87, 45: 0.79, 50: 0.71, 55: 0.61, 60: 0.50},
+}
+# Nombre de circuits jointifs -> k2 (une couche, sur paroi ou sous conduit)
+FACTEURS_GROUPEMENT = {1: 1.00, 2: 0.80, 3: 0.70, 4: 0.65, 5: 0.60, 6: 0.57, 7: 0.54, 8: 0.52, 9: 0.50, 12: 0.45, 16: 0.41, 20: 0.38}
+# Résistivité thermique du sol (K.m/W) -> k3, pose enterrée
+FACTEURS_RESISTIVITE_SOL = {0.40: 1.25, 0.50: 1.21, 0.70: 1.13, 0.85: 1.05, 1.00: 1.00, 1.20: 0.94, 1.50: 0.86, 2.00: 0.76, 2.50: 0.70, 3.00: 0.65}
+
+
+def _facteur_tabule(table, valeurs, grandeur):
+    """Facteur de la valeur tabulée immédiatement supérieure (côté sécuritaire).
+
+    Au-delà de la dernière valeur tabulée, ValueError : reprendre le dernier facteur serait
+    non sécuritaire (70 °C ne se corrige pas comme 60 °C).
+    """
+    cles = sorted(table)
+    valeurs = np.asarray(valeurs, dtype=float)
+    hors_table = ~(valeurs <= cles[-1])  # NaN compris
+    if hors_table.any():
+        raise ValueError(f"{grandeur} hors des abaques (max {cles[-1]:g}) : {valeurs[hors_table].flat[0]:g}")
+    return np.array([table[c] for c in cles])[np.searchsorted(cles, valeurs, side="left")]
+
+
+def facteur_correction(temperature=30, isolant="PR", nb_circuits=1, resistivite_sol=None):
+    """Produit k1 * k2 * k3 ; les valeurs par défaut donnent 1.0 (conditions de référence).
+
+    Scalaires ou tableaux de même forme ; une résistivité NaN (ou None) n'applique pas de k3.
+    """
+    if (np.asarray(nb_circuits, dtype=float) < 1).any():
+        raise ValueError("Nombre de circuits jointifs invalide (min 1)")
+    pvc = np.char.find(np.asarray(isolant, dtype=str), "PVC") >= 0
+    k = np.where(pvc, _facteur_tabule(FACTEURS_TEMPERATURE["PVC"], temperature, "Température ambiante"),
+                 _facteur_tabule(FACTEURS_TEMPERATURE["PR"], temperature, "Température ambiante"))
+    k = k * _facteur_tabule(FACTEURS_GROUPEMENT, nb_circuits, "Nombre de circuits jointifs")
+    if resistivite_sol is not None:
+        resistivite_sol = np.asarray(resistivite_sol, dtype=float)
+        if (resistivite_sol <= 0).any():
+            raise ValueError("Résistivité du sol invalide (doit être positive)")
+        sans_k3 = np.isnan(resistivite_sol)
+        k = k * np.where(sans_k3, 1.0, _facteur_tabule(FACTEURS_RESISTIVITE_SOL, np.where(sans_k3, 1.0, resistivite_sol),
+                                                       "Résistivité du sol"))
+    return float(k) if np.ndim(k) == 0 else k
+
+
+class TableIz:
+    """Abaque Iz immuable : iz[pose, métal, phases, section], k_al et k_mono déjà appliqués."""
+
+    __slots__ = ("sections", "lettres_pose", "_sections", "_iz")
+
+    def __init__(self, iz_base, sections=SECTIONS, lettres_pose=LETTRES_POSE):
+        self.sections = tuple(sections)
+        self.lettres_pose = tuple(lettres_pose)
+        self._sections = np.array(self.sections, dtype=float)
+        self._sections.setflags(write=False)
+        iz_base = np.asarray(iz_base, dtype=float)
+        iz = np.empty((len(self.lettres_pose), len(K_METAL), len(K_PHASES), len(self.sections)))
+        for i_metal, k_al in enumerate(K_METAL):
+            for i_ph, k_mono in enumerate(K_PHASES):
+                iz[:, i_metal, i_ph, :] = iz_base * k_al * k_mono
+        if (np.diff(iz, axis=-1) < 0).any():
+            raise ValueError("Les Iz doivent être croissants avec la section.")
+        iz.setflags(write=False)
+        self._iz = iz
+
+    @classmethod
+    def depuis_csv(cls, chemin):
+        """Charge une table 'Pose;Section;Iz' (une ligne par couple pose/section)."""
+        valeurs = {}
+        with open(chemin, newline="", encoding="utf-8-sig") as f:
+            for ligne in csv.DictReader(f, delimiter=";"):
+                valeurs[(ligne["Pose"].strip(), float(ligne["Section"]))] = float(ligne["Iz"])
+        lettres = list(dict.fromkeys(p for p, _ in valeurs))
+        sections = sorted({s for _, s in valeurs})
+        sections = [int(s) if s.is_integer() else s for s in sections]
+        return cls([[valeurs[(p, float(s))] for s in sections] for p in lettres], sections, lettres)
+
+    def indice_pose(self, lettre):
+        return self.lettres_pose.index(lettre)
+
+    def ligne(self, i_pose, i_metal, i_phases):
+        """Iz corrigés (métal, phases) de toutes les sections pour une pose donnée."""
+        return self._iz[i_pose, i_metal, i_phases]
+
+    def iz(self, i_pose, i_metal, i_phases, i_section, k=1.0):
+        """Iz corrigés ; accepte des indices scalaires ou des tableaux de même forme."""
+        return self._iz[i_pose, i_metal, i_phases, i_section] * k
+
+    def indice_section_min(self, i_pose, i_metal, i_phases, courant, k=1.0):
+        """Indices de la plus petite section telle que Iz * k >= courant (dernière section à défaut).
+
+        Vectorisé : une recherche dichotomique par combinaison (pose, métal, phases) présente.
+        """
+        i_pose, i_metal, i_phases, courant, k = np.broadcast_arrays(
+            np.asarray(i_pose), np.asarray(i_metal), np.asarray(i_phases),
+            np.asarray(courant, dtype=float), np.asarray(k, dtype=float))
+        cible = np.where(k == 1.0, courant, courant / k)
+        resultat = np.empty(cible.shape, dtype=int)
+        cle = (i_pose * len(K_METAL) + i_metal) * len(K_PHASES) + i_phases
+        for c in np.unique(cle):
+            masque = cle == c
+            p, reste = divmod(int(c), len(K_METAL) * len(K_PHASES))
+            m, ph = divmod(reste, len(K_PHASES))
+            resultat[masque] = np.searchsorted(self._iz[p, m, ph], cible[masque], side="left")
+        return np.minimum(resultat, len(self.sections) - 1)
+
+
+def _charger_table():
+    chemin = os.environ.get("FCELEC_TABLE_IZ")
+    if chemin:
+        return TableIz.depuis_csv(chemin)
+    return TableIz([[DICT_IZ[m][s] for s in SECTIONS] for m in METHODES_POSE])
+
+
+# Table partagée par tout le processus (chargée une seule fois à l'import)
+TABLE_IZ = _charger_table()
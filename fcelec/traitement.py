@@ -0,0 +1,136 @@
+"""Traitement sans interface des projets : notes de calcul, devis et synthèse.
+
+Mêmes moteurs que les modules 2 à 4 de l'application (carnet de câbles, bilan, nomenclature,
+rapports PDF), sans Streamlit ni gspread. Un lot de projets est réparti sur un pool de
+processus : chaque processus garde ses propres caches (dimensionnement, catalogue de prix).
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from fcelec.bilan import synthese_bilan
+from fcelec.import_cables import importer_cables, valider_bloc
+from fcelec.modele import nouveau_projet
+from fcelec.moteur_cables import dimensionner_lot, du_max_application, enregistrements
+from fcelec.nomenclature import IndexNomenclature, devis_xlsx
+from fcelec.projet import EXTENSION, FormatProjetInvalide, charger
+from fcelec.rapports import pdf_bilan, pdf_cables, sanitize_text
+
+EXTENSIONS_PROJET = (f".{EXTENSION}", ".json")
+
+
+def lister_projets(chemins):
+    """Fichiers projet (.fcelec, .json) désignés directement ou contenus dans les dossiers donnés."""
+    fichiers = []
+    for chemin in chemins:
+        if os.path.isdir(chemin):
+            fichiers.extend(os.path.join(chemin, nom) for nom in sorted(os.listdir(chemin))
+                            if nom.lower().endswith(EXTENSIONS_PROJET))
+        else:
+            fichiers.append(chemin)
+    return fichiers
+
+
+def projet_depuis_circuits(chemin, nom=None):
+    """Dimensionne un fichier de circuits (CSV ou XLSX) -> (nouveau projet, erreurs d'import)."""
+    projet = nouveau_projet(nom or os.path.splitext(os.path.basename(chemin))[0])
+    with open(chemin, "rb") as fichier:
+        lignes, erreurs = importer_cables(fichier, chemin)
+    projet["cables"].extend(lignes)
+    return projet, erreurs
+
+
+def dimensionner_circuits(circuits):
+    """Circuits (dicts aux champs de l'import en masse) -> (lignes du carnet, erreurs).
+
+    Même chemin que le formulaire « Calculer et Mémoriser » : validation, dimensionner_lot puis
+    enregistrements. "Application" (libellé du formulaire) remplace "dU max(%)" s'il manque.
+    Le numéro de ligne des erreurs est la position du circuit dans la liste.
+    """
+    circuits = [{**c, "dU max(%)": du_max_application(str(c["Application"]))}
+                if "Application" in c and c.get("dU max(%)") in (None, "") else c for c in circuits]
+    bloc = pd.DataFrame(circuits).astype(object).fillna("")
+    valides, erreurs = valider_bloc(bloc, premiere_ligne=0)
+    if valides.empty:
+        return [], erreurs
+    return enregistrements(valides, dimensionner_lot(valides)), erreurs
+
+
+def chiffrer(projet, catalogue=None):
+    """Devis du projet : COLONNES_DEVIS + "Total HT" (prix du catalogue s'il est fourni)."""
+    nomenclature = IndexNomenclature()
+    if catalogue is not None:
+        nomenclature.definir_catalogue(catalogue)
+    nomenclature.mettre_a_jour(projet)
+    devis = nomenclature.table().copy()
+    devis["Total HT"] = devis["Quantité"] * devis["Prix Unitaire HT"]
+    return devis
+
+
+def traiter_projet(projet, dossier_sortie, catalogue=None):
+    """Écrit la note de calcul, le bilan et le devis du projet ; renvoie sa synthèse (dict)."""
+    nom = projet["info"]["nom"]
+    os.makedirs(dossier_sortie, exist_ok=True)
+    fichiers = []
+
+    def ecrire(nom_fichier, octets):
+        chemin = os.path.join(dossier_sortie, nom_fichier)
+        with open(chemin, "wb") as f:
+            f.write(octets)
+        fichiers.append(chemin)
+
+    # Mêmes noms de fichiers que les téléchargements de l'application
+    if projet["cables"]:
+        ecrire(f"Note_Calcul_{sanitize_text(nom)}.pdf", pdf_cables(projet))
+    if projet["tableaux"]:
+        ecrire(f"Bilan_{sanitize_text(nom)}.pdf", pdf_bilan(projet))
+    devis = chiffrer(projet, catalogue)
+    if len(devis):
+        ecrire(f"Devis_{sanitize_text(nom)}.xlsx", devis_xlsx(devis))
+    return {**synthese(projet, devis), "Fichiers": fichiers}
+
+
+def synthese(projet, devis):
+    """Chiffres clés du projet : nombres de câbles et tableaux, puissances, totaux du devis."""
+    p_totale, p_appel, kva_estime = synthese_bilan(projet["tableaux"], projet.get("ks_global", 0.8))
+    total_ht = float(devis["Total HT"].sum()) if len(devis) else 0.0
+    return {
+        "Projet": projet["info"]["nom"], "Câbles": len(projet["cables"]), "Tableaux": len(projet["tableaux"]),
+        "P totale(W)": float(p_totale), "P appel(W)": int(p_appel), "S estimée(kVA)": float(kva_estime),
+        "Total HT(MAD)": round(total_ht, 2), "Total TTC(MAD)": round(total_ht * 1.20, 2),
+    }
+
+
+def traiter_fichier(chemin, dossier_sortie, avec_catalogue=True):
+    """Charge et traite un fichier projet ; les sorties vont dans un sous-dossier à son nom.
+
+    Ne lève pas : un fichier illisible, ou dont les données font échouer un moteur, donne
+    {"Fichier", "Erreur"} pour ne pas arrêter le lot.
+    """
+    try:
+        with open(chemin, "rb") as f:
+            projet = charger(f.read())
+        catalogue = None
+        if avec_catalogue:
+            from fcelec.catalogue import CataloguePrix
+            catalogue = CataloguePrix()
+        sortie = os.path.join(dossier_sortie, os.path.splitext(os.path.basename(chemin))[0])
+        return {"Fichier": chemin, **traiter_projet(projet, sortie, catalogue)}
+    except (FormatProjetInvalide, OSError) as e:
+        return {"Fichier": chemin, "Erreur": str(e)}
+    except (ValueError, KeyError, TypeError) as e:  # Données du projet refusées par un moteur
+        return {"Fichier": chemin, "Erreur": f"{type(e).__name__}: {e}"}
+
+
+def traiter_lot(chemins, dossier_sortie, processus=None, avec_catalogue=True):
+    """Traite les fichiers projet en parallèle ; génère les synthèses dans l'ordre des fichiers.
+
+    `processus` : taille du pool (None : nombre de cœurs) ; 1 traite dans le processus courant.
+    """
+    if processus == 1 or len(chemins) <= 1:
+        for chemin in chemins:
+            yield traiter_fichier(chemin, dossier_sortie, avec_catalogue)
+        return
+    with ProcessPoolExecutor(max_workers=processus) as pool:
+        yield from pool.map(traiter_fichier, chemins, [dossier_sortie] * len(chemins), [avec_catalogue] * len(chemins))
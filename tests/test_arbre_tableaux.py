@@ -0,0 +1,74 @@
+"""Totaux en cache de l'arbre des tableaux, y compris après des modifications faites directement sur les tables."""
+import random
+
+from fcelec.modele import ArbreTableaux
+
+
+def totaux_attendus(arbre):
+    """Recalcul complet, sans cache : {tableau: (propre, total avec aval, appel)}."""
+    totaux = {}
+    for nom, _ in reversed(arbre.parcours()):
+        propre = sum(c["P.Abs(W)"] for c in arbre[nom])
+        total = propre + sum(totaux[e][2] for e in arbre.enfants(nom))
+        totaux[nom] = (propre, total, total * arbre.ks(nom))
+    return totaux
+
+
+def verifier(arbre):
+    for nom, (propre, total, appel) in totaux_attendus(arbre).items():
+        assert arbre.puissance_propre(nom) == propre
+        assert abs(arbre.puissance_totale(nom) - total) < 1e-6
+        assert abs(arbre.puissance_appel(nom) - appel) < 1e-6
+    assert abs(arbre.puissance_totale() - sum(arbre.puissance_appel(r) for r in arbre.racines())) < 1e-6
+
+
+def test_modifications_aleatoires():
+    alea = random.Random(0)
+    arbre = ArbreTableaux()
+    arbre.ajouter_tableau("TGBT")
+    for i in range(1, 30):
+        arbre.ajouter_tableau(f"TD{i}", parent=alea.choice(list(arbre)), ks=alea.choice([0.6, 0.8, 1.0]))
+    for _ in range(500):
+        nom = alea.choice(list(arbre))
+        circuit = {"Circuit": "c", "Type": "x", "P(W)": 1000.0, "Ku": 1.0, "P.Abs(W)": alea.randint(100, 5000)}
+        action = alea.randrange(5)
+        if action == 0:
+            arbre.ajouter_circuit(nom, circuit)
+        elif action == 1:
+            arbre[nom].append(circuit)  # Sans passer par l'arbre
+        elif action == 2 and len(arbre[nom]):
+            del arbre[nom][alea.randrange(len(arbre[nom]))]
+        elif action == 3:
+            arbre.definir_ks(nom, alea.choice([0.5, 0.7, 1.0]))
+        elif len(arbre[nom]):
+            arbre[nom][0] = circuit
+        verifier(arbre)
+
+
+def test_tables_remplacees_ou_supprimees():
+    arbre = ArbreTableaux()
+    arbre.ajouter_tableau("TGBT")
+    arbre.ajouter_tableau("TD1", parent="TGBT", circuits=[{"Circuit": "a", "P.Abs(W)": 1000}])
+    ancienne = arbre["TD1"]
+    arbre["TD1"] = [{"Circuit": "b", "P.Abs(W)": 300}]
+    ancienne.append({"Circuit": "c", "P.Abs(W)": 5000})  # Table détachée : plus suivie
+    verifier(arbre)
+    assert arbre.puissance_totale() == 300
+    arbre["TD1"].clear()
+    verifier(arbre)
+    del arbre["TD1"]
+    assert arbre.puissance_totale() == 0
+
+
+def test_lectures_sans_relecture_des_circuits(monkeypatch):
+    arbre = ArbreTableaux({f"TD{i}": [{"Circuit": "a", "P.Abs(W)": 100}] for i in range(200)})
+    relus = []
+    monkeypatch.setattr(arbre, "_somme", lambda nom: relus.append(nom) or sum(arbre[nom].colonne("P.Abs(W)", 0)))
+    for nom in arbre:
+        arbre.puissance_propre(nom), arbre.puissance_totale(nom), arbre.puissance_appel(nom)
+    assert relus == []
+    arbre["TD7"].append({"Circuit": "b", "P.Abs(W)": 50})
+    for nom in arbre:
+        arbre.puissance_propre(nom), arbre.puissance_totale(nom), arbre.puissance_appel(nom)
+    assert relus == ["TD7"]
+    assert arbre.puissance_totale() == 200 * 100 + 50
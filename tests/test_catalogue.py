@@ -0,0 +1,24 @@
+"""Catalogue de prix : import d'un tarif fournisseur, lignes invalides signalées par ligne."""
+import io
+
+from fcelec.catalogue import CataloguePrix
+
+TARIF = """Référence;Métal;Type;Section (mm2);Calibre;Prix HT
+A1;Cuivre;U1000 R2V / RO2V (PR);16;;99,5
+A2;alu;U1000 R2V;16;;80
+A3;;U1000 R2V;25;;120
+A4;Inox;U1000 R2V;35;;150
+B1;;;;20;12
+C1;;;;;
+"""
+
+
+def test_import_tarif(tmp_path):
+    catalogue = CataloguePrix(str(tmp_path / "catalogue.sqlite3"))
+    nb_cables, nb_disjoncteurs, erreurs = catalogue.importer(io.BytesIO(TARIF.encode("utf-8")), "tarif.csv", "X")
+    assert (nb_cables, nb_disjoncteurs) == (2, 1)
+    assert erreurs == [{"Ligne": 4, "Erreur": "Métal invalide (Cuivre ou Aluminium)"},
+                       {"Ligne": 5, "Erreur": "Métal invalide (Cuivre ou Aluminium)"},
+                       {"Ligne": 7, "Erreur": "Ligne sans prix, section ni calibre"}]
+    cables, _ = catalogue.tables()
+    assert sorted(cables.index.get_level_values("metal")) == ["Aluminium", "Cuivre"]
@@ -0,0 +1,45 @@
+"""Import en masse : les lignes aux valeurs non finies ou aux libellés inconnus sont refusées."""
+import pandas as pd
+
+from fcelec.import_cables import valider_bloc
+
+
+def bloc(**colonnes):
+    ligne = {"Tension": "400V Tri", "P(W)": "12000", "Long.(m)": "45", "Métal": "Cuivre", "Pose": "E/F", "dU max(%)": "5"}
+    return pd.DataFrame([{**ligne, **colonnes}])
+
+
+def erreurs(**colonnes):
+    valides, erreurs = valider_bloc(bloc(**colonnes), premiere_ligne=2)
+    assert valides.empty == bool(erreurs)
+    return [e["Erreur"] for e in erreurs]
+
+
+def test_ligne_valide():
+    assert erreurs() == []
+    assert erreurs(Tension=" 230v   mono ") == []
+
+
+def test_valeurs_non_finies():
+    assert erreurs(**{"P(W)": "1e400"}) == ["Puissance invalide"]
+    assert erreurs(**{"Long.(m)": "inf"}) == ["Longueur invalide (min 1 m)"]
+    assert erreurs(**{"dU max(%)": "nan"}) == ["dU max invalide"]
+
+
+def test_tension_hors_libelles():
+    for tension in ["230/400", "400", "230V", "Tri 400V"]:
+        assert erreurs(Tension=tension) == ["Tension invalide (230V Mono ou 400V Tri)"]
+
+
+def test_facteurs_de_correction():
+    valides, _ = valider_bloc(pd.concat([bloc(), bloc(**{"Temp.(°C)": "45", "Circuits jointifs": "3"}),
+                                         bloc(Pose="D", **{"Résistivité sol(K.m/W)": "2.5"}),
+                                         bloc(Pose="B", **{"Résistivité sol(K.m/W)": "2.5"})], ignore_index=True).fillna(""),
+                              premiere_ligne=2)
+    assert valides["K correction"].round(3).tolist() == [1.0, 0.609, 0.7, 1.0]
+
+
+def test_conditions_hors_abaques():
+    assert erreurs(**{"Temp.(°C)": "70"}) == ["Température ambiante invalide (max 60 °C)"]
+    assert erreurs(**{"Circuits jointifs": "30"}) == ["Circuits jointifs invalides (1 à 20)"]
+    assert erreurs(Pose="D", **{"Résistivité sol(K.m/W)": "abc"}) == ["Résistivité du sol invalide (0 à 3 K.m/W)"]
@@ -0,0 +1,140 @@
+"""File d'attente des inscriptions : journal local, envoi en arrière-plan, accès à la feuille."""
+import sqlite3
+import threading
+
+import pandas as pd
+import pytest
+
+from fcelec.inscriptions import (COLONNES_INSCRIPTIONS, FEUILLE_INSCRIPTIONS, FileAttenteInscriptions, GSheetsLocal,
+                                 StockageGSheets, StockageSQLite, ajouter_lignes)
+
+
+def demande(nom):
+    return {"Date": "01/02/2026", "Nom et Prénom": nom, "Sexe": "Femme", "E-mail": f"{nom}@exemple.ma",
+            "Pays": "Maroc", "WhatsApp": "0600000000", "Formation Demandée": "CFO"}
+
+
+@pytest.fixture
+def feuilles(tmp_path):
+    return GSheetsLocal(str(tmp_path / "feuilles"))
+
+
+def test_ligne_illisible_mise_de_cote(tmp_path, feuilles):
+    file = FileAttenteInscriptions(feuilles, chemin=str(tmp_path / "attente.jsonl"))
+    file.enregistrer(demande("a"))
+    with open(file.chemin, "a", encoding="utf-8") as f:
+        f.write('{"Date": "01/02/2026", "Nom et Pr')  # Arrêt en pleine écriture
+    file.enregistrer(demande("b"))
+    assert file.en_attente() == 2
+    assert file.vider() == 2
+    assert feuilles.read()["Nom et Prénom"].tolist() == ["a", "b"]
+    with open(file.illisibles, encoding="utf-8") as f:
+        assert f.read() == '{"Date": "01/02/2026", "Nom et Pr\n'
+    # Les envois suivants ne sont plus bloqués
+    file.enregistrer(demande("c"))
+    assert file.vider() == 1
+    assert file.en_attente() == 0
+
+
+def test_echec_reseau_lot_conserve(tmp_path):
+    class ConnexionCoupee:
+        def append_rows(self, feuille, lignes):
+            raise ConnectionError("hors ligne")
+
+    file = FileAttenteInscriptions(ConnexionCoupee(), chemin=str(tmp_path / "attente.jsonl"))
+    file.enregistrer(demande("a"))
+    with pytest.raises(ConnectionError):
+        file.vider()
+    file.enregistrer(demande("b"))
+    assert file.en_attente() == 2
+
+
+def test_ajout_sans_attendre_le_reseau(tmp_path):
+    class ConnexionLente:
+        def __init__(self):
+            self.debloquer, self.recu = threading.Event(), threading.Event()
+            self.lignes = []
+
+        def append_rows(self, feuille, lignes):
+            self.debloquer.wait(10)
+            self.lignes.extend(lignes)
+            self.recu.set()
+
+    conn = ConnexionLente()
+    stockage = StockageGSheets(conn)
+    stockage.file = FileAttenteInscriptions(conn, chemin=str(tmp_path / "attente.jsonl"))
+    stockage.ajouter(demande("a"))
+    stockage.ajouter(demande("b"))  # Envoi en cours : repris par le thread déjà lancé
+    assert not conn.recu.is_set()
+    conn.debloquer.set()
+    assert conn.recu.wait(10)
+    for thread in [t for t in threading.enumerate() if t.name.startswith("envoi-")]:
+        thread.join(10)
+    assert sorted(l[1] for l in conn.lignes) == ["a", "b"]
+    assert stockage.file.en_attente() == 0
+
+
+class FeuilleGspread:
+    def __init__(self):
+        self.lignes = []
+
+    def row_values(self, i):
+        return self.lignes[i - 1] if len(self.lignes) >= i else []
+
+    def append_row(self, ligne, value_input_option=None):
+        self.lignes.append(ligne)
+
+    def append_rows(self, lignes, value_input_option=None):
+        self.lignes.extend(lignes)
+
+
+class ConnexionPublique:
+    """Seulement read/update, comme une GSheetsConnection sans accès à gspread."""
+
+    def __init__(self, client=None):
+        self.client = client
+        self.donnees = pd.DataFrame(columns=COLONNES_INSCRIPTIONS)
+
+    def read(self, worksheet=None, ttl=None):
+        return self.donnees
+
+    def update(self, worksheet=None, data=None):
+        self.donnees = data
+
+
+def test_ajout_par_la_feuille_gspread():
+    ws = FeuilleGspread()
+
+    class Client:
+        def _select_worksheet(self, *, worksheet=None):
+            return ws
+
+    ajouter_lignes(ConnexionPublique(Client()), "Inscriptions", [list(demande("a").values())])
+    assert ws.lignes == [COLONNES_INSCRIPTIONS, list(demande("a").values())]
+
+
+@pytest.mark.parametrize("client", [None, object(), type("SignatureChangee", (), {"_select_worksheet": lambda self, nom: None})()])
+def test_repli_sur_l_api_publique(client):
+    conn = ConnexionPublique(client)
+    ajouter_lignes(conn, "Inscriptions", [list(demande("a").values())])
+    ajouter_lignes(conn, "Inscriptions", [list(demande("b").values())])
+    assert conn.donnees["Nom et Prénom"].tolist() == ["a", "b"]
+
+
+def test_reprise_de_l_historique_dans_sqlite(tmp_path, feuilles):
+    feuilles.append_rows(FEUILLE_INSCRIPTIONS, [list(demande(n).values()) for n in ["a", "b"]])
+    stockage = StockageSQLite(str(tmp_path / "inscriptions.sqlite3"), conn_sync=feuilles)
+    assert stockage.compter() == 2
+    assert stockage.agregats()["Formation"].values.tolist() == [["CFO", 2]]
+    stockage.ajouter(demande("c"))
+    # Ni doublon dans la feuille, ni seconde reprise à la réouverture
+    assert feuilles.read()["Nom et Prénom"].tolist() == ["a", "b", "c"]
+    assert StockageSQLite(stockage.chemin, conn_sync=feuilles).compter() == 3
+
+
+def test_pas_de_reprise_si_la_base_a_deja_synchronise(tmp_path, feuilles):
+    chemin = str(tmp_path / "inscriptions.sqlite3")
+    StockageSQLite(chemin, conn_sync=feuilles).ajouter(demande("a"))
+    with sqlite3.connect(chemin) as db:
+        db.execute("PRAGMA user_version = 2")  # Base antérieure à la reprise
+    assert StockageSQLite(chemin, conn_sync=feuilles).compter() == 1
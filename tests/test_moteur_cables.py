@@ -0,0 +1,77 @@
+"""Le moteur vectorisé (avec ou sans MEMO) doit donner exactement les résultats du formulaire historique."""
+import math
+import random
+
+import pandas as pd
+import pytest
+
+from fcelec.moteur_cables import MEMO, METHODES_POSE, dimensionner_cable, dimensionner_lot, enregistrements
+
+CALIBRES = [10, 16, 20, 25, 32, 40, 50, 63, 80, 100, 125, 160, 200, 250, 400, 630, 800, 1000]
+SECTIONS = [1.5, 2.5, 4, 6, 10, 16, 25, 35, 50, 70, 95, 120, 150, 185, 240, 300]
+DICT_IZ = {
+    "Méthode A (Encastré dans paroi isolante)": {1.5: 14.5, 2.5: 19.5, 4: 26, 6: 34, 10: 46, 16: 61, 25: 80, 35: 99, 50: 119, 70: 151, 95: 182, 120: 210, 150: 240, 185: 273, 240: 321, 300: 367},
+    "Méthode B (Sous conduit apparent ou encastré)": {1.5: 17.5, 2.5: 24, 4: 32, 6: 41, 10: 57, 16: 76, 25: 101, 35: 125, 50: 151, 70: 192, 95: 232, 120: 269, 150: 309, 185: 353, 240: 415, 300: 477},
+    "Méthode C (Câble fixé au mur / apparent)": {1.5: 19.5, 2.5: 27, 4: 36, 6: 46, 10: 63, 16: 85, 25: 112, 35: 138, 50: 168, 70: 213, 95: 258, 120: 299, 150: 344, 185: 392, 240: 461, 300: 530},
+    "Méthode D (Enterré dans le sol)": {1.5: 22, 2.5: 29, 4: 37, 6: 46, 10: 61, 16: 79, 25: 101, 35: 122, 50: 144, 70: 178, 95: 211, 120: 240, 150: 271, 185: 304, 240: 351, 300: 396},
+    "Méthode E/F (Chemin de câbles / Air libre)": {1.5: 23, 2.5: 31, 4: 42, 6: 54, 10: 75, 16: 100, 25: 135, 35: 169, 50: 207, 70: 268, 95: 328, 120: 382, 150: 441, 185: 506, 240: 599, 300: 693},
+}
+
+
+def formule_formulaire(tension, p_w, longueur, nature, methode_pose, cos_phi, du_max):
+    """Calcul ligne par ligne de l'ancien formulaire « Calculer et Mémoriser »."""
+    V = 230 if "230V" in tension else 400
+    rho = 0.0225 if "Cuivre" in nature else 0.036
+    b = 2 if "230V" in tension else 1
+    Ib = p_w / (V * cos_phi) if b == 2 else p_w / (V * math.sqrt(3) * cos_phi)
+    In = next((x for x in CALIBRES if x >= Ib), 1000)
+    S_calc_du = (b * rho * longueur * Ib) / ((du_max / 100) * V)
+    S_ret_du = next((s for s in SECTIONS if s >= S_calc_du), 300)
+    k_al = 0.78 if "Aluminium" in nature else 1.0
+    k_mono = 1.15 if "230V" in tension else 1.0
+    S_ret_iz = next((s for s in SECTIONS if DICT_IZ[methode_pose][s] * k_al * k_mono >= In), 300)
+    S_ret = max(S_ret_du, S_ret_iz)
+    Iz_reel = DICT_IZ[methode_pose][S_ret] * k_al * k_mono
+    du_reel_pct = (((b * rho * longueur * Ib) / S_ret) / V) * 100
+    return {"Ib(A)": round(Ib, 1), "Calibre(A)": In, "Iz(A)": round(Iz_reel, 1), "Section(mm2)": S_ret, "dU(%)": round(du_reel_pct, 2)}
+
+
+def circuits_aleatoires(n, graine=0):
+    alea = random.Random(graine)
+    return pd.DataFrame({
+        "Tension": [alea.choice(["230V Mono", "400V Tri"]) for _ in range(n)],
+        "P(W)": [alea.uniform(100, 120_000) for _ in range(n)],
+        "Long.(m)": [alea.uniform(1, 300) for _ in range(n)],
+        "Métal": [alea.choice(["Cuivre", "Aluminium"]) for _ in range(n)],
+        "Pose": [alea.choice(METHODES_POSE) for _ in range(n)],
+        "Cos φ": [alea.choice([alea.uniform(0.7, 1.0), round(alea.uniform(0.7, 1.0), 2)]) for _ in range(n)],
+        "dU max(%)": [alea.choice([2.0, 3.0, 5.0]) for _ in range(n)],
+    })
+
+
+@pytest.mark.parametrize("memo", [False, True])
+def test_lot_identique_au_formulaire(memo):
+    MEMO.vider()
+    circuits = circuits_aleatoires(5000)
+    attendus = [formule_formulaire(c["Tension"], c["P(W)"], c["Long.(m)"], c["Métal"], c["Pose"], c["Cos φ"], c["dU max(%)"])
+                for c in circuits.to_dict("records")]
+    # Deux passages : calcul puis relecture du MEMO
+    for _ in range(2 if memo else 1):
+        lignes = enregistrements(circuits, dimensionner_lot(circuits, memo=memo))
+        obtenus = [{cle: ligne[cle] for cle in attendus[0]} for ligne in lignes]
+        assert obtenus == attendus
+
+
+def test_circuits_voisins_non_confondus_par_le_memo():
+    MEMO.vider()
+    circuits = pd.DataFrame({"Tension": "400V Tri", "P(W)": [10_000.0, 10_000.0004], "Long.(m)": 50.0, "Métal": "Cuivre",
+                             "Pose": "B", "Cos φ": [0.85, 0.85004], "dU max(%)": 5.0})
+    resultats = dimensionner_lot(circuits)
+    assert resultats["Ib(A)"].tolist() == [10_000.0 / (400 * math.sqrt(3) * 0.85), 10_000.0004 / (400 * math.sqrt(3) * 0.85004)]
+
+
+def test_dimensionner_cable():
+    ligne = dimensionner_cable("230V Mono", 3500.0, 25.0, "Cuivre", METHODES_POSE[1], 0.85, "Prises (5%)")
+    attendu = formule_formulaire("230V Mono", 3500.0, 25.0, "Cuivre", METHODES_POSE[1], 0.85, 5.0)
+    assert {cle: ligne[cle] for cle in attendu} == attendu
+    assert ligne["Pose"] == "B"
@@ -0,0 +1,20 @@
+"""Optimisation des sections : les arrivées de tableaux, dimensionnées par le bilan, ne sont pas touchées."""
+from fcelec.arrivees import repere_arrivee
+from fcelec.modele import CarnetCables
+from fcelec.moteur_cables import METHODES_POSE, dimensionner_cable
+from fcelec.optimisation import appliquer_sections, optimiser_sections
+
+
+def test_arrivees_exclues():
+    carnet = CarnetCables()
+    for repere in ["Départ 1", repere_arrivee("TD RDC"), "Départ 2"]:
+        carnet.append(dimensionner_cable("400V Tri", 30_000.0, 150.0, "Cuivre", METHODES_POSE[4], 0.85, "Prises (5%)",
+                                         repere=repere))
+    resultats = optimiser_sections(carnet, tarif=5.0, heures=8000.0)
+    assert resultats["Repère"].tolist() == ["Départ 1", "Départ 2"]
+    assert resultats.index.tolist() == [0, 2]
+    assert (resultats["Gain(MAD)"] > 0).all()
+    arrivee = dict(carnet[1])
+    assert appliquer_sections(carnet, resultats) == 2
+    assert carnet[1] == arrivee
+    assert carnet[0]["Section(mm2)"] == carnet[2]["Section(mm2)"] == resultats["Section optimale(mm2)"].iloc[0]
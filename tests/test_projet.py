@@ -0,0 +1,23 @@
+"""Sauvegarde automatique : un dossier par session, les plus anciens purgés."""
+import os
+
+from fcelec import projet as module_projet
+from fcelec.modele import nouveau_projet
+from fcelec.projet import AutoSauvegarde, lister_autosauvegardes
+
+
+def test_purge_des_plus_anciennes(tmp_path, monkeypatch):
+    monkeypatch.setattr(module_projet, "AUTOSAUVEGARDES_MAX", 3)
+    for i in range(6):
+        sauvegarde = AutoSauvegarde(dossier=str(tmp_path))
+        sauvegarde.sauvegarder(nouveau_projet(f"Projet {i}"))
+        os.utime(os.path.join(sauvegarde.dossier, "info.json.z"), (i, 1_000_000 + i))
+    AutoSauvegarde(dossier=str(tmp_path))
+    assert [s[1] for s in lister_autosauvegardes(str(tmp_path))] == ["Projet 5", "Projet 4", "Projet 3"]
+
+
+def test_restauration_sans_purge(tmp_path, monkeypatch):
+    monkeypatch.setattr(module_projet, "AUTOSAUVEGARDES_MAX", 0)
+    sauvegarde = AutoSauvegarde("fixe", dossier=str(tmp_path))
+    sauvegarde.sauvegarder(nouveau_projet("Ancien"))
+    assert AutoSauvegarde("fixe", dossier=str(tmp_path)).restaurer()["info"]["nom"] == "Ancien"
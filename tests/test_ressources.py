@@ -0,0 +1,22 @@
+"""Logo des rapports PDF : lu une fois par processus, décodé une fois par document."""
+from fcelec import ressources
+from fcelec.rapports import FCELEC_Report, _octets
+from fcelec.ressources import logo_pdf
+
+
+def test_logo_lu_une_fois(monkeypatch):
+    lectures = []
+    lire = ressources._lire
+    monkeypatch.setattr(ressources, "_lire", lambda chemin: lectures.append(chemin) or lire(chemin))
+    ressources._cache.clear()
+    assert logo_pdf().read() == logo_pdf().read()
+    assert len(lectures) == 1
+
+
+def test_logo_decode_une_fois_par_document():
+    pdf = FCELEC_Report()
+    for _ in range(3):
+        pdf.add_page()
+    octets = _octets(pdf)
+    assert octets.count(b"/Subtype /Image") == 1
+    assert len(pdf.image_cache.images) == 1
@@ -0,0 +1,47 @@
+"""Service de calcul : catalogue ouvert une fois par processus, pool remplacé s'il casse."""
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from fcelec import catalogue as module_catalogue
+from fcelec import service
+from fcelec.modele import nouveau_projet
+from fcelec.projet import serialiser
+from fcelec.service import ServiceCalcul
+
+
+def arreter_le_processus(corps):
+    os._exit(1)
+
+
+def test_un_catalogue_par_processus(tmp_path, monkeypatch):
+    ouvertures = []
+    catalogue_prix = module_catalogue.CataloguePrix
+    monkeypatch.setattr(module_catalogue, "CataloguePrix",
+                        lambda: ouvertures.append(1) or catalogue_prix(str(tmp_path / "catalogue.sqlite3")))
+    monkeypatch.setattr(service, "_catalogue", None)
+    corps = serialiser(nouveau_projet("Service"))
+    for _ in range(3):
+        assert "devis" in json.loads(service.calcul_projet(corps))
+    assert len(ouvertures) == 1
+
+
+def test_pool_remplace_apres_un_processus_tue(monkeypatch):
+    monkeypatch.setitem(service.ROUTES, ("POST", "/arret"), arreter_le_processus)
+    calcul = ServiceCalcul(processus=1)
+
+    async def scenario():
+        calcul._pool = ProcessPoolExecutor(max_workers=1)
+        try:
+            statut_arret, _ = await calcul.repondre("POST", "/arret", b"")
+            corps = json.dumps({"circuits": [{"Tension": "400V Tri", "P(W)": 12000, "Long.(m)": 45, "Métal": "Cuivre", "Pose": "E/F"}]})
+            statut, reponse = await calcul.repondre("POST", "/dimensionner", corps.encode("utf-8"))
+            return statut_arret, statut, json.loads(reponse)
+        finally:
+            calcul._pool.shutdown()
+
+    statut_arret, statut, reponse = asyncio.run(scenario())
+    assert statut_arret == 500
+    assert statut == 200 and len(reponse["cables"]) == 1
+    assert calcul.metriques.pools_relances == 1
@@ -0,0 +1,27 @@
+"""Facteurs de correction : valeur tabulée supérieure, refus au-delà des abaques."""
+import numpy as np
+import pytest
+
+from fcelec.moteur_cables import METHODES_POSE, dimensionner_cable
+from fcelec.tables_iz import facteur_correction
+
+
+def test_valeur_tabulee_superieure():
+    assert facteur_correction() == 1.0
+    assert facteur_correction(temperature=31) == facteur_correction(temperature=35) == 0.96
+    assert facteur_correction(temperature=41, isolant="H07VU / H07VR (PVC)", nb_circuits=10) == pytest.approx(0.79 * 0.45)
+    assert facteur_correction(resistivite_sol=np.array([np.nan, 1.1])).tolist() == [1.0, 0.94]
+
+
+@pytest.mark.parametrize("conditions", [{"temperature": 70}, {"temperature": np.nan}, {"nb_circuits": 30},
+                                        {"nb_circuits": 0}, {"resistivite_sol": 3.5}])
+def test_hors_abaques(conditions):
+    with pytest.raises(ValueError):
+        facteur_correction(**conditions)
+
+
+def test_formulaire_applique_k():
+    reference = dimensionner_cable("400V Tri", 30_000.0, 10.0, "Cuivre", METHODES_POSE[1], 0.85, "Prises (5%)")
+    corrige = dimensionner_cable("400V Tri", 30_000.0, 10.0, "Cuivre", METHODES_POSE[1], 0.85, "Prises (5%)",
+                                 k=facteur_correction(temperature=50, nb_circuits=4))
+    assert corrige["Section(mm2)"] > reference["Section(mm2)"]
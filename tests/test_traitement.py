@@ -0,0 +1,41 @@
+"""Traitement en lot : un projet aux données refusées par un moteur n'arrête pas le lot."""
+import json
+import os
+
+import pytest
+
+from fcelec.modele import nouveau_projet
+from fcelec.moteur_cables import METHODES_POSE, dimensionner_cable
+from fcelec.projet import EXTENSION, serialiser
+from fcelec.traitement import traiter_lot
+
+
+@pytest.fixture
+def projets(tmp_path):
+    projet = nouveau_projet("Bon")
+    projet["cables"].append(dimensionner_cable("400V Tri", 12_000.0, 40.0, "Cuivre", METHODES_POSE[2], 0.85, "Prises (5%)"))
+    projet["tableaux"].ajouter_tableau("TGBT", circuits=[{"Circuit": "Prises", "Type": "PC", "P(W)": 3500.0, "Ku": 0.8, "P.Abs(W)": 2800}])
+    chemins = [str(tmp_path / f"1_bon.{EXTENSION}")]
+    with open(chemins[0], "wb") as f:
+        f.write(serialiser(projet))
+    mauvais = {
+        "2_ks_invalide.json": {"info": {"nom": "Ks"}, "cables": [], "tableaux": {"TGBT": [{"Circuit": "c", "P.Abs(W)": 100}]}, "ks_global": "abc"},
+        "3_sans_nom.json": {"info": {}, "cables": [], "tableaux": {}},
+        "4_illisible.json": None,
+    }
+    for nom, contenu in mauvais.items():
+        chemins.append(str(tmp_path / nom))
+        with open(chemins[-1], "w", encoding="utf-8") as f:
+            f.write("{tronqué" if contenu is None else json.dumps(contenu))
+    return chemins
+
+
+@pytest.mark.parametrize("processus", [1, 2])
+def test_erreurs_par_fichier(projets, tmp_path, processus):
+    syntheses = list(traiter_lot(projets, str(tmp_path / "sorties"), processus, avec_catalogue=False))
+    assert [s["Fichier"] for s in syntheses] == projets
+    bon, *mauvais = syntheses
+    assert "Erreur" not in bon and bon["Câbles"] == 1 and bon["Tableaux"] == 1
+    assert all(os.path.exists(f) for f in bon["Fichiers"])
+    assert [s["Erreur"].split(":")[0] for s in mauvais[:2]] == ["ValueError", "KeyError"]
+    assert "Erreur" in mauvais[2]